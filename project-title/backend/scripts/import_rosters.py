@@ -0,0 +1,54 @@
+"""Create or update seating charts from a roster file (CSV or JSON).
+
+Run with:  make import-rosters ROSTER_FILE=district.csv [ROSTER_FOLDER=classes]
+
+ROSTER_FOLDER is a path inside the site (default: the site root),
+ROSTER_FORMAT overrides the format guessed from the file name and
+ROSTER_CHUNK_SIZE sets the charts written per transaction.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from project.title.roster_import import CHUNK_SIZE
+from project.title.roster_import import format_for
+from project.title.roster_import import import_rosters
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import os
+
+
+SITE_ID = os.getenv("PLONE_SITE_ID", "Plone")
+ROSTER_FILE = os.environ["ROSTER_FILE"]
+ROSTER_FOLDER = os.getenv("ROSTER_FOLDER", "")
+ROSTER_FORMAT = os.getenv("ROSTER_FORMAT") or format_for(ROSTER_FILE)
+CHUNK = int(os.getenv("ROSTER_CHUNK_SIZE", CHUNK_SIZE))
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById("admin")
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+container = site.unrestrictedTraverse(ROSTER_FOLDER) if ROSTER_FOLDER else site
+
+
+def print_progress(report):
+    print(
+        f"  {report['charts']} charts, {report['students']} students, "
+        f"{report['error_count']} errors ({report['elapsed']:.1f}s)"
+    )
+
+
+with open(ROSTER_FILE, "rb") as stream:
+    report = import_rosters(
+        container, stream, fmt=ROSTER_FORMAT, chunk_size=CHUNK, progress=print_progress
+    )
+
+for error in report["errors"]:
+    print(f"  record {error['record']}: {error['error']}")
+print(
+    f"Imported {report['charts']} seating charts "
+    f"({report['created']} created, {report['updated']} updated)"
+)
@@ -0,0 +1,65 @@
+"""Run the concurrent load harness against the instance's database.
+
+Run with:  make load-test [LOAD_WORKERS=8 LOAD_OPERATIONS=100]
+
+LOAD_WORKERS threads (default 4) each run LOAD_OPERATIONS operations
+(default 50) on their own ZODB connection. LOAD_MIX weighs the operations,
+e.g. "issue=3,return=3,pick=3,seat_move=1". LOAD_RESULTS names a file for
+the JSON report. The harness writes into a "load-test" folder of the site:
+use a copy of the database, never production data.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from project.title.load_harness import parse_mix
+from project.title.load_harness import prepare_classroom
+from project.title.load_harness import run_load
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import json
+import os
+import transaction
+
+
+SITE_ID = os.getenv("PLONE_SITE_ID", "Plone")
+USER_ID = os.getenv("LOAD_USER", "admin")
+WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+OPERATIONS = int(os.getenv("LOAD_OPERATIONS", "50"))
+MIX = parse_mix(os.getenv("LOAD_MIX", ""))
+RESULTS = os.getenv("LOAD_RESULTS")
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById(USER_ID)
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+chart_path = prepare_classroom(site)
+transaction.commit()
+
+report = run_load(
+    app._p_jar.db(),
+    "/".join(site.getPhysicalPath()),
+    chart_path,
+    workers=WORKERS,
+    operations=OPERATIONS,
+    mix=MIX,
+    user_id=USER_ID,
+)
+
+print(f"{WORKERS} workers, {report['elapsed_s']}s")
+for name, summary in dict(report["operations"], total=report["total"]).items():
+    latency = summary.get("latency", {})
+    print(
+        f"  {name}: {summary['completed']}/{summary['operations']} completed, "
+        f"{summary['throughput_per_s']}/s, p50 {latency.get('p50_ms')}ms, "
+        f"p95 {latency.get('p95_ms')}ms, p99 {latency.get('p99_ms')}ms, "
+        f"{summary['conflicts']} conflicts (retry rate {summary['retry_rate']}), "
+        f"{summary['failed']} failed, {summary['errors']} errors"
+    )
+
+if RESULTS:
+    with open(RESULTS, "w") as stream:
+        json.dump(report, stream, indent=2)
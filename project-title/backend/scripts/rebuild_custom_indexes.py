@@ -0,0 +1,72 @@
+"""Report on and rebuild the custom catalog indexes.
+
+Run with:  make index-health               (report only)
+           make rebuild-indexes [INDEXES=classroom_ready,hall_pass_status]
+
+INDEXES limits the rebuild to some custom indexes (default: all of them),
+INDEX_BATCH_SIZE sets the objects reindexed per transaction and
+INDEX_REBUILD=0 only prints the report.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from project.title.index_health import BATCH_SIZE
+from project.title.index_health import index_report
+from project.title.index_health import rebuild_custom_indexes
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import os
+
+
+SITE_ID = os.getenv("PLONE_SITE_ID", "Plone")
+INDEXES = [name for name in os.getenv("INDEXES", "").split(",") if name]
+BATCH = int(os.getenv("INDEX_BATCH_SIZE", BATCH_SIZE))
+REBUILD = os.getenv("INDEX_REBUILD", "1") != "0"
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById("admin")
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+catalog = site.portal_catalog
+
+
+def print_report():
+    health = index_report(catalog)
+    for name, entry in health["indexes"].items():
+        if not entry["exists"]:
+            print(f"  {name}: MISSING")
+            continue
+        print(
+            f"  {name} ({entry['meta_type']}): {entry['indexed']}/"
+            f"{entry['expected']} documents, {entry['missing']} missing, "
+            f"{entry['stale']} stale, {entry['values']} values, "
+            f"indexer {'ok' if entry['indexer'] is not False else 'NOT REGISTERED'}"
+        )
+    for column, exists in health["columns"].items():
+        if not exists:
+            print(f"  metadata column {column}: MISSING")
+
+
+def print_progress(report):
+    print(
+        f"  {report['objects']} objects, {report['error_count']} errors "
+        f"({report['elapsed']:.1f}s)"
+    )
+
+
+print_report()
+if REBUILD:
+    report = rebuild_custom_indexes(
+        catalog, names=INDEXES or None, batch_size=BATCH, progress=print_progress
+    )
+    for error in report["errors"]:
+        print(f"  {error['path']}: {error['error']}")
+    print(
+        f"Rebuilt {', '.join(report['indexes'])} over {report['objects']} objects "
+        f"({report['removed']} stale entries removed)"
+    )
+    print_report()
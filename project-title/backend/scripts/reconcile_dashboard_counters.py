@@ -0,0 +1,28 @@
+"""Rebuild the dashboard hall pass counters from the catalog.
+
+Run with:  make reconcile-counters
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from project.title.counters import reconcile_dashboard_counters
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import os
+import transaction
+
+
+SITE_ID = os.getenv("PLONE_SITE_ID", "Plone")
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById("admin")
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+
+snapshot = reconcile_dashboard_counters(site)
+transaction.commit()
+print(f"Dashboard counters reconciled: {snapshot}")
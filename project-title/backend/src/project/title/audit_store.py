@@ -0,0 +1,178 @@
+"""
+Append-Only Audit Store
+
+Keeps the security audit trail for the whole retention period
+(``audit_retention_days``) instead of the last 1000 entries.
+
+Layout (all BTrees, stored on the portal annotations):
+
+- ``buckets``: day (ISO date) -> ``LOBTree`` of nanosecond timestamp ->
+  entry (a plain dict, never changed once written)
+- ``counts``: day -> ``Length`` of the day's entries
+- ``length``: ``Length`` of all entries
+
+An append writes one key into the current day's bucket: concurrent
+appends are merged by BTree conflict resolution and the counters resolve
+their increments, so no write rewrites the trail. Retention drops whole
+days without loading them, and range queries and exports only visit the
+days in their range.
+"""
+
+from BTrees.Length import Length
+from BTrees.LOBTree import LOBTree
+from BTrees.OOBTree import OOBTree
+from datetime import datetime
+from datetime import timedelta
+from itertools import islice
+from persistent import Persistent
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+import csv
+import io
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+AUDIT_STORE_KEY = "project.title.audit_store"
+CSV_FIELDS = (
+    "timestamp",
+    "action",
+    "hall_pass_id",
+    "user_id",
+    "ip_address",
+    "user_agent",
+    "details",
+)
+
+
+def to_key(when):
+    """Nanosecond key of a (naive, local) datetime"""
+    return int(when.timestamp()) * 10**9 + when.microsecond * 1000
+
+
+def _day(key):
+    return datetime.fromtimestamp(key // 10**9).date().isoformat()
+
+
+class AuditStore(Persistent):
+    """Audit entries in one BTree per day"""
+
+    def __init__(self):
+        self.buckets = OOBTree()
+        self.counts = OOBTree()
+        self.length = Length()
+
+    def append(self, entry, key=None):
+        """Store ``entry`` at ``key`` (default: now) and return the key used"""
+        key = time.time_ns() if key is None else key
+        day = _day(key)
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = LOBTree()
+            self.counts[day] = Length()
+        # Same-nanosecond appends in one process: bump to the next free key
+        while key in bucket:
+            key += 1
+        bucket[key] = entry
+        self.counts[day].change(1)
+        self.length.change(1)
+        return key
+
+    def _days(self, start, end):
+        first = _day(start) if start is not None else None
+        last = _day(end) if end is not None else None
+        return self.buckets.keys(min=first, max=last)
+
+    def items(self, start=None, end=None):
+        """``(key, entry)`` pairs from ``start`` up to, not including, ``end``
+
+        ``start`` and ``end`` are datetimes or keys; entries come in
+        chronological order, one day's bucket at a time.
+        """
+        start = to_key(start) if isinstance(start, datetime) else start
+        end = to_key(end) if isinstance(end, datetime) else end
+        for day in self._days(start, end):
+            yield from self.buckets[day].items(min=start, max=end, excludemax=True)
+
+    def entries(self, start=None, end=None, offset=0, limit=None):
+        """Entries of a time range, paginated without loading the others"""
+        stop = None if limit is None else offset + limit
+        return [entry for _, entry in islice(self.items(start, end), offset, stop)]
+
+    def count(self, start=None, end=None):
+        """Number of entries in a time range"""
+        if start is None and end is None:
+            return self.length()
+        start = to_key(start) if isinstance(start, datetime) else start
+        end = to_key(end) if isinstance(end, datetime) else end
+        first = _day(start) if start is not None else None
+        last = _day(end) if end is not None else None
+        total = 0
+        for day in self._days(start, end):
+            if day in (first, last):
+                bucket = self.buckets[day]
+                total += len(bucket.keys(min=start, max=end, excludemax=True))
+            else:
+                total += self.counts[day]()
+        return total
+
+    def prune(self, retention_days, now=None):
+        """Drop the days older than ``retention_days``; returns entries removed"""
+        cutoff = ((now or datetime.now()) - timedelta(days=retention_days)).date()
+        cutoff = cutoff.isoformat()
+        if not self.buckets or self.buckets.minKey() >= cutoff:
+            return 0
+        removed = 0
+        for day in list(self.buckets.keys(max=cutoff, excludemax=True)):
+            removed += self.counts[day]()
+            del self.buckets[day]
+            del self.counts[day]
+        self.length.change(-removed)
+        logger.info(f"Pruned {removed} audit entries older than {cutoff}")
+        return removed
+
+    def __len__(self):
+        return self.length()
+
+
+def jsonl_lines(entries):
+    """One JSON document per entry"""
+    for entry in entries:
+        yield json.dumps(entry, default=str) + "\n"
+
+
+def csv_lines(entries):
+    """CSV header and one row per entry (``details`` as JSON)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for entry in entries:
+        row = dict(entry)
+        row["details"] = json.dumps(row.get("details") or {}, default=str)
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson", jsonl_lines),
+    "csv": ("text/csv", csv_lines),
+}
+
+
+def get_audit_store(portal=None, create=True):
+    """Return the site's audit store from portal annotations
+
+    Pass ``create=False`` on read-only code paths so GET requests never
+    write to the ZODB.
+    """
+    portal = portal or api.portal.get()
+    annotations = IAnnotations(portal)
+    store = annotations.get(AUDIT_STORE_KEY)
+    if store is None and create:
+        store = annotations[AUDIT_STORE_KEY] = AuditStore()
+    return store
@@ -0,0 +1,310 @@
+"""
+Classroom Benchmark Suite
+
+Generates a district of classroom data and times the dashboard, picker,
+hall pass and seating endpoints on it. Used by
+``tests/test_benchmark_suite.py`` (``make benchmark``).
+
+The district size is set by ``Scale``, read from the environment:
+``BENCHMARK_SCHOOLS`` x ``BENCHMARK_CLASSROOMS`` (per school) x
+``BENCHMARK_STUDENTS`` (per classroom), with ``BENCHMARK_DAYS`` days of
+``BENCHMARK_PASSES_PER_DAY`` hall passes and ``BENCHMARK_PICKS_PER_DAY``
+picker picks per classroom.
+
+The cases (``endpoint_cases``) call the views behind the dashboard,
+picker, hall pass and seating endpoints on the first generated classroom.
+Every case runs ``warm`` (one untimed call first, caches kept) and
+``cold`` (application caches cleared before every timed call: the RAM
+cache backend, fairness engines and parsed seating grids; the ZODB cache
+is left alone). Durations are taken with ``perf_counter`` and summarized
+as p50/p95/p99.
+
+Results are JSON documents (``results_document``). ``compare`` checks a
+run against a stored baseline document of the same shape; a case
+regresses when its p95 exceeds the baseline by more than the tolerance.
+"""
+
+from datetime import datetime
+from datetime import time as day_time
+from datetime import timedelta
+from plone import api
+import itertools
+import json
+import os
+import platform
+import random
+import time
+
+from .browser.random_picker import picker_history_key
+from .browser.random_picker import PICKER_HISTORY_VERSIONS
+from .browser.random_picker import picker_version_key
+from .cache_backends import get_cache_backend
+from .fairness import clear_fairness_engines
+from .hall_pass_store import classroom_for
+from .hall_pass_store import get_hall_pass_repository
+from .storage import get_classroom_storage
+from .timing import percentile
+
+DEFAULT_ITERATIONS = 10
+DEFAULT_TOLERANCE = 0.25  # 25% slower than the baseline fails
+DEFAULT_SLACK_MS = 2.0  # Absolute allowance, so sub-millisecond noise passes
+MODES = ("warm", "cold")
+DESTINATIONS = ("Restroom", "Library", "Nurse", "Office", "Water Fountain")
+
+
+class Scale:
+    """Size of the generated district"""
+
+    FIELDS = {
+        "schools": ("BENCHMARK_SCHOOLS", 1),
+        "classrooms": ("BENCHMARK_CLASSROOMS", 2),
+        "students": ("BENCHMARK_STUDENTS", 25),
+        "days": ("BENCHMARK_DAYS", 2),
+        "passes_per_day": ("BENCHMARK_PASSES_PER_DAY", 5),
+        "picks_per_day": ("BENCHMARK_PICKS_PER_DAY", 10),
+    }
+
+    def __init__(self, **sizes):
+        for field, (_, default) in self.FIELDS.items():
+            setattr(self, field, int(sizes.get(field, default)))
+
+    @classmethod
+    def from_environ(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        return cls(
+            **{
+                field: environ[variable]
+                for field, (variable, _) in cls.FIELDS.items()
+                if environ.get(variable)
+            }
+        )
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def _create(container, type_name, obj_id, **fields):
+    return api.content.create(
+        container=container, type=type_name, id=obj_id, safe_id=False, **fields
+    )
+
+
+def generate_district(portal, scale, seed=0, now=None):
+    """Create schools, classrooms, seating charts, passes and pick history
+
+    Hall passes exist both as HallPass content (catalog-backed dashboard)
+    and as hall pass repository records (hall pass manager). All of today's
+    passes but the last are returned.
+
+    Returns:
+        dict: ``classrooms`` (folders), their ``charts`` and ``counts`` of
+        the created objects
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    repository = get_hall_pass_repository(portal)
+    storage = get_classroom_storage(portal)
+    district = {"classrooms": [], "charts": [], "counts": {}}
+    passes = picks = 0
+
+    for s in range(scale.schools):
+        school = _create(portal, "Folder", f"bench-school-{s}", title=f"School {s}")
+        for c in range(scale.classrooms):
+            room = _create(school, "Folder", f"room-{c}", title=f"Room {s}-{c}")
+            students = [f"Student {s}-{c}-{n}" for n in range(scale.students)]
+            chart = _create(
+                room, "SeatingChart", "seating", title="Seating", students=students
+            )
+            district["classrooms"].append(room)
+            district["charts"].append(chart)
+            classroom = classroom_for(room)
+
+            for d in range(scale.days):
+                day = (now - timedelta(days=d)).date()
+                start = datetime.combine(day, day_time(8, 0))
+                for p in range(scale.passes_per_day):
+                    issued = min(start + timedelta(minutes=20 * p), now)
+                    active = d == 0 and p == scale.passes_per_day - 1
+                    returned = None if active else issued + timedelta(minutes=6)
+                    student = rng.choice(students)
+                    code = f"B{s}-{c}-{d}-{p}"
+                    hall_pass = _create(
+                        room, "HallPass", code.lower(), title=f"Pass {code}"
+                    )
+                    hall_pass.student_name = student
+                    hall_pass.destination = rng.choice(DESTINATIONS)
+                    hall_pass.issue_time = issued
+                    hall_pass.return_time = returned
+                    hall_pass.reindexObject()
+                    repository.add(
+                        {
+                            "pass_code": code,
+                            "student_name": student,
+                            "destination": hall_pass.destination,
+                            "issue_time": issued.isoformat(),
+                            "return_time": returned.isoformat() if returned else None,
+                            "expected_duration": 5,
+                        },
+                        classroom,
+                    )
+                    if returned:
+                        repository.mark_returned(code, returned)
+                    passes += 1
+
+                daily_key = picker_history_key(day)
+                history = storage.tree(daily_key)
+                for _ in range(scale.picks_per_day):
+                    student = rng.choice(students)
+                    record = dict(history.get(student) or {"count": 0, "picks": []})
+                    record["count"] += 1
+                    record["picks"] = (record["picks"] + [start.isoformat()])[-10:]
+                    record["last_picked"] = start.timestamp()
+                    history[student] = record
+                    storage.increment(
+                        PICKER_HISTORY_VERSIONS, picker_version_key(chart, day)
+                    )
+                    picks += 1
+
+    district["counts"] = {
+        "classrooms": len(district["classrooms"]),
+        "students": scale.schools * scale.classrooms * scale.students,
+        "passes": passes,
+        "picks": picks,
+    }
+    return district
+
+
+def endpoint_cases(portal, request, district):
+    """Benchmark cases: name -> callable, on the first generated classroom"""
+    room, chart = district["classrooms"][0], district["charts"][0]
+    dashboard = portal.restrictedTraverse("@@teacher-dashboard")
+    picker = chart.restrictedTraverse("@@random-picker")
+    hall_passes = room.restrictedTraverse("@@hall-pass-manager")
+    students = itertools.cycle(chart.students)
+    seats = itertools.cycle(
+        (row, col) for row in range(chart.grid_rows) for col in range(chart.grid_cols)
+    )
+
+    def issue_pass():
+        request["BODY"] = json.dumps(
+            {"student_name": next(students), "destination": "Library"}
+        )
+        return hall_passes.issue_pass()
+
+    def move_student():
+        return chart.update_position(next(students), *next(seats))
+
+    return {
+        "dashboard": dashboard.get_dashboard_data,
+        "picker_pick": picker.pick_student,
+        "hall_pass_data": hall_passes.get_passes_data,
+        "hall_pass_issue": issue_pass,
+        "seating_summary": chart.get_grid_summary,
+        "seating_update": move_student,
+    }
+
+
+def reset_caches(district=None):
+    """Drop application caches (the ``cold`` mode)"""
+    get_cache_backend().clear()
+    clear_fairness_engines()
+    for chart in (district or {}).get("charts", ()):
+        chart._v_parsed_grid = None
+
+
+def summarize(samples):
+    """Statistics in milliseconds of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "p50_ms": round(percentile(ordered, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def run_case(func, iterations=DEFAULT_ITERATIONS, mode="warm", reset=None):
+    """Time ``iterations`` calls of ``func`` in ``mode`` ("warm"/"cold")"""
+    if mode == "warm":
+        func()
+    samples = []
+    for _ in range(iterations):
+        if mode == "cold" and reset is not None:
+            reset()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def run_suite(cases, iterations=DEFAULT_ITERATIONS, modes=MODES, reset=None):
+    """``{"<case>:<mode>": summary}`` for every case and mode"""
+    return {
+        f"{name}:{mode}": run_case(func, iterations, mode, reset)
+        for name, func in cases.items()
+        for mode in modes
+    }
+
+
+def results_document(results, scale, iterations):
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cache_backend": get_cache_backend().name,
+            "scale": scale.as_dict(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def write_results(path, document):
+    with open(path, "w") as stream:
+        json.dump(document, stream, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    """Baseline document at ``path``, or None if there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def compare(
+    results,
+    baseline,
+    metric="p95_ms",
+    tolerance=DEFAULT_TOLERANCE,
+    slack_ms=DEFAULT_SLACK_MS,
+):
+    """Cases slower than their baseline
+
+    Cases missing from either side are skipped, so adding a case does not
+    fail a run against an older baseline.
+
+    Returns:
+        list: ``{"case", "metric", "baseline_ms", "result_ms", "limit_ms"}``
+    """
+    regressions = []
+    for case, expected in sorted(baseline.get("results", {}).items()):
+        if case not in results or metric not in expected:
+            continue
+        limit = expected[metric] * (1 + tolerance) + slack_ms
+        value = results[case][metric]
+        if value > limit:
+            regressions.append(
+                {
+                    "case": case,
+                    "metric": metric,
+                    "baseline_ms": expected[metric],
+                    "result_ms": value,
+                    "limit_ms": round(limit, 3),
+                }
+            )
+    return regressions
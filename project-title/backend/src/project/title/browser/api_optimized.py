@@ -11,22 +11,39 @@ for the classroom management platform. Focuses on:
 
 from Products.Five.browser import BrowserView
 from plone import api
-from plone.memoize import ram
 from zope.annotation.interfaces import IAnnotations
 from datetime import datetime
 import json
-import time
 import logging
+import time
 
 from .cors_helper import set_cors_headers
+from .json_response import etag_for
+from .json_response import JSONArray
+from .json_response import JSONObject
+from .json_response import stream_json
+from ..caching import cached
+from ..caching import generations
+from ..caching import HALL_PASSES
+from ..caching import PICKER
+from ..caching import SEATING
+from ..caching import SITE
+from ..caching import TIMERS
+from ..caching import USER
+from ..metrics import timed
 from ..optimizations import (
     get_dashboard_aggregates,
-    measure_performance,
-    optimize_catalog_query,
 )
+from ..pagination import InvalidCursor
+from ..pagination import page_limit
+from ..pagination import paginate_catalog
 
 logger = logging.getLogger(__name__)
 
+# Shortest cache ttl of the batch (timers): time-derived values such as
+# durations and remaining times refresh at least this often
+ETAG_WINDOW = 10
+
 
 class BatchedAPIView(BrowserView):
     """Batched API endpoints for optimal performance"""
@@ -40,55 +57,87 @@ class BatchedAPIView(BrowserView):
 
         # Get requested endpoints from query parameter
         endpoints = self.request.get("endpoints", "").split(",")
-        batch_data = {}
-
-        for endpoint in endpoints:
-            endpoint = endpoint.strip()
-            if endpoint == "dashboard":
-                batch_data["dashboard"] = self.get_dashboard_batch()
-            elif endpoint == "hall_passes":
-                batch_data["hall_passes"] = self.get_hall_passes_batch()
-            elif endpoint == "seating":
-                batch_data["seating"] = self.get_seating_batch()
-            elif endpoint == "participation":
-                batch_data["participation"] = self.get_participation_batch()
-            elif endpoint == "timers":
-                batch_data["timers"] = self.get_timers_batch()
-
-        self.request.response.setHeader("Content-Type", "application/json")
-        return json.dumps(
+
+        def batch_data():
+            # Each endpoint is computed and encoded before the next one
+            for endpoint in dict.fromkeys(endpoint.strip() for endpoint in endpoints):
+                if endpoint == "dashboard":
+                    yield "dashboard", self.get_dashboard_batch()
+                elif endpoint == "hall_passes":
+                    cursor = self.request.get("hall_passes_cursor")
+                    yield "hall_passes", self.get_hall_passes_batch(cursor)
+                elif endpoint == "seating":
+                    cursor = self.request.get("seating_cursor")
+                    yield "seating", self.get_seating_batch(cursor)
+                elif endpoint == "participation":
+                    yield "participation", self.get_participation_batch()
+                elif endpoint == "timers":
+                    yield "timers", self.get_timers_batch()
+
+        return stream_json(
+            self.request,
             {
                 "timestamp": datetime.now().isoformat(),
-                "data": batch_data,
+                "data": JSONObject(batch_data()),
                 "performance": {
                     "batched_endpoints": len(endpoints),
                     "cache_optimized": True,
                 },
-            }
+            },
+            etag=self.etag(endpoints),
         )
 
-    @measure_performance
+    def etag(self, endpoints):
+        """ETag from the cache generations the endpoints depend on
+
+        The body carries a fresh ``timestamp``, so a hash of it would never
+        match; this one changes when the cached data may have changed.
+        """
+        methods = {
+            "dashboard": get_dashboard_aggregates,
+            "hall_passes": self.get_hall_passes_batch,
+            "seating": self.get_seating_batch,
+            "participation": self.get_participation_batch,
+            "timers": self.get_timers_batch,
+        }
+        endpoints = sorted({endpoint.strip() for endpoint in endpoints} & set(methods))
+        kinds = sorted(
+            {kind for name in endpoints for kind in methods[name].cache_kinds}
+        )
+        user = api.user.get_current()
+        return etag_for(
+            user.getId() if user else None,
+            endpoints,
+            self.request.get("hall_passes_cursor"),
+            self.request.get("seating_cursor"),
+            generations(kinds),
+            int(time.time() // ETAG_WINDOW),
+        )
+
+    @timed("dashboard")
     def get_dashboard_batch(self):
         """Get dashboard data optimized for batched requests"""
         return get_dashboard_aggregates()
 
-    @ram.cache(lambda *args: time.time() // 30)  # 30-second cache
-    def get_hall_passes_batch(self):
-        """Get hall pass data with minimal queries"""
+    @cached(HALL_PASSES, ttl=30, scope=(SITE, USER))
+    def get_hall_passes_batch(self, cursor=None):
+        """Get hall pass data with minimal queries
+
+        One page of 20 passes; the next page is requested with the
+        returned ``next_cursor`` as ``hall_passes_cursor``.
+        """
         try:
             catalog = api.portal.get_tool("portal_catalog")
 
-            # Optimized query using performance indexes
-            query = optimize_catalog_query(
-                {
-                    "portal_type": "HallPass",
-                    "review_state": "active",
-                    "sort_on": "hall_pass_issue_time",
-                    "sort_limit": 20,  # Limit for performance
-                }
-            )
+            # Planned for the performance indexes by paginate_catalog
+            query = {
+                "portal_type": "HallPass",
+                "hall_pass_is_active": True,
+                "sort_on": "hall_pass_issue_time",
+            }
 
-            brains = catalog(**query)
+            page = paginate_catalog(query, cursor=cursor, limit=20, catalog=catalog)
+            brains = page["items"]
 
             passes_data = []
             current_time = datetime.now()
@@ -106,7 +155,10 @@ class BatchedAPIView(BrowserView):
 
                     # Only load object for essential annotation data
                     if hasattr(brain, "hall_pass_issue_time"):
-                        pass_data["issue_time"] = brain.hall_pass_issue_time
+                        issue_time = brain.hall_pass_issue_time
+                        pass_data["issue_time"] = (
+                            issue_time.isoformat() if issue_time else None
+                        )
                     else:
                         # Fallback to object loading only when needed
                         obj = brain.getObject()
@@ -133,6 +185,7 @@ class BatchedAPIView(BrowserView):
             return {
                 "active_passes": passes_data,
                 "count": len(passes_data),
+                "next_cursor": page["next_cursor"],
                 "last_updated": current_time.isoformat(),
             }
 
@@ -140,24 +193,25 @@ class BatchedAPIView(BrowserView):
             logger.error(f"Error in hall passes batch: {e}")
             return {"error": str(e), "active_passes": [], "count": 0}
 
-    @ram.cache(lambda *args: time.time() // 60)  # 60-second cache for seating
-    def get_seating_batch(self):
-        """Get seating chart data with optimized queries"""
+    @cached(SEATING, ttl=60, scope=(SITE, USER))
+    def get_seating_batch(self, cursor=None):
+        """Get seating chart data with optimized queries
+
+        Paged by 5 charts, continued with ``seating_cursor``.
+        """
         try:
             catalog = api.portal.get_tool("portal_catalog")
 
             # Get recent seating charts efficiently
-            query = optimize_catalog_query(
-                {
-                    "portal_type": "Document",
-                    "Subject": ["seating-chart"],
-                    "sort_on": "modified",
-                    "sort_order": "descending",
-                    "sort_limit": 5,
-                }
-            )
+            query = {
+                "portal_type": "Document",
+                "Subject": ["seating-chart"],
+                "sort_on": "modified",
+                "sort_order": "descending",
+            }
 
-            brains = catalog(**query)
+            page = paginate_catalog(query, cursor=cursor, limit=5, catalog=catalog)
+            brains = page["items"]
 
             charts_data = []
             for brain in brains:
@@ -187,6 +241,7 @@ class BatchedAPIView(BrowserView):
             return {
                 "charts": charts_data,
                 "count": len(charts_data),
+                "next_cursor": page["next_cursor"],
                 "has_active_chart": len(charts_data) > 0,
             }
 
@@ -194,7 +249,7 @@ class BatchedAPIView(BrowserView):
             logger.error(f"Error in seating batch: {e}")
             return {"error": str(e), "charts": [], "count": 0}
 
-    @ram.cache(lambda *args: time.time() // 30)  # 30-second cache
+    @cached(PICKER, ttl=30)
     def get_participation_batch(self):
         """Get participation data with optimized calculations"""
         try:
@@ -236,7 +291,7 @@ class BatchedAPIView(BrowserView):
             logger.error(f"Error in participation batch: {e}")
             return {"error": str(e), "students_picked_today": 0}
 
-    @ram.cache(lambda *args: time.time() // 10)  # 10-second cache for timers
+    @cached(TIMERS, ttl=10)
     def get_timers_batch(self):
         """Get active timers with real-time status"""
         try:
@@ -303,7 +358,7 @@ class OptimizedSeatingChartAPI(BrowserView):
         else:
             return self.list_charts_optimized()
 
-    @measure_performance
+    @timed("seating_update")
     def update_seating_optimized(self):
         """Update seating with minimal data validation"""
         try:
@@ -355,9 +410,7 @@ class OptimizedSeatingChartAPI(BrowserView):
             self.request.response.setStatus(500)
             return json.dumps({"error": str(e)})
 
-    @ram.cache(
-        lambda *args: (time.time() // 30, args[1] if len(args) > 1 else "default")
-    )
+    @cached(SEATING, ttl=30, scope=(SITE, USER))
     def get_chart_optimized(self, chart_id):
         """Get specific chart with optimized data structure"""
         try:
@@ -394,30 +447,45 @@ class OptimizedSeatingChartAPI(BrowserView):
             return json.dumps({"error": str(e)})
 
     def list_charts_optimized(self):
-        """List charts with minimal metadata only"""
-        try:
-            catalog = api.portal.get_tool("portal_catalog")
-            brains = catalog(
-                portal_type="Document",
-                Subject=["seating-chart"],
-                sort_on="modified",
-                sort_order="descending",
-            )
+        """List charts with minimal metadata only, most recent first
 
-            charts = []
-            for brain in brains[:10]:  # Limit to 10 most recent
-                charts.append(
+        Paged with ``limit`` (default 10) and ``cursor`` (``next_cursor``).
+        """
+        try:
+            try:
+                page = paginate_catalog(
                     {
-                        "id": brain.getId,
-                        "title": brain.Title,
-                        "modified": brain.modified.ISO8601(),
-                        "creator": brain.Creator,
-                    }
+                        "portal_type": "Document",
+                        "Subject": ["seating-chart"],
+                        "sort_on": "modified",
+                        "sort_order": "descending",
+                    },
+                    cursor=self.request.get("cursor"),
+                    limit=page_limit(self.request, default=10),
                 )
+            except InvalidCursor as e:
+                self.request.response.setStatus(400)
+                return json.dumps({"error": str(e)})
 
-            self.request.response.setHeader("Content-Type", "application/json")
-            return json.dumps(
-                {"charts": charts, "count": len(charts), "total_available": len(brains)}
+            recent = page["items"]
+            charts = JSONArray(
+                {
+                    "id": brain.getId,
+                    "title": brain.Title,
+                    "modified": brain.modified.ISO8601(),
+                    "creator": brain.Creator,
+                }
+                for brain in recent
+            )
+
+            return stream_json(
+                self.request,
+                {
+                    "charts": charts,
+                    "count": len(recent),
+                    "total_available": page["total"],
+                    "next_cursor": page["next_cursor"],
+                },
             )
 
         except Exception as e:
@@ -14,18 +14,24 @@ OPTIMIZED: Uses performance optimizations from optimizations.py module.
 
 from Products.Five.browser import BrowserView
 from plone import api
-from plone.memoize import ram
 from zope.annotation.interfaces import IAnnotations
 from datetime import datetime
 import json
 import logging
-import time
 
 from .cors_helper import set_cors_headers
+from ..caching import cached
+from ..caching import DASHBOARD_KINDS
+from ..caching import PICKER
+from ..caching import SEATING
+from ..caching import SITE
+from ..caching import USER
+from ..metrics import timed
 from ..optimizations import (
+    aggregate_hall_passes_from_brains,
+    aggregate_seating_from_brains,
     get_dashboard_aggregates,
     get_user_dashboard_data,
-    measure_performance,
 )
 
 logger = logging.getLogger(__name__)
@@ -50,7 +56,7 @@ class TeacherDashboard(BrowserView):
         # Otherwise return the main dashboard page (would be template-based in full implementation)
         return self.index()
 
-    @measure_performance
+    @timed("dashboard")
     def get_dashboard_data(self):
         """Aggregate all classroom management data for real-time dashboard - SIMPLIFIED"""
         logger.info("📊 Aggregating dashboard data from real Plone content")
@@ -59,41 +65,23 @@ class TeacherDashboard(BrowserView):
             # Get catalog for content queries
             catalog = api.portal.get_tool("portal_catalog")
             
-            # Get hall pass data
-            hall_passes = catalog(portal_type="HallPass")
-            active_passes = []
-            total_passes_today = 0
-            
-            for brain in hall_passes:
-                try:
-                    pass_obj = brain.getObject()
-                    if hasattr(pass_obj, 'is_active') and pass_obj.is_active():
-                        active_passes.append({
-                            'id': pass_obj.getId(),
-                            'student_name': getattr(pass_obj, 'student_name', 'Unknown'),
-                            'destination': getattr(pass_obj, 'destination', 'Unknown'),
-                            'duration_minutes': getattr(pass_obj, 'get_duration_minutes', lambda: 0)(),
-                            'alert_level': getattr(pass_obj, 'get_alert_level', lambda: 'green')()
-                        })
-                    total_passes_today += 1
-                except Exception:
-                    continue
-            
-            # Get seating chart data
-            seating_charts = catalog(portal_type="SeatingChart")
-            total_students = 0
-            active_charts = 0
-            
-            for brain in seating_charts:
-                try:
-                    chart_obj = brain.getObject()
-                    students = getattr(chart_obj, 'students', [])
-                    if students:
-                        total_students += len(students)
-                        active_charts += 1
-                except Exception:
-                    continue
-            
+            # Brain-only aggregation - no getObject() wake-ups
+            hall_pass_data = aggregate_hall_passes_from_brains(catalog)
+            seating_data = aggregate_seating_from_brains(catalog)
+            active_passes = [
+                {
+                    "id": p["id"],
+                    "student_name": p["student_name"],
+                    "destination": p["destination"],
+                    "duration_minutes": p["duration_minutes"],
+                    "alert_level": p["alert_level"],
+                }
+                for p in hall_pass_data["passes"]
+            ]
+            total_passes_today = hall_pass_data["total_today"]
+            total_students = seating_data["total_students"]
+            active_charts = seating_data["active_charts"]
+
             # Calculate participation fairness (simplified)
             fairness_score = 100  # Default to 100% if no participation data
             
@@ -103,7 +91,7 @@ class TeacherDashboard(BrowserView):
                 "timestamp": datetime.now().isoformat(),
                 "hall_passes": {
                     "active": len(active_passes),
-                    "overdue": len([p for p in active_passes if p['alert_level'] == 'red']),
+                    "overdue": hall_pass_data["overdue"],
                     "total_today": total_passes_today,
                     "passes": active_passes
                 },
@@ -120,7 +108,7 @@ class TeacherDashboard(BrowserView):
                 "alerts": [],
                 "quick_stats": {
                     "active_passes": len(active_passes),
-                    "overdue_passes": len([p for p in active_passes if p['alert_level'] == 'red']),
+                    "overdue_passes": hall_pass_data["overdue"],
                     "students_picked_today": 0,
                     "fairness_score": fairness_score,
                     "total_students": total_students
@@ -145,7 +133,7 @@ class TeacherDashboard(BrowserView):
             self.request.response.setHeader("Content-Type", "application/json")
             return json.dumps(empty_data)
 
-    @ram.cache(lambda *args: time.time() // 60)  # 60-second cache for seating
+    @cached(SEATING, ttl=60, scope=(SITE, USER))
     def get_current_seating_optimized(self):
         """Get active seating chart information - OPTIMIZED"""
         try:
@@ -262,7 +250,7 @@ class TeacherDashboard(BrowserView):
             return "yellow"  # Warning - monitor student
         return "green"  # Normal duration
 
-    @ram.cache(lambda *args: time.time() // 60)  # 60-second cache for participation
+    @cached(PICKER, ttl=60)
     def get_participation_stats(self):
         """Get today's participation statistics from random picker"""
         try:
@@ -436,7 +424,7 @@ class TeacherDashboard(BrowserView):
                 }
             ]
 
-    @ram.cache(lambda *args: time.time() // 30)  # 30-second cache for alerts
+    @cached(*DASHBOARD_KINDS, ttl=30, scope=(SITE, USER))
     def get_classroom_alerts_optimized(self):
         """Generate alerts using optimized data - PERFORMANCE ENHANCED"""
         alerts = []
@@ -589,7 +577,7 @@ class TeacherDashboard(BrowserView):
                 "day_of_week": datetime.now().strftime("%A"),
             }
 
-    @ram.cache(lambda *args: time.time() // 300)  # 5-minute cache for system status
+    @cached(ttl=300, scope=(SITE, USER))  # Time-based only: counts drift slowly
     def get_system_status(self):
         """Get overall system health and status"""
         try:
@@ -636,31 +624,11 @@ class TeacherDashboard(BrowserView):
             # Get catalog for content queries
             catalog = api.portal.get_tool("portal_catalog")
             
-            # Count active hall passes
-            hall_passes = catalog(portal_type="HallPass")
-            active_passes_count = 0
-            total_passes = len(hall_passes)
-            
-            for brain in hall_passes:
-                try:
-                    pass_obj = brain.getObject()
-                    if hasattr(pass_obj, 'return_time') and not pass_obj.return_time:
-                        active_passes_count += 1
-                except Exception:
-                    continue
-            
-            # Count seating charts and students
-            seating_charts = catalog(portal_type="SeatingChart")
-            total_students = 0
-            
-            for brain in seating_charts:
-                try:
-                    chart_obj = brain.getObject()
-                    students = getattr(chart_obj, 'students', [])
-                    if students:
-                        total_students += len(students)
-                except Exception:
-                    continue
+            # Brain-only counts - no getObject() wake-ups
+            hall_pass_data = aggregate_hall_passes_from_brains(catalog)
+            active_passes_count = hall_pass_data["active"]
+            total_passes = hall_pass_data["total_today"]
+            total_students = aggregate_seating_from_brains(catalog)["total_students"]
             
             # Simple response
             stats = {
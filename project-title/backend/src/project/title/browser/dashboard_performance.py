@@ -7,12 +7,24 @@ Falls back gracefully to existing queries if indexes unavailable.
 
 from Products.Five.browser import BrowserView
 from plone import api
-from plone.memoize import ram
 from datetime import datetime
 import time
 import json
 import logging
 
+from ..cache_backends import get_cache_backend
+from ..caching import cache_stats
+from ..caching import cached
+from ..caching import HALL_PASSES
+from ..caching import SEATING
+from ..caching import SITE
+from ..caching import USER
+from ..content.hall_pass import duration_minutes_since
+from ..index_health import CUSTOM_INDEXES
+from ..optimizations import query_active_hall_passes
+from ..optimizations import query_overdue_hall_passes
+from ..timing import timings
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,7 +53,7 @@ class PerformanceDashboard(BrowserView):
         # Return performance metrics
         return self.get_performance_metrics()
 
-    @ram.cache(lambda *args: time.time() // 30)  # 30-second cache
+    @cached(HALL_PASSES, ttl=30, scope=(SITE, USER))
     def get_optimized_hall_passes(self):
         """Use indexed queries for hall pass data"""
         try:
@@ -49,28 +61,29 @@ class PerformanceDashboard(BrowserView):
 
             # Try optimized indexed query first
             try:
-                active_passes = catalog(
-                    portal_type="HallPass",
-                    hall_pass_status="issued",  # Uses custom index
-                    sort_on="hall_pass_duration",  # Uses custom index
-                    sort_order="descending",
-                )
+                # Live durations come from the issue time metadata, so the
+                # ordering and alert levels are correct at read time
+                now = datetime.now()
+                active_passes = query_active_hall_passes(catalog)
+                overdue_count = len(query_overdue_hall_passes(catalog, now=now))
 
                 results = []
                 for brain in active_passes:
                     try:
-                        obj = brain.getObject()
-                        duration = brain.hall_pass_duration or 0
+                        duration = duration_minutes_since(
+                            brain.hall_pass_issue_time, now
+                        )
 
                         results.append(
                             {
-                                "id": obj.getId(),
-                                "student": getattr(obj, "student_name", "Unknown"),
-                                "destination": getattr(obj, "destination", "Unknown"),
+                                "id": brain.getId,
+                                "student": brain.hall_pass_student_name or "Unknown",
+                                "destination": brain.hall_pass_destination
+                                or "Unknown",
                                 "duration": duration,
                                 "alert_level": self.get_alert_level(duration),
                                 "workflow_state": brain.hall_pass_status,
-                                "url": obj.absolute_url(),
+                                "url": brain.getURL(),
                             }
                         )
                     except Exception as e:
@@ -81,6 +94,7 @@ class PerformanceDashboard(BrowserView):
                 return {
                     "active_passes": results,
                     "active_count": len(results),
+                    "overdue_count": overdue_count,
                     "performance_mode": "optimized",
                 }
 
@@ -103,7 +117,7 @@ class PerformanceDashboard(BrowserView):
                 "error": str(e),
             }
 
-    @ram.cache(lambda *args: time.time() // 60)  # 60-second cache
+    @cached(SEATING, ttl=60, scope=(SITE, USER))
     def get_optimized_seating_stats(self):
         """Use indexed queries for seating chart data"""
         try:
@@ -178,6 +192,8 @@ class PerformanceDashboard(BrowserView):
             "seating_mode": seating_data.get("performance_mode", "unknown"),
             "timestamp": datetime.now().isoformat(),
             "index_status": self.check_index_availability(),
+            "cache": dict(cache_stats.snapshot(), backend=get_cache_backend().name),
+            "timings": timings.snapshot(),
         }
 
         # Set CORS headers for this response too
@@ -192,16 +208,8 @@ class PerformanceDashboard(BrowserView):
             catalog = api.portal.get_tool("portal_catalog")
             available_indexes = catalog.indexes()
 
-            custom_indexes = [
-                "hall_pass_duration",
-                "hall_pass_status",
-                "seating_student_count",
-                "seating_last_updated",
-                "classroom_ready",
-            ]
-
             status = {}
-            for index_name in custom_indexes:
+            for index_name in CUSTOM_INDEXES:
                 status[index_name] = index_name in available_indexes
 
             return status
@@ -0,0 +1,124 @@
+"""
+Dashboard Delta Stream Browser View
+
+``@@dashboard-stream`` replaces polling of the full dashboard aggregation
+with cheap delta requests. Every request answers at once with the deltas
+since its cursor, so no Zope worker thread is held open and every answer
+is read from a fresh ZODB snapshot:
+
+- ``Accept: text/event-stream`` (EventSource): the pending deltas as
+  Server-Sent Events with a ``retry:`` hint; the browser reconnects with
+  Last-Event-ID when the response ends
+- otherwise: JSON poll with the deltas and ``retry_after`` seconds
+
+The retry interval is POLL_INTERVAL (30 s, so an idle dashboard makes
+two cheap requests a minute), shortened when an overdue deadline is due
+sooner. Both modes resume from an opaque cursor. When a cursor is too
+old (buffer overflow or backend restart) the response says
+``complete: false`` / ``event: resync`` and the client reloads the full
+dashboard once.
+"""
+
+from Products.Five.browser import BrowserView
+from plone import api
+import json
+import logging
+import time
+
+from .cors_helper import set_cors_headers
+from ..dashboard_stream import counters_bucket_for
+from ..dashboard_stream import get_delta_bus
+from ..dashboard_stream import overdue_deltas
+from ..counters import get_dashboard_counters
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 30
+MIN_RETRY = 0.5
+
+
+class DashboardStreamView(BrowserView):
+    """Dashboard deltas (hall passes, overdue, picks, timers) since a cursor"""
+
+    def __call__(self):
+        is_preflight = set_cors_headers(self.request, self.request.response)
+        if is_preflight:
+            return ""
+
+        self.bus = get_delta_bus()
+        self.classroom = "/".join(self.context.getPhysicalPath())
+        self.bucket = counters_bucket_for(self.context, api.portal.get())
+        cursor, checked = self.parse_cursor()
+
+        accept = self.request.getHeader("Accept", "") or ""
+        if "text/event-stream" in accept:
+            return self.stream_events(cursor, checked)
+        return self.poll(cursor, checked)
+
+    def parse_cursor(self):
+        """``(delta cursor, overdue checked-at)`` from the request
+
+        New sessions start at "now": the client has just loaded the full
+        dashboard and only needs what happens next.
+        """
+        raw = self.request.getHeader("Last-Event-ID") or self.request.get("cursor")
+        try:
+            cursor, _, checked = str(raw).partition("-")
+            return int(cursor), float(checked or time.time())
+        except (TypeError, ValueError):
+            return self.bus.last_id, time.time()
+
+    def next_wait(self, checked, limit=POLL_INTERVAL):
+        """Seconds until the next overdue deadline, capped at ``limit``"""
+        counters = get_dashboard_counters(create=False)
+        bucket = counters.classrooms.get(self.bucket) if counters else None
+        if bucket is not None:
+            upcoming = bucket.deadlines.keys(min=(checked, "\uffff"))
+            if len(upcoming):
+                return max(MIN_RETRY, min(limit, upcoming[0][0] - time.time()))
+        return limit
+
+    def collect(self, cursor, checked):
+        """Bus deltas after ``cursor`` plus overdue transitions up to now"""
+        deltas, cursor, complete = self.bus.since(cursor, self.classroom)
+        now = time.time()
+        deltas = list(deltas) + overdue_deltas(self.bucket, checked, now)
+        return deltas, cursor, now, complete
+
+    def poll(self, cursor, checked):
+        deltas, cursor, checked, complete = self.collect(cursor, checked)
+        self.request.response.setHeader("Content-Type", "application/json")
+        self.request.response.setHeader("Cache-Control", "no-store")
+        return json.dumps(
+            {
+                "cursor": f"{cursor}-{checked}",
+                "complete": complete,
+                "deltas": deltas,
+                "retry_after": round(self.next_wait(checked), 3),
+            }
+        )
+
+    def stream_events(self, cursor, checked):
+        deltas, cursor, checked, complete = self.collect(cursor, checked)
+        event_id = f"{cursor}-{checked}"
+        response = self.request.response
+        response.setHeader("Content-Type", "text/event-stream")
+        response.setHeader("Cache-Control", "no-store")
+
+        retry = int(self.next_wait(checked) * 1000)
+        events = [f"retry: {retry}\n\n".encode("utf-8")]
+        if not complete:
+            events.append(self.format_event("resync", {}, event_id))
+        else:
+            events.extend(
+                self.format_event(delta["type"], delta, event_id) for delta in deltas
+            )
+            if not deltas:
+                # Still hand out the new cursor, so the reconnect resumes here
+                events.append(f"id: {event_id}\n\n".encode("utf-8"))
+        return b"".join(events)
+
+    def format_event(self, kind, data, event_id):
+        return (
+            f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+        ).encode("utf-8")
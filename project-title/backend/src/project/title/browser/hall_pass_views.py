@@ -1,16 +1,21 @@
 """
 Hall Pass Manager Browser Views
 
-Simple demo views that work without a Plone site for testing purposes.
+Lightweight hall pass views used by the frontend hall pass manager. Passes
+are kept in the persistent HallPassRepository (see hall_pass_store).
+Issuing and returning passes is reserved to teachers: logged-in users who
+may modify the classroom the view is called on.
 """
 
+import html
 import json
+import re
 import uuid
 from datetime import datetime
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from plone import api
 from Products.Five.browser import BrowserView
-import qrcode
-from io import BytesIO
-import base64
 import logging
 
 # ADD these imports for event integration
@@ -18,41 +23,45 @@ from ..event_handlers import fire_hall_pass_issued
 from ..events import HallPassReturnedEvent
 from zope.event import notify
 
+from ..hall_pass_store import classroom_for
+from ..hall_pass_store import get_hall_pass_repository
+from ..metrics import timed
+from ..pagination import decode_cursor
+from ..pagination import encode_cursor
+from ..pagination import InvalidCursor
+from ..pagination import page_limit
+from ..qr import get_qr_image
+from ..qr import pass_qr_url
+from ..qr import verification_payload
 from .cors_helper import set_cors_headers
+from .json_response import JSONArray
+from .json_response import JSONObject
+from .json_response import stream_json
 
 logger = logging.getLogger(__name__)
 
+TEACHER_PERMISSION = "Modify portal content"
 
-# Demo storage - in-memory storage for demo purposes
-class DemoStorage:
-    _instance = None
-    _passes = {}
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DemoStorage, cls).__new__(cls)
-        return cls._instance
+def teacher_error(context, request):
+    """Error message (response status set) unless a teacher of ``context``
+    is logged in; None when the write may go ahead"""
+    if api.user.is_anonymous():
+        request.response.setStatus(401)
+        return "Authentication required"
+    if not api.user.has_permission(TEACHER_PERMISSION, obj=context):
+        request.response.setStatus(403)
+        return "Only teachers of this classroom can manage hall passes"
+    return None
 
-    def get_passes(self):
-        return self._passes
 
-    def add_pass(self, pass_id, pass_data):
-        self._passes[pass_id] = pass_data
-
-    def update_pass(self, pass_id, updates):
-        if pass_id in self._passes:
-            self._passes[pass_id].update(updates)
-            return True
-        return False
-
-    def get_pass(self, pass_id):
-        return self._passes.get(pass_id)
-
-    def remove_pass(self, pass_id):
-        if pass_id in self._passes:
-            del self._passes[pass_id]
-            return True
-        return False
+def classroom_pass(repository, pass_id, context):
+    """Repository record of ``pass_id`` if it belongs to the classroom of
+    ``context``; None otherwise, so teachers only return their own passes"""
+    record = repository.get(pass_id)
+    if record is None or record.get("classroom") != classroom_for(context):
+        return None
+    return record
 
 
 class HallPassManagerView(BrowserView):
@@ -74,6 +83,15 @@ class HallPassManagerView(BrowserView):
         else:
             return self.render_demo_page()
 
+    def portal_url(self):
+        """Site URL for absolute @@pass-qr links (context URL without a site)"""
+        try:
+            from plone import api
+
+            return api.portal.get().absolute_url()
+        except Exception:
+            return self.context.absolute_url()
+
     def render_demo_page(self):
         """Render a simple demo page"""
         self.request.response.setHeader("Content-Type", "text/html")
@@ -92,7 +110,7 @@ class HallPassManagerView(BrowserView):
             <h1>🎫 Digital Hall Pass Manager - Working!</h1>
             <div class="demo-info">
                 <h2>✅ Backend is Running Successfully</h2>
-                <p>This hall pass system is now working with session storage.</p>
+                <p>This hall pass system is now working with persistent storage.</p>
                 
                 <h3>📡 Available Endpoints:</h3>
                 <div class="endpoint">POST /@@hall-pass-manager - Issue a pass</div>
@@ -108,8 +126,13 @@ class HallPassManagerView(BrowserView):
         </html>
         """
 
+    @timed("hall_pass_issue")
     def issue_pass(self):
         """Issue a new hall pass"""
+        error = teacher_error(self.context, self.request)
+        if error:
+            self.request.response.setHeader("Content-Type", "application/json")
+            return json.dumps({"error": error})
         try:
             # Get JSON data
             body = self.request.get("BODY", "{}")
@@ -131,21 +154,14 @@ class HallPassManagerView(BrowserView):
                 "is_active": True,
             }
 
-            # Store in demo storage
-            storage = DemoStorage()
-            storage.add_pass(pass_id, pass_data)
-
-            # Generate QR code
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr_data = f"HALL_PASS:{pass_id}:{pass_data['student_name']}:{pass_data['destination']}"
-            qr.add_data(qr_data)
-            qr.make(fit=True)
+            # Store in the persistent, shared hall pass repository
+            repository = get_hall_pass_repository()
+            pass_data = dict(
+                repository.add(pass_data, classroom=classroom_for(self.context))
+            )
 
-            img = qr.make_image(fill_color="black", back_color="white")
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            qr_code_data = base64.b64encode(buffer.getvalue()).decode()
-            pass_data["qr_code"] = f"data:image/png;base64,{qr_code_data}"
+            # QR image is rendered lazily (and cached) by @@pass-qr
+            pass_data["qr_code"] = pass_qr_url(self.portal_url(), pass_id)
 
             # ENHANCE: Fire event for integration (non-breaking)
             try:
@@ -179,76 +195,142 @@ class HallPassManagerView(BrowserView):
             return json.dumps({"error": "Failed to issue pass", "details": str(e)})
 
     def get_passes_data(self):
-        """Get current hall pass data"""
+        """Get current hall pass data
+
+        Reads only this classroom's active passes and today's counters, so
+        each poll costs O(active passes). Stored records are not modified.
+        The pass lists are streamed (see json_response); the statistics
+        are computed while streaming them.
+        """
         try:
-            # Get passes from demo storage
-            storage = DemoStorage()
-            all_passes = storage.get_passes()
-
-            active_passes = []
-            recent_passes = []
-
-            for pass_data in all_passes.values():
-                # Calculate duration
-                issue_time = datetime.fromisoformat(pass_data["issue_time"])
-                now = datetime.now()
-                duration_minutes = int((now - issue_time).total_seconds() / 60)
-                pass_data["duration_minutes"] = duration_minutes
-
-                # Determine status and alert level
-                expected = pass_data.get("expected_duration", 5)
-                if pass_data.get("return_time"):
+            repository = get_hall_pass_repository(create=False)
+            classroom = classroom_for(self.context)
+            today = datetime.now().date().isoformat()
+            now = datetime.now()
+            totals = {"active": 0, "overdue": 0, "active_minutes": 0}
+
+            def active_passes():
+                portal_url = self.portal_url()
+                for record in repository.active_passes(classroom):
+                    pass_data = dict(record)
+                    # Calculate duration
+                    issue_time = datetime.fromisoformat(pass_data["issue_time"])
+                    duration_minutes = int((now - issue_time).total_seconds() / 60)
+                    pass_data["duration_minutes"] = duration_minutes
+                    pass_data["qr_code"] = pass_qr_url(
+                        portal_url, pass_data["pass_code"]
+                    )
+
+                    # Determine alert level
+                    expected = pass_data.get("expected_duration", 5)
+                    if duration_minutes > expected + 10:
+                        pass_data["alert_level"] = "red"
+                        totals["overdue"] += 1
+                    elif duration_minutes > expected:
+                        pass_data["alert_level"] = "yellow"
+                    else:
+                        pass_data["alert_level"] = "green"
+                    totals["active"] += 1
+                    if pass_data["day"] == today:
+                        totals["active_minutes"] += duration_minutes
+                    yield pass_data
+
+            def recent_passes():
+                for record in repository.recent_returned(classroom, today, limit=10):
+                    pass_data = dict(record)
+                    issue_time = datetime.fromisoformat(pass_data["issue_time"])
+                    return_time = datetime.fromisoformat(pass_data["return_time"])
+                    pass_data["duration_minutes"] = int(
+                        (return_time - issue_time).total_seconds() / 60
+                    )
                     pass_data["is_active"] = False
                     pass_data["alert_level"] = "green"
-                    recent_passes.append(pass_data)
-                elif duration_minutes > expected + 10:
-                    pass_data["alert_level"] = "red"
-                    active_passes.append(pass_data)
-                elif duration_minutes > expected:
-                    pass_data["alert_level"] = "yellow"
-                    active_passes.append(pass_data)
-                else:
-                    pass_data["alert_level"] = "green"
-                    active_passes.append(pass_data)
+                    yield pass_data
+
+            def members():
+                has_passes = repository is not None
+                yield "active_passes", JSONArray(active_passes() if has_passes else ())
+                yield "recent_passes", JSONArray(recent_passes() if has_passes else ())
+
+                # Calculate statistics
+                total_passes = returned_minutes = 0
+                if has_passes:
+                    total_passes = repository.issued_today(classroom, today)
+                    returned_minutes = repository.returned_minutes_total(
+                        classroom, today
+                    )
+                yield "statistics", {
+                    "total_today": total_passes,
+                    "active_count": totals["active"],
+                    "overdue_count": totals["overdue"],
+                    "avg_duration": (returned_minutes + totals["active_minutes"])
+                    / max(total_passes, 1),
+                }
 
-            # Calculate statistics
-            total_passes = len(all_passes)
-            active_count = len(active_passes)
-            overdue_count = len([p for p in active_passes if p["alert_level"] == "red"])
+                # Generate alerts
+                alerts = []
+                if totals["overdue"] > 0:
+                    alerts.append(
+                        {
+                            "type": "warning",
+                            "message": f"{totals['overdue']} pass(es) are overdue",
+                        }
+                    )
+                yield "alerts", alerts
 
-            # Generate alerts
-            alerts = []
-            if overdue_count > 0:
-                alerts.append(
-                    {
-                        "type": "warning",
-                        "message": f"{overdue_count} pass(es) are overdue",
-                    }
-                )
-
-            self.request.response.setHeader("Content-Type", "application/json")
-            return json.dumps(
-                {
-                    "active_passes": active_passes,
-                    "recent_passes": recent_passes[-10:],  # Last 10
-                    "statistics": {
-                        "total_today": total_passes,
-                        "active_count": active_count,
-                        "overdue_count": overdue_count,
-                        "avg_duration": sum(
-                            p["duration_minutes"] for p in all_passes.values()
-                        )
-                        / max(total_passes, 1),
-                    },
-                    "alerts": alerts,
-                }
-            )
+            return stream_json(self.request, JSONObject(members()))
 
         except Exception as e:
             self.request.response.setStatus(500)
             self.request.response.setHeader("Content-Type", "application/json")
             return json.dumps({"error": "Failed to load data", "details": str(e)})
 
+    def get_pass_history(self):
+        """Page through this classroom's passes, newest first
+
+        Parameters: ``limit`` (1-100) and ``cursor`` (the ``next_cursor``
+        of the previous page).
+        """
+        is_preflight = set_cors_headers(self.request, self.request.response)
+        if is_preflight:
+            return ""
+
+        before = None
+        cursor = self.request.get("cursor")
+        if cursor:
+            try:
+                state = decode_cursor(cursor)
+                before = (state["issue_time"], state["pass_code"])
+                if not all(isinstance(value, str) for value in before):
+                    raise InvalidCursor("issue_time and pass_code must be strings")
+                datetime.fromisoformat(before[0])
+            except (InvalidCursor, KeyError, ValueError) as e:
+                self.request.response.setStatus(400)
+                self.request.response.setHeader("Content-Type", "application/json")
+                return json.dumps({"error": f"Invalid cursor: {e}"})
+
+        repository = get_hall_pass_repository(create=False)
+        records, more = [], False
+        if repository is not None:
+            records, more = repository.history(
+                classroom_for(self.context), before, page_limit(self.request)
+            )
+
+        next_cursor = None
+        if more:
+            last = records[-1]
+            next_cursor = encode_cursor(
+                {"issue_time": last["issue_time"], "pass_code": last["pass_code"]}
+            )
+        return stream_json(
+            self.request,
+            {
+                "passes": JSONArray(dict(record) for record in records),
+                "count": len(records),
+                "next_cursor": next_cursor,
+            },
+        )
+
     # WORKFLOW ENHANCEMENT METHODS (ADDITIVE ONLY)
     def issue_pass_with_workflow(self):
         """Enhanced pass issuing with workflow support"""
@@ -282,20 +364,19 @@ class HallPassManagerView(BrowserView):
 
         return result
 
+    @timed("hall_pass_return")
     def return_pass_with_workflow(self):
         """Enhanced pass return with workflow support"""
         pass_id = self.request.get("pass_id")
+        error = teacher_error(self.context, self.request)
+        if error:
+            return {"error": error}
         try:
-            # For demo storage, just call the existing return functionality
-            storage = DemoStorage()
-            pass_obj = storage.get_pass(pass_id)
+            repository = get_hall_pass_repository()
+            pass_obj = None
+            if classroom_pass(repository, pass_id, self.context) is not None:
+                pass_obj, _ = repository.mark_returned(pass_id)
             if pass_obj:
-                # Set return time (existing functionality)
-                updates = {
-                    "return_time": datetime.now().isoformat(),
-                    "is_active": False,
-                }
-                storage.update_pass(pass_id, updates)
 
                 # Add workflow transition if available (enhancement)
                 try:
@@ -321,6 +402,7 @@ class HallPassManagerView(BrowserView):
 class HallPassReturnView(BrowserView):
     """Mark a hall pass as returned"""
 
+    @timed("hall_pass_return")
     def __call__(self):
         """Mark pass as returned"""
         # Handle CORS headers for frontend integration
@@ -328,6 +410,10 @@ class HallPassReturnView(BrowserView):
         if is_preflight:
             return ""
 
+        error = teacher_error(self.context, self.request)
+        if error:
+            self.request.response.setHeader("Content-Type", "application/json")
+            return json.dumps({"error": error})
         try:
             body = self.request.get("BODY", "{}")
             if isinstance(body, bytes):
@@ -335,26 +421,21 @@ class HallPassReturnView(BrowserView):
             data = json.loads(body)
             pass_id = data.get("pass_id")
 
-            # Get demo storage
-            storage = DemoStorage()
-            pass_data = storage.get_pass(pass_id)
-
-            if pass_data:
-                # Update the pass
-                updates = {
-                    "return_time": datetime.now().isoformat(),
-                    "is_active": False,
-                }
-                storage.update_pass(pass_id, updates)
-
-                # Get the updated pass data
-                updated_pass = storage.get_pass(pass_id)
+            # Returning twice is harmless: the second call changes nothing
+            repository = get_hall_pass_repository()
+            updated_pass, changed = None, False
+            if classroom_pass(repository, pass_id, self.context) is not None:
+                updated_pass, changed = repository.mark_returned(pass_id)
 
+            if updated_pass:
                 # ENHANCE: Fire return event for integration (non-breaking)
                 try:
+                    if not changed:
+                        raise ValueError("pass was already returned")
+
                     # Calculate duration for event
-                    issue_time = datetime.fromisoformat(pass_data["issue_time"])
-                    return_time = datetime.now()
+                    issue_time = datetime.fromisoformat(updated_pass["issue_time"])
+                    return_time = datetime.fromisoformat(updated_pass["return_time"])
                     duration = int((return_time - issue_time).total_seconds() / 60)
 
                     # Create mock object and fire event
@@ -397,6 +478,90 @@ class HallPassDisplayView(BrowserView):
         return "Hall Pass Display - Demo Mode"
 
 
+class PassQRView(BrowserView):
+    """Serve a pass's QR code as a cacheable PNG image
+
+    ``@@pass-qr?code=ABCD1234`` renders the verification QR code once per
+    pass code and answers repeat requests from the QR cache, with ETag and
+    Last-Modified validators for conditional GETs. Unknown and returned
+    passes answer 404.
+    """
+
+    PASS_CODE_PATTERN = re.compile(r"^[A-Za-z0-9-]{1,36}$")
+
+    def is_active_pass(self, pass_code):
+        """True for a pass that is still out (repository or HallPass content)"""
+        repository = get_hall_pass_repository(create=False)
+        record = repository.get(pass_code) if repository is not None else None
+        if record is not None:
+            return not record.get("return_time")
+        catalog = api.portal.get_tool("portal_catalog")
+        return bool(
+            catalog(
+                portal_type="HallPass",
+                hall_pass_code=pass_code,
+                hall_pass_is_active=True,
+            )
+        )
+
+    def __call__(self):
+        response = self.request.response
+        is_preflight = set_cors_headers(self.request, response)
+        if is_preflight:
+            return ""
+
+        pass_code = self.request.get("code", "")
+        if not self.PASS_CODE_PATTERN.match(pass_code):
+            response.setStatus(400)
+            response.setHeader("Content-Type", "application/json")
+            return json.dumps({"error": "Invalid pass code"})
+        if not self.is_active_pass(pass_code):
+            response.setStatus(404)
+            response.setHeader("Content-Type", "application/json")
+            return json.dumps({"error": "Pass not found"})
+
+        try:
+            image = get_qr_image(
+                pass_code, verification_payload(pass_code, self.request)
+            )
+        except Exception as e:
+            logger.error(f"QR rendering failed for pass {pass_code}: {e}")
+            response.setStatus(500)
+            response.setHeader("Content-Type", "application/json")
+            return json.dumps({"error": "Failed to render QR code"})
+
+        response.setHeader("ETag", image.etag)
+        response.setHeader(
+            "Last-Modified", format_datetime(image.last_modified, usegmt=True)
+        )
+        # The QR content never changes, but the pass stops being served once
+        # it is returned
+        response.setHeader("Cache-Control", "private, max-age=300")
+
+        if self.is_not_modified(image):
+            response.setStatus(304)
+            return b""
+
+        response.setHeader("Content-Type", "image/png")
+        response.setHeader("Content-Length", str(len(image.png)))
+        return image.png
+
+    def is_not_modified(self, image):
+        """Evaluate If-None-Match / If-Modified-Since (ETag wins)"""
+        if_none_match = self.request.getHeader("If-None-Match")
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or image.etag in tags or f"W/{image.etag}" in tags
+
+        if_modified_since = self.request.getHeader("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return image.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
 class PassVerifyView(BrowserView):
     """Mobile-friendly hall pass verification page"""
 
@@ -413,13 +578,42 @@ class PassVerifyView(BrowserView):
         if not pass_code:
             return self.render_error("No pass code provided")
 
-        # For demo purposes, create a mock pass verification
-        # In a real implementation, you'd search for the actual pass
-        return self.render_demo_verification_page(pass_code)
-
-    def render_demo_verification_page(self, pass_code):
-        """Render a demo verification page"""
-        html = f"""
+        repository = get_hall_pass_repository(create=False)
+        pass_data = repository.get(pass_code) if repository is not None else None
+        if pass_data is None:
+            return self.render_error("Pass not found")
+
+        return self.render_verification_page(pass_data)
+
+    def get_status_text(self, pass_data):
+        """Human readable status line for the verification page"""
+        if pass_data.get("return_time"):
+            return "✅ Returned Successfully"
+        issue_time = datetime.fromisoformat(pass_data["issue_time"])
+        minutes = int((datetime.now() - issue_time).total_seconds() / 60)
+        expected = pass_data.get("expected_duration", 5)
+        if minutes > expected:
+            return f"⚠️ Overdue - out {minutes} of {expected} minutes"
+        return f"✅ Valid Pass - {expected} minutes"
+
+    def get_display_name(self, student_name):
+        """First name and last initial only (e.g. "ERIC W.")"""
+        parts = (student_name or "").split()
+        if not parts:
+            return "UNKNOWN"
+        if len(parts) == 1:
+            return parts[0].upper()
+        return f"{parts[0]} {parts[-1][0]}.".upper()
+
+    def render_verification_page(self, pass_data):
+        """Render the verification page for a stored pass"""
+        pass_code = html.escape(pass_data["pass_code"])
+        student = html.escape(self.get_display_name(pass_data.get("student_name")))
+        destination = html.escape((pass_data.get("destination") or "").upper())
+        status = html.escape(self.get_status_text(pass_data))
+        issued = datetime.fromisoformat(pass_data["issue_time"]).strftime("%I:%M %p")
+        button_style = "display: none;" if pass_data.get("return_time") else ""
+        page = f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -445,17 +639,17 @@ class PassVerifyView(BrowserView):
         </div>
         
         <div class="status">
-            ✅ Valid Pass - 5 minutes
+            {status}
         </div>
         
         <div class="detail">
             <div class="detail-label">Student:</div>
-            <div class="detail-value">ERIC W.</div>
+            <div class="detail-value">{student}</div>
         </div>
         
         <div class="detail">
             <div class="detail-label">Destination:</div>
-            <div class="detail-value">RESTROOM</div>
+            <div class="detail-value">{destination}</div>
         </div>
         
         <div class="detail">
@@ -465,10 +659,10 @@ class PassVerifyView(BrowserView):
         
         <div class="detail">
             <div class="detail-label">Issued:</div>
-            <div class="detail-value">{datetime.now().strftime('%I:%M %p')}</div>
+            <div class="detail-value">{issued}</div>
         </div>
         
-        <a href="#" class="button" onclick="markReturned()">✅ Mark as Returned</a>
+        <a href="#" class="button" style="{button_style}" onclick="markReturned(); return false;">✅ Mark as Returned</a>
         
         <div class="footer">
             Scanned at {datetime.now().strftime('%I:%M %p')}
@@ -477,9 +671,17 @@ class PassVerifyView(BrowserView):
     
     <script>
         function markReturned() {{
-            alert('Pass marked as returned!');
-            document.querySelector('.status').innerHTML = '✅ Returned Successfully';
-            document.querySelector('.button').style.display = 'none';
+            fetch('@@return-pass', {{
+                method: 'POST',
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{pass_id: '{pass_code}'}})
+            }}).then(function (response) {{
+                if (!response.ok) {{ throw new Error(response.status); }}
+                document.querySelector('.status').innerHTML = '✅ Returned Successfully';
+                document.querySelector('.button').style.display = 'none';
+            }}).catch(function () {{
+                alert('Could not mark the pass as returned. Please try again.');
+            }});
         }}
     </script>
 </body>
@@ -487,11 +689,12 @@ class PassVerifyView(BrowserView):
         """
 
         self.request.response.setHeader("Content-Type", "text/html")
-        return html
+        return page
 
     def render_error(self, message):
         """Render error page"""
-        html = f"""
+        message = html.escape(message)
+        page = f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -515,4 +718,4 @@ class PassVerifyView(BrowserView):
         """
 
         self.request.response.setHeader("Content-Type", "text/html")
-        return html
+        return page
@@ -101,12 +101,12 @@ class HallPassWorkflowSupport(BrowserView):
         # For demo objects or any context, use request parameters to determine state
         request_id = self.request.get("REQUEST_URL", "").split("/")[-2]
 
-        # Import demo storage to check pass data
+        # Check the hall pass repository for manager-issued passes
         try:
-            from .hall_pass_views import DemoStorage
+            from ..hall_pass_store import get_hall_pass_repository
 
-            storage = DemoStorage()
-            pass_data = storage.get_pass(request_id)
+            repository = get_hall_pass_repository(create=False)
+            pass_data = repository.get(request_id) if repository else None
 
             if pass_data:
                 if pass_data.get("return_time"):
@@ -0,0 +1,72 @@
+"""
+Catalog Index Health View
+
+``@@index-health`` on the site root reports coverage and size of the
+custom catalog indexes (GET) and rebuilds them (POST); see
+index_health.py.
+"""
+
+from plone.protect import CheckAuthenticator
+from Products.Five.browser import BrowserView
+from zExceptions import Forbidden
+import json
+import logging
+
+from ..index_health import BATCH_SIZE
+from ..index_health import CUSTOM_INDEXES
+from ..index_health import index_report
+from ..index_health import rebuild_custom_indexes
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 5000
+
+
+class IndexHealthView(BrowserView):
+    """GET: index report. POST: rebuild custom indexes
+
+    POST parameters: ``indexes`` (names, repeated or comma separated;
+    default all custom indexes) and ``batch_size`` (objects per
+    transaction) plus the ``_authenticator`` token: the rebuild commits
+    its own batches, so the CSRF check runs before it starts. The response
+    is the rebuild report followed by a fresh index report.
+    """
+
+    def __call__(self):
+        self.request.response.setHeader("Content-Type", "application/json")
+        if self.request.method != "POST":
+            return json.dumps(index_report())
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            self.request.response.setStatus(403)
+            return json.dumps({"error": "Missing or invalid authenticator"})
+
+        names = self.request.form.get("indexes") or []
+        if isinstance(names, str):
+            names = names.split(",")
+        names = [name.strip() for name in names if name.strip()]
+        try:
+            batch_size = int(self.request.form.get("batch_size", BATCH_SIZE))
+        except ValueError:
+            batch_size = 0
+        unknown = [name for name in names if name not in CUSTOM_INDEXES]
+        if unknown or not 0 < batch_size <= MAX_BATCH_SIZE:
+            self.request.response.setStatus(400)
+            return json.dumps(
+                {
+                    "error": f"indexes must be among {sorted(CUSTOM_INDEXES)}, "
+                    f"batch_size 1-{MAX_BATCH_SIZE}"
+                }
+            )
+
+        report = rebuild_custom_indexes(
+            names=names or None, batch_size=batch_size, progress=self._log_progress
+        )
+        return json.dumps(dict(report, success=True, health=index_report()))
+
+    def _log_progress(self, report):
+        logger.info(
+            f"Index rebuild: {report['objects']} objects, "
+            f"{report['error_count']} errors after {report['elapsed']:.1f}s"
+        )
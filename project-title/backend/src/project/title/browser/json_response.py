@@ -0,0 +1,210 @@
+"""
+Streaming JSON Responses
+
+List endpoints encode their documents member by member and item by item
+instead of building the whole structure and one ``json.dumps`` string.
+The encoded bytes go to a spool that stays in memory for small responses
+and rolls over to a temporary file for large ones, which is then sent
+with a stream iterator; a worker never holds a large listing twice.
+
+Items are pulled from their iterables (catalog brains, repository
+records) while the request's ZODB connection is still open; only encoded
+bytes are streamed after the transaction ends.
+
+orjson is used when installed (``pip install project.title[speedups]``),
+the standard json module otherwise. Responses carry a strong ETag (a hash
+of the body, or a cheap one from ``etag_for`` computed before encoding)
+and answer a matching ``If-None-Match`` with 304.
+"""
+
+from datetime import date
+from ZPublisher.Iterators import IStreamIterator
+from zope.interface import implementer
+import hashlib
+import io
+import json
+import tempfile
+
+from ..perf_trace import span
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: project.title[speedups]
+    orjson = None
+
+MAX_MEMORY_SIZE = 256 * 1024  # Larger bodies are spooled to a temporary file
+STREAM_CHUNK_SIZE = 64 * 1024
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    """Dates and datetimes as ISO strings, anything else as its str()"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def encode(value):
+    """JSON bytes of ``value``"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), default=_default).encode()
+
+
+def etag_for(*parts):
+    """Strong ETag from cheap version data (counters, modification dates)"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+class JSONArray:
+    """Stream an iterable as a JSON array, encoding one item at a time"""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class JSONObject:
+    """Stream ``(name, value)`` pairs as a JSON object, one member at a time
+
+    Pairs may come from a generator: a member computed after a preceding
+    JSONArray was streamed can use counts gathered while streaming it.
+    """
+
+    def __init__(self, members):
+        self.members = members
+
+
+class _Spool:
+    """Byte buffer that moves to a temporary file past ``max_memory``"""
+
+    def __init__(self, max_memory=MAX_MEMORY_SIZE):
+        self.max_memory = max_memory
+        self.file = io.BytesIO()
+        self.rolled = False
+        self.size = 0
+        self.hash = hashlib.sha1()
+
+    def write(self, data):
+        self.size += len(data)
+        self.hash.update(data)
+        if not self.rolled and self.size > self.max_memory:
+            rolled = tempfile.TemporaryFile()
+            rolled.write(self.file.getvalue())
+            self.file, self.rolled = rolled, True
+        self.file.write(data)
+
+
+@implementer(IStreamIterator)
+class SpoolIterator:
+    """Send a spooled body in chunks, closing its file at the end"""
+
+    def __init__(self, file, size, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.size = size
+        self.chunk_size = chunk_size
+        file.seek(0)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.close()
+            raise StopIteration
+        return data
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self.file.close()
+
+
+def _write(spool, value):
+    if isinstance(value, JSONArray):
+        spool.write(b"[")
+        for index, item in enumerate(value.items):
+            if index:
+                spool.write(b",")
+            _write(spool, item)
+        spool.write(b"]")
+    elif isinstance(value, JSONObject):
+        spool.write(b"{")
+        for index, (name, member) in enumerate(value.members):
+            if index:
+                spool.write(b",")
+            spool.write(encode(str(name)))
+            spool.write(b":")
+            _write(spool, member)
+        spool.write(b"}")
+    elif isinstance(value, dict) and any(
+        isinstance(member, (JSONArray, JSONObject)) for member in value.values()
+    ):
+        _write(spool, JSONObject(value.items()))
+    else:
+        spool.write(encode(value))
+
+
+def stream_text(request, chunks, content_type, filename=None):
+    """Spool text ``chunks`` (e.g. CSV rows) into the response of ``request``
+
+    Returns:
+        The body for the view to return, like ``stream_json``
+    """
+    response = request.response
+    response.setHeader("Content-Type", f"{content_type}; charset=utf-8")
+    if filename:
+        response.setHeader("Content-Disposition", f'attachment; filename="{filename}"')
+
+    spool = _Spool()
+    with span("serialize"):
+        for chunk in chunks:
+            spool.write(chunk.encode("utf-8"))
+
+    if not spool.rolled:
+        return spool.file.getvalue()
+    response.setHeader("Content-Length", str(spool.size))
+    return SpoolIterator(spool.file, spool.size)
+
+
+def _not_modified(request, etag):
+    matches = request.getHeader("If-None-Match", "")
+    return etag in [tag.strip() for tag in matches.split(",")]
+
+
+def stream_json(request, value, etag=None):
+    """Encode ``value`` into the response of ``request``
+
+    ``value`` may contain JSONArray/JSONObject members, which are streamed.
+    Without ``etag`` one is computed from the body.
+
+    Returns:
+        The body for the view to return: bytes for small documents (and
+        304 responses), a stream iterator over a temporary file otherwise
+    """
+    response = request.response
+    response.setHeader("Content-Type", "application/json")
+    if etag is not None:
+        response.setHeader("ETag", etag)
+        if _not_modified(request, etag):
+            response.setStatus(304)
+            return b""
+
+    spool = _Spool()
+    with span("serialize"):
+        _write(spool, value)
+
+    if etag is None:
+        etag = f'"{spool.hash.hexdigest()[:20]}"'
+        response.setHeader("ETag", etag)
+        if _not_modified(request, etag):
+            spool.file.close()
+            response.setStatus(304)
+            return b""
+
+    if not spool.rolled:
+        return spool.file.getvalue()
+    response.setHeader("Content-Length", str(spool.size))
+    return SpoolIterator(spool.file, spool.size)
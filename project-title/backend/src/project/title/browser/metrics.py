@@ -0,0 +1,37 @@
+"""
+Prometheus Metrics Endpoint
+
+``@@metrics`` on the site root renders this process's metrics (see
+metrics.py) in the Prometheus text format. When ``METRICS_TOKEN`` is set,
+scrapers must send it as ``Authorization: Bearer <token>``; without a
+token only site managers may read it.
+"""
+
+from plone import api
+from Products.Five.browser import BrowserView
+import hmac
+import os
+
+from ..metrics import CONTENT_TYPE
+from ..metrics import registry
+
+
+class MetricsView(BrowserView):
+    """Prometheus scrape target"""
+
+    def __call__(self):
+        response = self.request.response
+        token = os.environ.get("METRICS_TOKEN", "")
+        if token:
+            sent = self.request.getHeader("Authorization", "")
+            if not hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+                response.setStatus(401)
+                response.setHeader("WWW-Authenticate", "Bearer")
+                return ""
+        elif not api.user.has_permission("Manage portal", obj=self.context):
+            response.setStatus(403)
+            return ""
+
+        response.setHeader("Content-Type", CONTENT_TYPE)
+        response.setHeader("Cache-Control", "no-store")
+        return registry.render()
@@ -0,0 +1,36 @@
+"""
+Per-Request Profiling View
+
+``@@perf-trace`` on the site root lists the traces recorded by this
+process, newest first (see perf_trace.py). POST clears them.
+"""
+
+from plone import api
+from Products.Five.browser import BrowserView
+import json
+
+from ..perf_trace import clear_traces
+from ..perf_trace import recent_traces
+from ..perf_trace import REGISTRY_RECORD
+from ..perf_trace import RING_SIZE
+
+
+class PerfTraceView(BrowserView):
+    """Recent per-request traces as JSON"""
+
+    def __call__(self):
+        self.request.response.setHeader("Content-Type", "application/json")
+        self.request.response.setHeader("Cache-Control", "no-store")
+        if self.request.method == "POST":
+            clear_traces()
+            return json.dumps({"success": True, "traces": []})
+
+        return json.dumps(
+            {
+                "enabled": bool(
+                    api.portal.get_registry_record(REGISTRY_RECORD, default=False)
+                ),
+                "ring_size": RING_SIZE,
+                "traces": recent_traces(),
+            }
+        )
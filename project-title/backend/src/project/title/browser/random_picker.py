@@ -7,14 +7,39 @@ equitable participation across all students in a class.
 
 from Products.Five.browser import BrowserView
 from plone import api
-from zope.annotation.interfaces import IAnnotations
 import json
-import random
 import logging
 from datetime import datetime
 
+from ..event_handlers import fire_student_picked
+from ..fairness import clear_fairness_engines
+from ..fairness import get_fairness_engine
+from ..metrics import timed
+from ..storage import get_classroom_storage
+
 logger = logging.getLogger(__name__)
 
+# Bumped on every pick (per day and picker context) and on resets (per
+# day) so cached fairness engines can tell whether their weight table
+# still matches the stored history
+PICKER_HISTORY_VERSIONS = "picker_history_versions"
+MAX_BATCH_PICKS = 50
+
+
+def picker_history_key(day=None):
+    """Storage namespace for one day's picker history (daily reset)"""
+    day = day or datetime.now().date()
+    return f"picker_history_{day.isoformat()}"
+
+
+def picker_version_key(context, day=None):
+    """Version counter of one picker context's (chart's) history of a day
+
+    Picks in other classrooms leave it alone, so they neither invalidate
+    this roster's fairness engine nor write the same counter.
+    """
+    return f"{picker_history_key(day)}:{'/'.join(context.getPhysicalPath())}"
+
 
 class RandomStudentPickerView(BrowserView):
     """Fair random student selection with history tracking"""
@@ -44,14 +69,17 @@ class RandomStudentPickerView(BrowserView):
 
         if self.request.get("REQUEST_METHOD") == "POST":
             # Check if this is a reset request
+            count = 1
             try:
                 request_data = json.loads(self.request.get("BODY", "{}"))
                 if request_data.get("action") == "reset_history":
                     return self.reset_daily_history()
-            except (json.JSONDecodeError, ValueError):
+                # Batch mode: {"count": 5} picks 5 distinct students
+                count = int(request_data.get("count", 1))
+            except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
                 pass
 
-            return self.pick_student()
+            return self.pick_student(count=count)
         elif self.request.get("ajax_data"):
             return self.get_picker_data()
 
@@ -112,61 +140,66 @@ class RandomStudentPickerView(BrowserView):
 
         return unique_students
 
-    def pick_student(self):
-        """Select student using fairness weighting algorithm"""
+    def get_fairness_engine(self, students):
+        """Cached fairness engine for this roster and today's history"""
+        version_key = picker_version_key(self.context)
+        storage = get_classroom_storage(create=False)
+        version = 0
+        if storage is not None:
+            # Resets bump the day's counter, picks this context's counter; the
+            # engine counts its own picks on top, so the sum stays comparable
+            version = storage.counter_value(
+                PICKER_HISTORY_VERSIONS, picker_history_key()
+            ) + storage.counter_value(PICKER_HISTORY_VERSIONS, version_key)
+        return get_fairness_engine(
+            version_key, students, version, load_history=self.get_pick_history
+        )
+
+    @timed("picker_pick")
+    def pick_student(self, count=1):
+        """Select student(s) using fairness weighting algorithm
+
+        With ``count`` > 1, picks that many distinct students at once.
+        """
         try:
             students = self.get_students()
             if not students:
                 self.request.response.setStatus(400)
                 return json.dumps({"error": "No students available"})
 
-            history = self.get_pick_history()
-
-            # Calculate weights based on pick history (recent picks get lower weight)
-            weights = []
+            count = max(1, min(count, MAX_BATCH_PICKS, len(students)))
             current_time = datetime.now()
 
-            for student in students:
-                # Get last pick time (default to long ago if never picked)
-                last_picked = history.get(student, {}).get("last_picked", 0)
-                times_picked = history.get(student, {}).get("count", 0)
-
-                # Calculate time-based weight (longer since last pick = higher weight)
-                if last_picked:
-                    time_since_pick = (
-                        current_time - datetime.fromtimestamp(last_picked)
-                    ).total_seconds()
-                    time_weight = min(time_since_pick / 3600, 24)  # Max 24 hour weight
+            engine = self.get_fairness_engine(students)
+            with engine.lock:
+                # Weights before this pick, as shown to the teacher
+                weights = engine.selection_weights()
+                if count == 1:
+                    selected_students = [engine.pick()]
                 else:
-                    time_weight = 24  # Never picked gets max weight
-
-                # Calculate frequency-based weight (fewer picks = higher weight)
-                max_picks = max([h.get("count", 0) for h in history.values()] + [1])
-                frequency_weight = max_picks - times_picked + 1
+                    selected_students = engine.pick_many(count)
 
-                # Combine weights (both time and frequency matter)
-                final_weight = time_weight * frequency_weight
-                weights.append(max(final_weight, 0.1))  # Minimum weight of 0.1
+                for student in selected_students:
+                    self.update_pick_history(student)
+                    engine.record_pick(student, current_time.timestamp())
 
-            # Weighted random selection
-            selected = random.choices(students, weights=weights)[0]
-
-            # Update history
-            self.update_pick_history(selected)
+            # Live dashboards receive the pick through the delta stream
+            fire_student_picked(self.context, selected_students)
 
             # Calculate fairness score
-            fairness_score = self.calculate_fairness_score(history, selected)
+            history = self.get_pick_history()
+            fairness_score = self.calculate_fairness_score(history)
 
             response_data = {
                 "success": True,
-                "selected": selected,
+                "selected": selected_students[0],
                 "timestamp": current_time.isoformat(),
                 "fairness_score": fairness_score,
                 "total_students": len(students),
-                "selection_weights": dict(
-                    zip(students, [round(w, 2) for w in weights])
-                ),
+                "selection_weights": weights,
             }
+            if count > 1:
+                response_data["selected_students"] = selected_students
 
             self.request.response.setHeader("Content-Type", "application/json")
             return json.dumps(response_data)
@@ -200,48 +233,39 @@ class RandomStudentPickerView(BrowserView):
             return json.dumps({"error": "Failed to get picker data"})
 
     def get_pick_history(self):
-        """Retrieve picking history from annotations"""
+        """Retrieve today's picking history (student -> record mapping)"""
         try:
             # Store history on the site root for persistence across contexts
-            portal = api.portal.get()
-            annotations = IAnnotations(portal)
-
-            # Get today's date for daily reset
-            today = datetime.now().date().isoformat()
-            daily_key = f"picker_history_{today}"
-
-            return annotations.get(daily_key, {})
+            storage = get_classroom_storage(create=False)
+            if storage is None:
+                return {}
+            return storage.get_tree(picker_history_key()) or {}
         except Exception as e:
             logger.error(f"Error getting pick history: {e}")
             return {}
 
     def update_pick_history(self, student_name):
-        """Update picking history with new selection"""
-        try:
-            portal = api.portal.get()
-            annotations = IAnnotations(portal)
-
-            today = datetime.now().date().isoformat()
-            daily_key = f"picker_history_{today}"
-
-            history = annotations.get(daily_key, {})
-
-            if student_name not in history:
-                history[student_name] = {"count": 0, "picks": []}
-
-            # Update count and add timestamp
-            history[student_name]["count"] += 1
-            history[student_name]["last_picked"] = datetime.now().timestamp()
-            history[student_name]["picks"].append(datetime.now().isoformat())
+        """Update picking history with new selection
 
+        Only the selected student's entry is rewritten, so picks in other
+        classrooms don't conflict with this one.
+        """
+        try:
+            storage = get_classroom_storage()
+            daily_key = picker_history_key()
+            history = storage.tree(daily_key)
+            now = datetime.now()
+
+            record = dict(history.get(student_name) or {"count": 0, "picks": []})
+            record["count"] = record.get("count", 0) + 1
+            record["last_picked"] = now.timestamp()
             # Keep only last 10 picks to prevent unlimited growth
-            if len(history[student_name]["picks"]) > 10:
-                history[student_name]["picks"] = history[student_name]["picks"][-10:]
-
-            annotations[daily_key] = history
+            record["picks"] = (list(record.get("picks", [])) + [now.isoformat()])[-10:]
+            history[student_name] = record
+            storage.increment(PICKER_HISTORY_VERSIONS, picker_version_key(self.context))
 
             logger.info(
-                f"Updated pick history for {student_name}: {history[student_name]['count']} times"
+                f"Updated pick history for {student_name}: {record['count']} times"
             )
 
         except Exception as e:
@@ -307,14 +331,10 @@ class RandomStudentPickerView(BrowserView):
     def reset_daily_history(self):
         """Reset picking history (admin function)"""
         try:
-            portal = api.portal.get()
-            annotations = IAnnotations(portal)
-
-            today = datetime.now().date().isoformat()
-            daily_key = f"picker_history_{today}"
-
-            if daily_key in annotations:
-                del annotations[daily_key]
+            storage = get_classroom_storage()
+            storage.drop_tree(picker_history_key())
+            storage.increment(PICKER_HISTORY_VERSIONS, picker_history_key())
+            clear_fairness_engines()
 
             return json.dumps({"success": True, "message": "History reset for today"})
 
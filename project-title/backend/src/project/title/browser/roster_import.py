@@ -0,0 +1,99 @@
+"""
+Bulk Roster Import View
+
+``@@import-rosters`` on a folder creates or updates its seating charts from
+an uploaded CSV or JSON roster file; see roster_import.py for the format.
+"""
+
+from plone import api
+from plone.protect import CheckAuthenticator
+from Products.Five.browser import BrowserView
+from zExceptions import Forbidden
+import csv
+import json
+import logging
+
+from .cors_helper import set_cors_headers
+from ..roster_import import CHUNK_SIZE
+from ..roster_import import format_for
+from ..roster_import import FORMATS
+from ..roster_import import import_rosters
+
+logger = logging.getLogger(__name__)
+
+MAX_CHUNK_SIZE = 500
+
+
+class RosterImportView(BrowserView):
+    """Import a roster file: POST it as ``file`` (multipart) or as the body
+
+    Optional parameters: ``format`` ("csv"/"json", default from the file
+    name) and ``chunk_size`` (charts per transaction). Each chunk is
+    committed as it is written, so the CSRF check runs up front instead
+    of at the end of the request; the response is the import report.
+    """
+
+    def __call__(self):
+        is_preflight = set_cors_headers(self.request, self.request.response)
+        if is_preflight:
+            return ""
+
+        self.request.response.setHeader("Content-Type", "application/json")
+        if self.request.method != "POST":
+            self.request.response.setStatus(405)
+            return json.dumps({"error": "Method not allowed"})
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            self.request.response.setStatus(403)
+            return json.dumps({"error": "Missing or invalid authenticator"})
+
+        fti = api.portal.get_tool("portal_types").getTypeInfo("SeatingChart")
+        if fti is None or not fti.isConstructionAllowed(self.context):
+            self.request.response.setStatus(403)
+            return json.dumps({"error": "Seating charts cannot be added here"})
+
+        upload = self.request.form.get("file")
+        if upload:
+            stream = upload
+            filename = getattr(upload, "filename", "")
+        else:
+            stream = self.request.get("BODYFILE")
+            filename = ""
+        if stream is None:
+            self.request.response.setStatus(400)
+            return json.dumps({"error": "No roster file"})
+        stream.seek(0)
+
+        fmt = self.request.form.get("format") or format_for(filename)
+        try:
+            chunk_size = int(self.request.form.get("chunk_size", CHUNK_SIZE))
+        except ValueError:
+            chunk_size = 0
+        if fmt not in FORMATS or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            self.request.response.setStatus(400)
+            return json.dumps(
+                {"error": f"format must be one of {FORMATS}, chunk_size 1-500"}
+            )
+
+        try:
+            report = import_rosters(
+                self.context,
+                stream,
+                fmt=fmt,
+                chunk_size=chunk_size,
+                progress=self._log_progress,
+            )
+        except (csv.Error, ValueError) as e:
+            # Unreadable file; charts of chunks already committed remain
+            self.request.response.setStatus(400)
+            return json.dumps({"error": f"Invalid roster file: {e}"})
+
+        return json.dumps(dict(report, success=True))
+
+    def _log_progress(self, report):
+        logger.info(
+            f"Roster import into {self.context.absolute_url_path()}: "
+            f"{report['charts']} charts, {report['students']} students, "
+            f"{report['error_count']} errors after {report['elapsed']:.1f}s"
+        )
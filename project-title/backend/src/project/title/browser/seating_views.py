@@ -6,7 +6,6 @@ All views are backward compatible and designed to work with existing content.
 """
 
 from Products.Five.browser import BrowserView
-from plone.memoize import ram
 
 # Temporarily comment out event handler to resolve startup issues
 # from ..event_handlers import fire_seating_chart_updated
@@ -14,6 +13,14 @@ import json
 import logging
 
 from .cors_helper import set_cors_headers
+from ..caching import cached
+from ..caching import CONTEXT
+from ..caching import invalidate
+from ..caching import SEATING
+from ..caching import SITE
+from ..metrics import timed
+from ..seating_optimizer import DEFAULT_TIME_BUDGET
+from ..seating_optimizer import validate_constraints
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +28,7 @@ logger = logging.getLogger(__name__)
 class SeatingChartUpdateView(BrowserView):
     """Handle seating chart position updates via AJAX"""
 
+    @timed("seating_update")
     def __call__(self):
         """Handle grid position updates from frontend"""
         # Handle CORS headers for frontend integration
@@ -54,6 +62,7 @@ class SeatingChartUpdateView(BrowserView):
                 success = self.context.update_position(student_name, int(row), int(col))
                 if success:
                     logger.info(f"Updated position: {student_name} to ({row}, {col})")
+                    invalidate(SEATING, self.context)
 
                     # Fire event for integration (when available)
                     # fire_seating_chart_updated(self.context, student_count=len(self.context.students or []))
@@ -86,6 +95,7 @@ class SeatingChartUpdateView(BrowserView):
 
                 # Update context with new grid data
                 self.context.grid_data = json.dumps(grid_data)
+                invalidate(SEATING, self.context)
 
                 logger.info(f"Updated grid data for {self.context.getId()}")
 
@@ -123,22 +133,16 @@ class SeatingChartUpdateView(BrowserView):
             # Fall back to original method
             return self.update_grid()
 
-    @ram.cache(lambda *args: f"seating_stats_{args[1].context.getId()}")
+    @cached(SEATING, ttl=3600, scope=(SITE, CONTEXT))
     def get_seating_statistics(self):
         """Get seating chart statistics with caching"""
         try:
-            grid = self.context.get_grid()
-            students = grid.get("students", {})
+            summary = self.context.get_grid_summary()
 
             stats = {
-                "total_positions": len(students),
-                "available_positions": (self.context.grid_rows * self.context.grid_cols)
-                - len(students),
-                "utilization_percent": round(
-                    (len(students) / (self.context.grid_rows * self.context.grid_cols))
-                    * 100,
-                    1,
-                ),
+                "total_positions": summary["seated"],
+                "available_positions": summary["available"],
+                "utilization_percent": round(summary["occupancy"] * 100, 1),
                 "last_modified": self.context.modified().ISO8601(),
             }
 
@@ -148,6 +152,136 @@ class SeatingChartUpdateView(BrowserView):
             return json.dumps({"error": "Failed to calculate statistics"})
 
 
+class SeatingChartBatchMoveView(BrowserView):
+    """Apply many seat moves/swaps in one request and one transaction
+
+    POST ``{"operations": [{"op": "move", "student", "row", "col"},
+    {"op": "swap", "student", "with"}, ...]}``. All operations are
+    validated against the roster and grid bounds first; if any fails,
+    nothing is written and every error is reported.
+    """
+
+    @timed("seating_update")
+    def __call__(self):
+        is_preflight = set_cors_headers(self.request, self.request.response)
+        if is_preflight:
+            return ""
+
+        self.request.response.setHeader("Content-Type", "application/json")
+        if self.request.method != "POST":
+            self.request.response.setStatus(405)
+            return json.dumps({"error": "Method not allowed"})
+
+        try:
+            data = json.loads(self.request.get("BODY") or "{}")
+            operations = data.get("operations")
+            if not isinstance(operations, list):
+                raise ValueError("operations must be a list")
+        except (AttributeError, ValueError) as e:
+            self.request.response.setStatus(400)
+            return json.dumps({"error": f"Invalid request: {e}"})
+
+        # Plan on the read-only grid: a failed batch must not convert a
+        # legacy chart either
+        changes, errors = self.context._read_grid().plan_batch(
+            operations,
+            roster=self.context.students,
+            rows=self.context.grid_rows,
+            cols=self.context.grid_cols,
+        )
+        if errors:
+            self.request.response.setStatus(400)
+            return json.dumps({"success": False, "errors": errors})
+
+        if changes:
+            self.context.get_seating_grid().apply_changes(changes)
+            invalidate(SEATING, self.context)
+            logger.info(
+                f"Applied {len(operations)} seat operations "
+                f"({len(changes)} students moved) in {self.context.getId()}"
+            )
+
+        return json.dumps(
+            {
+                "success": True,
+                "changes": [
+                    {
+                        "student": student,
+                        "from": list(old) if old else None,
+                        "to": list(new) if new else None,
+                    }
+                    for student, (old, new) in sorted(changes.items())
+                ],
+            }
+        )
+
+
+class SeatingChartOptimizeView(BrowserView):
+    """Rearrange a seating chart to satisfy teacher constraints
+
+    POST ``{"constraints": {...}, "seed": 1, "time_budget": 0.5,
+    "apply": true}``; see seating_optimizer.py for the constraints.
+    With ``"apply": false`` the proposal is returned without saving.
+    """
+
+    MAX_TIME_BUDGET = 2.0
+
+    def __call__(self):
+        is_preflight = set_cors_headers(self.request, self.request.response)
+        if is_preflight:
+            return ""
+
+        self.request.response.setHeader("Content-Type", "application/json")
+        if self.request.method != "POST":
+            self.request.response.setStatus(405)
+            return json.dumps({"error": "Method not allowed"})
+
+        try:
+            data = json.loads(self.request.get("BODY") or "{}")
+            constraints = data.get("constraints") or {}
+            validate_constraints(constraints)
+            time_budget = min(
+                float(data.get("time_budget", DEFAULT_TIME_BUDGET)),
+                self.MAX_TIME_BUDGET,
+            )
+            seed = data.get("seed")
+            if seed is not None and (
+                isinstance(seed, bool) or not isinstance(seed, (int, str))
+            ):
+                raise ValueError("seed must be an integer or a string")
+        except (AttributeError, TypeError, ValueError) as e:
+            self.request.response.setStatus(400)
+            return json.dumps({"error": f"Invalid request: {e}"})
+
+        apply = bool(data.get("apply", True))
+        result = self.context.optimize_arrangement(
+            constraints, seed=seed, time_budget=time_budget, apply=apply
+        )
+        if apply and result["changes"]:
+            invalidate(SEATING, self.context)
+
+        return json.dumps(
+            {
+                "success": True,
+                "applied": apply,
+                "cost": result["cost"],
+                "initial_cost": result["initial_cost"],
+                "violations": result["violations"],
+                "unseated": result["unseated"],
+                "iterations": result["iterations"],
+                "elapsed_ms": round(result["elapsed"] * 1000, 1),
+                "changes": [
+                    {
+                        "student": student,
+                        "from": list(old) if old else None,
+                        "to": list(new) if new else None,
+                    }
+                    for student, (old, new) in sorted(result["changes"].items())
+                ],
+            }
+        )
+
+
 class SeatingChartStatsView(BrowserView):
     """Provide statistics for seating chart - Required by ZCML"""
 
@@ -161,31 +295,18 @@ class SeatingChartStatsView(BrowserView):
         self.request.response.setHeader("Content-Type", "application/json")
 
         try:
-            if hasattr(self.context, "grid_data"):
-                grid_data = json.loads(self.context.grid_data or "{}")
-            else:
-                grid_data = {}
-
-            students = grid_data.get("students", {})
-
-            # Calculate basic statistics
+            # Derived from the chart's cached parse of the current revision
+            summary = self.context.get_grid_summary()
             total_students = len(self.context.students or [])
-            seated_students = len(students)
-            total_desks = getattr(self.context, "grid_rows", 5) * getattr(
-                self.context, "grid_cols", 6
-            )
+            seated_students = summary["seated"]
 
             stats = {
                 "total_students": total_students,
                 "seated_students": seated_students,
                 "unseated_students": total_students - seated_students,
-                "total_desks": total_desks,
-                "available_desks": total_desks - seated_students,
-                "utilization_rate": (
-                    round((seated_students / total_desks) * 100, 1)
-                    if total_desks > 0
-                    else 0
-                ),
+                "total_desks": summary["total_desks"],
+                "available_desks": summary["available"],
+                "utilization_rate": round(summary["occupancy"] * 100, 1),
                 "last_modified": (
                     self.context.modified().ISO8601()
                     if hasattr(self.context, "modified")
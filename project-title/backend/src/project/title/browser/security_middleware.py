@@ -22,6 +22,9 @@ from ..security import (
     sanitize_input,
     PRODUCTION_SECURITY_CONFIG,
 )
+from ..audit_store import EXPORT_FORMATS
+from ..audit_store import get_audit_store
+from .json_response import stream_text
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +62,8 @@ class SecurityMiddlewareView(BrowserView):
             return self.check_user_rate_limits()
         elif action == "audit-log":
             return self.get_audit_log()
+        elif action == "audit-export":
+            return self.export_audit_log()
         elif action == "security-scan":
             return self.security_scan()
         else:
@@ -205,33 +210,46 @@ class SecurityMiddlewareView(BrowserView):
             self.request.response.setStatus(500)
             return json.dumps({"error": str(e)})
 
+    def audit_range(self):
+        """``start`` / ``end`` request parameters (ISO datetimes) or None"""
+        values = (self.request.get("start"), self.request.get("end"))
+        return tuple(datetime.fromisoformat(v) if v else None for v in values)
+
     def get_audit_log(self):
-        """Get audit log entries (admin only)"""
+        """Get audit log entries (admin only)
+
+        ``start`` and ``end`` (ISO datetimes, end excluded) limit the range.
+        """
         try:
             user = api.user.get_current()
             if not user or not api.user.has_permission("Manage portal", user=user):
                 self.request.response.setStatus(403)
                 return json.dumps({"error": "Admin access required"})
 
-            portal = api.portal.get()
-            from zope.annotation.interfaces import IAnnotations
-
-            annotations = IAnnotations(portal, {})
+            audit_store = get_audit_store(create=False)
 
-            audit_log = annotations.get("security_audit_log", [])
-
-            # Get pagination parameters
+            # Get range and pagination parameters
+            try:
+                start, end = self.audit_range()
+            except ValueError:
+                self.request.response.setStatus(400)
+                return json.dumps({"error": "start and end must be ISO datetimes"})
             limit = int(self.request.get("limit", 50))
             offset = int(self.request.get("offset", 0))
 
-            # Paginate results
-            total_entries = len(audit_log)
-            paginated_log = audit_log[offset : offset + limit]
+            # Only the days in the range are read
+            total_entries = 0
+            paginated_log = []
+            if audit_store is not None:
+                total_entries = audit_store.count(start, end)
+                paginated_log = audit_store.entries(start, end, offset, limit)
 
             result = {
                 "total_entries": total_entries,
                 "limit": limit,
                 "offset": offset,
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
                 "entries": paginated_log,
                 "timestamp": datetime.now().isoformat(),
             }
@@ -244,6 +262,43 @@ class SecurityMiddlewareView(BrowserView):
             self.request.response.setStatus(500)
             return json.dumps({"error": str(e)})
 
+    def export_audit_log(self):
+        """Export audit log entries as JSON lines or CSV (admin only)
+
+        ``format`` is ``jsonl`` (default) or ``csv``; ``start`` and ``end``
+        limit the range like for ``audit-log``.
+        """
+        try:
+            user = api.user.get_current()
+            if not user or not api.user.has_permission("Manage portal", user=user):
+                self.request.response.setStatus(403)
+                return json.dumps({"error": "Admin access required"})
+
+            export_format = self.request.get("format", "jsonl")
+            if export_format not in EXPORT_FORMATS:
+                self.request.response.setStatus(400)
+                return json.dumps({"error": f"Unknown export format: {export_format}"})
+            try:
+                start, end = self.audit_range()
+            except ValueError:
+                self.request.response.setStatus(400)
+                return json.dumps({"error": "start and end must be ISO datetimes"})
+
+            content_type, lines = EXPORT_FORMATS[export_format]
+            audit_store = get_audit_store(create=False)
+            items = audit_store.items(start, end) if audit_store is not None else ()
+            return stream_text(
+                self.request,
+                lines(entry for _, entry in items),
+                content_type,
+                filename=f"audit-log.{export_format}",
+            )
+
+        except Exception as e:
+            logger.error(f"Audit log export error: {e}")
+            self.request.response.setStatus(500)
+            return json.dumps({"error": str(e)})
+
     def security_scan(self):
         """Perform basic security scan of the system"""
         try:
@@ -273,7 +328,6 @@ class SecurityMiddlewareView(BrowserView):
 
             # Check 3: Check for anonymous access vulnerabilities
             try:
-                portal = api.portal.get()
                 anonymous_can_add = api.user.has_permission(
                     "Add portal content", user=api.user.get(userid="Anonymous")
                 )
@@ -292,15 +346,12 @@ class SecurityMiddlewareView(BrowserView):
                 }
 
             # Check 4: Verify audit logging is working
-            portal = api.portal.get()
-            from zope.annotation.interfaces import IAnnotations
-
-            annotations = IAnnotations(portal, {})
-            audit_log = annotations.get("security_audit_log", [])
+            audit_store = get_audit_store(create=False)
+            audit_entries = len(audit_store) if audit_store is not None else 0
 
             scan_results["checks"]["audit_logging"] = {
-                "status": "pass" if audit_log else "warning",
-                "details": f"Audit log contains {len(audit_log)} entries",
+                "status": "pass" if audit_entries else "warning",
+                "details": f"Audit log contains {audit_entries} entries",
             }
 
             # Check 5: Verify rate limiting is configured
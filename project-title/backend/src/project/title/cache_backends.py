@@ -0,0 +1,338 @@
+"""
+Pluggable Cache Backends
+
+The tagged caches in ``caching.py`` store their entries and tag
+generations in a backend:
+
+- ``LocalLRUBackend``: in-process LRU with per-entry TTL (the default;
+  each Zope instance computes its own copy)
+- ``RedisBackend``: shared by every Zope instance, so a value is computed
+  once per TTL for the whole deployment and tag invalidations reach all
+  instances. Used when ``REDIS_HOST`` is set and the ``redis`` package is
+  installed (``pip install project.title[redis]``).
+
+Both provide single-flight recompute: when an entry is missing, one
+thread (per process, and with Redis one instance) computes it while the
+others wait for the result instead of stampeding the ZODB.
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:  # Optional dependency: project.title[redis]
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+DEFAULT_MAXSIZE = 2048
+LOCK_TIMEOUT = 10  # Seconds a recompute may hold the single-flight lock
+WAIT_INTERVAL = 0.05
+
+
+class _Flight:
+    """One in-process recompute of a key that other threads can wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = MISSING
+
+
+# In-process single-flight: (backend, key) -> _Flight being computed. No
+# lock is held while computing, so cached functions may call each other.
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class CacheBackend:
+    """Base class: storage primitives plus single-flight ``get_or_compute``"""
+
+    name = "base"
+
+    def get(self, key):
+        """Cached value or ``MISSING``"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def counters(self, names):
+        """Current values of counters (0 when unset), in order"""
+        raise NotImplementedError
+
+    def increment(self, names):
+        raise NotImplementedError
+
+    def acquire(self, key, timeout):
+        """Cross-process recompute lock; returns a token or None if held"""
+        return True
+
+    def release(self, key, token):
+        pass
+
+    def clear(self):
+        raise NotImplementedError
+
+    def wait_for(self, key, timeout):
+        """Poll for a value another process is computing"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            value = self.get(key)
+            if value is not MISSING:
+                return value
+        return MISSING
+
+    def get_or_compute(self, key, compute, ttl, lock_timeout=LOCK_TIMEOUT):
+        """Return ``(value, hit)``, computing the value at most once at a time"""
+        value = self.get(key)
+        if value is not MISSING:
+            return value, True
+
+        flight_key = (id(self), key)
+        with _flights_lock:
+            flight = _flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = _flights[flight_key] = _Flight()
+
+        if not leader:
+            # Another thread computes the key: wait for its result
+            if flight.done.wait(lock_timeout) and flight.value is not MISSING:
+                return flight.value, True
+            # It failed or is too slow; compute ourselves
+            return self._compute(key, compute, ttl, lock_timeout)
+
+        try:
+            value, hit = self._compute(key, compute, ttl, lock_timeout)
+            flight.value = value
+            return value, hit
+        finally:
+            with _flights_lock:
+                _flights.pop(flight_key, None)
+            flight.done.set()
+
+    def _compute(self, key, compute, ttl, lock_timeout):
+        value = self.get(key)
+        if value is not MISSING:
+            return value, True
+
+        token = self.acquire(key, lock_timeout)
+        if token is None:
+            value = self.wait_for(key, lock_timeout)
+            if value is not MISSING:
+                return value, True
+            # The other process gave up or died; compute ourselves
+        try:
+            value = compute()
+            self.set(key, value, ttl)
+        finally:
+            if token is not None:
+                self.release(key, token)
+        return value, False
+
+
+class LocalLRUBackend(CacheBackend):
+    """In-process LRU cache with TTLs; counters are never evicted"""
+
+    name = "local"
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def counters(self, names):
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def increment(self, names):
+        with self._lock:
+            for name in names:
+                self._counters[name] = self._counters.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """Redis-backed cache shared by all instances
+
+    Values are pickled; Redis must only be reachable from the backend
+    network (as in docker-compose.prod.yml). Redis errors never break a
+    request: they are logged and the value is computed locally.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix="project.title:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key):
+        try:
+            data = self.client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            return MISSING
+        if data is None:
+            return MISSING
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Dropping undecodable cache entry {key}: {e}")
+            return MISSING
+
+    def set(self, key, value, ttl):
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            self.client.set(self._key(key), data, ex=max(int(ttl), 1))
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+    def delete(self, key):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed: {e}")
+
+    def counters(self, names):
+        if not names:
+            return []
+        try:
+            values = self.client.mget([self._key(f"gen:{name}") for name in names])
+        except Exception as e:
+            logger.warning(f"Redis generation read failed: {e}")
+            return [0] * len(names)
+        return [int(value) if value is not None else 0 for value in values]
+
+    def increment(self, names):
+        try:
+            for name in names:
+                self.client.incr(self._key(f"gen:{name}"))
+        except Exception as e:
+            logger.warning(f"Redis invalidation failed: {e}")
+
+    def acquire(self, key, timeout):
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(
+                self._key(f"lock:{key}"), token, nx=True, px=int(timeout * 1000)
+            ):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Redis lock failed: {e}")
+            return True  # Compute locally without the shared lock
+
+    def release(self, key, token):
+        if token is True:
+            return
+        lock = self._key(f"lock:{key}")
+        try:
+            # The lock may have expired and been taken over meanwhile
+            held = self.client.get(lock)
+            if held is not None and held.decode() == token:
+                self.client.delete(lock)
+        except Exception as e:
+            logger.warning(f"Redis unlock failed: {e}")
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Redis cache clear failed: {e}")
+
+
+def redis_client_from_environment(environ=None, purpose="cache"):
+    """Redis client when ``REDIS_HOST`` is configured and redis installed"""
+    environ = os.environ if environ is None else environ
+    host = environ.get("REDIS_HOST")
+    if not host:
+        return None
+    if redis is None:
+        logger.warning(
+            f"REDIS_HOST is set but redis is not installed; using local {purpose}"
+        )
+        return None
+
+    logger.info(f"Using Redis {purpose} at {host}")
+    return redis.Redis(
+        host=host,
+        port=int(environ.get("REDIS_PORT", 6379)),
+        password=environ.get("REDIS_PASSWORD") or None,
+        db=int(environ.get("REDIS_CACHE_DB", 0)),
+        socket_timeout=0.5,
+        socket_connect_timeout=0.5,
+    )
+
+
+def backend_from_environment(environ=None):
+    """Redis backend when ``REDIS_HOST`` is configured, else a local LRU"""
+    client = redis_client_from_environment(environ)
+    if client is None:
+        return LocalLRUBackend()
+    return RedisBackend(client)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_environment()
+    return _backend
+
+
+def set_cache_backend(backend):
+    """Swap the cache backend (tests, or explicit configuration)"""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,255 @@
+"""
+Scoped RAM Cache Keys with Dependency Tags
+
+``@cached(...)`` replaces bare ``@ram.cache(lambda *args: time.time() // 30)``
+keys, which were shared by every site, classroom and teacher and were never
+invalidated on writes. Entries live in the configured cache backend (see
+``cache_backends.py``) for ``ttl`` seconds, still an upper bound on
+staleness. A cache key is built from:
+
+- the function
+- the scope: the site, plus the view context and/or the current user
+- the generation of each dependency tag, e.g. ``hallpass:/plone/room-1``
+  (the context path for context-scoped caches, otherwise the site path)
+- the call arguments
+
+Event subscribers bump tag generations when data changes, so only the
+entries that depend on the changed classroom are recomputed; superseded
+entries age out of the RAM cache. A change at ``/plone/room-1/pass-1``
+bumps the tag of that path and of every ancestor, so caches on the
+classroom and on the site both refresh, but other classrooms keep theirs.
+
+Generations are counters in the same backend: with Redis, invalidations
+reach every Zope instance; with the local LRU, other instances refresh
+within ``ttl``.
+"""
+
+from collections import Counter
+from functools import wraps
+from plone import api
+import hashlib
+import logging
+import threading
+import transaction
+
+from .cache_backends import get_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Dependency kinds used by the dashboard caches
+HALL_PASSES = "hallpass"
+SEATING = "seating"
+PICKER = "picker"
+TIMERS = "timer"
+DASHBOARD_KINDS = (HALL_PASSES, SEATING, PICKER, TIMERS)
+
+# Scopes
+SITE = "site"
+CONTEXT = "context"
+USER = "user"
+
+
+def tag_for(kind, path):
+    return f"{kind}:{path}"
+
+
+def tag_generation(tag):
+    return get_cache_backend().counters([tag])[0]
+
+
+def bump_tags(tags):
+    get_cache_backend().increment(list(tags))
+
+
+def generations(kinds):
+    """Site tag generations of ``kinds``; they change whenever site-scoped
+    caches of those kinds are invalidated (e.g. for ETags)"""
+    site = _site_path()
+    tags = [tag for kind in kinds for tag in (kind, tag_for(kind, site))]
+    return get_cache_backend().counters(tags)
+
+
+def tags_for_path(kind, path):
+    """Tags invalidated by a change at ``path``: the path and its ancestors"""
+    parts = [part for part in path.split("/") if part]
+    return [tag_for(kind, "/" + "/".join(parts[:i])) for i in range(len(parts), 0, -1)]
+
+
+def invalidate(kind, obj=None):
+    """Invalidate cached data of ``kind`` that depends on ``obj``
+
+    Without a locatable object (e.g. passes of the hall pass repository)
+    every entry of the kind is invalidated. The bump happens now, for the
+    rest of this request, and again after commit, so a concurrent request
+    that cached the pre-commit state does not keep serving it.
+    """
+    path = _path_of(obj)
+    tags = tags_for_path(kind, path) if path else [kind]
+    bump_tags(tags)
+    try:
+        transaction.get().addAfterCommitHook(_bump_after_commit, args=(tags,))
+    except Exception as e:
+        logger.warning(f"Cache invalidation hook failed: {e}")
+
+
+def _bump_after_commit(success, tags):
+    if success:
+        bump_tags(tags)
+
+
+def invalidate_kinds(*kinds):
+    """Invalidate every entry depending on any of ``kinds``"""
+    bump_tags(kinds)
+
+
+class CacheStats:
+    """Per-process, per-function call and miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.misses = Counter()
+
+    def record(self, name, hit):
+        with self._lock:
+            self.calls[name] += 1
+            if not hit:
+                self.misses[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.misses.clear()
+
+    def snapshot(self):
+        """``{"functions": {name: {...}}, "hits", "misses", "hit_ratio"}``"""
+        with self._lock:
+            calls, misses = dict(self.calls), dict(self.misses)
+        functions = {}
+        for name, count in calls.items():
+            missed = min(misses.get(name, 0), count)
+            functions[name] = {
+                "hits": count - missed,
+                "misses": missed,
+                "hit_ratio": round((count - missed) / count, 3) if count else 0.0,
+            }
+        total_calls = sum(calls.values())
+        total_misses = sum(entry["misses"] for entry in functions.values())
+        return {
+            "functions": functions,
+            "hits": total_calls - total_misses,
+            "misses": total_misses,
+            "hit_ratio": (
+                round((total_calls - total_misses) / total_calls, 3)
+                if total_calls
+                else 0.0
+            ),
+        }
+
+
+cache_stats = CacheStats()
+
+
+def cached(*kinds, ttl=30, scope=(SITE,)):
+    """RAM-cache a function or view method with scoped, tagged keys
+
+    Args:
+        *kinds: Dependency kinds (``HALL_PASSES`` ...)
+        ttl: Seconds an entry lives in the cache backend
+        scope: Any of ``SITE``, ``CONTEXT``, ``USER``. Use ``CONTEXT`` only
+            when the result depends on the context's subtree alone: its
+            tags then follow the context, so changes in other classrooms
+            keep the entry. Site-wide queries stay on the site tags. Add
+            ``USER`` whenever the result depends on who asks, e.g. catalog
+            queries, whose results follow the user's permissions.
+
+    Methods of objects with a ``context`` attribute (browser views) are
+    keyed on ``view.context``, never on the view instance itself.
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def get_key(backend, args, kwargs):
+            context = getattr(args[0], "context", None) if args else None
+            if context is not None:
+                args = args[1:]
+            site = _site_path()
+            path = site
+            parts = []
+            if SITE in scope:
+                parts.append(site)
+            if CONTEXT in scope:
+                path = _path_of(context) or site
+                parts.append(path)
+            if USER in scope:
+                parts.append(_user_id())
+            tags = [tag for kind in kinds for tag in (kind, tag_for(kind, path))]
+            parts.append(backend.counters(tags))
+            parts.append(args)
+            parts.append(sorted(kwargs.items()))
+            digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+            return f"{name}:{digest}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_cache_backend()
+            value, hit = backend.get_or_compute(
+                get_key(backend, args, kwargs), lambda: func(*args, **kwargs), ttl
+            )
+            cache_stats.record(name, hit)
+            return value
+
+        wrapper.cache_kinds = kinds
+        return wrapper
+
+    return decorator
+
+
+def _path_of(obj):
+    try:
+        return "/".join(obj.getPhysicalPath()) or None
+    except Exception:
+        return None
+
+
+def _site_path():
+    try:
+        return "/".join(api.portal.get().getPhysicalPath())
+    except Exception:
+        return ""
+
+
+def _user_id():
+    try:
+        user = api.user.get_current()
+        return user.getId() if user else "anonymous"
+    except Exception:
+        return "anonymous"
+
+
+# Event subscribers invalidating dependent cache entries
+
+
+def handle_hall_pass_changed(obj, event):
+    invalidate(HALL_PASSES, obj)
+
+
+def handle_hall_pass_event(event):
+    invalidate(HALL_PASSES, event.object)
+
+
+def handle_seating_chart_changed(obj, event):
+    invalidate(SEATING, obj)
+
+
+def handle_seating_chart_event(event):
+    invalidate(SEATING, event.object)
+
+
+def handle_student_picked(event):
+    invalidate(PICKER, event.object)
+
+
+def handle_timer_completed(event):
+    invalidate(TIMERS, getattr(event, "context", None))
@@ -8,7 +8,8 @@ All indexes are additive - existing catalog functionality unchanged.
 from plone.indexer import indexer
 from project.title.content.hall_pass import IHallPass
 from project.title.content.seating_chart import ISeatingChart
-from datetime import datetime
+from zope.interface import Interface
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,21 +17,21 @@ logger = logging.getLogger(__name__)
 
 @indexer(IHallPass)
 def hall_pass_duration(obj):
-    """Index for fast duration-based queries"""
+    """Metadata: final duration in minutes of a returned pass
+
+    Active passes report 0. A duration computed at index time goes stale
+    immediately; live durations and "overdue now" queries use the
+    hall_pass_issue_time / hall_pass_expected_return date indexes instead.
+    """
     try:
         if hasattr(obj, "issue_time") and obj.issue_time:
             if hasattr(obj, "return_time") and obj.return_time:
-                # Returned pass - calculate actual duration
                 delta = obj.return_time - obj.issue_time
                 return int(delta.total_seconds() / 60)  # minutes
-            else:
-                # Active pass - calculate current duration
-                delta = datetime.now() - obj.issue_time
-                return int(delta.total_seconds() / 60)  # minutes
     except Exception as e:
         logger.warning(f"Duration calculation failed: {e}")
 
-    return 0  # Default for passes without proper times
+    return 0  # Active passes and passes without proper times
 
 
 @indexer(IHallPass)
@@ -82,13 +83,76 @@ def seating_last_updated(obj):
     return datetime.now()
 
 
+# Hall pass metadata for brain-only dashboard aggregation. These let the
+# dashboard answer "who is out, where, for how long" without getObject().
+
+
+@indexer(IHallPass)
+def hall_pass_student_name(obj):
+    """Metadata: student name shown on the dashboard"""
+    return getattr(obj, "student_name", None) or "Unknown"
+
+
+@indexer(IHallPass)
+def hall_pass_destination(obj):
+    """Metadata: destination shown on the dashboard"""
+    return getattr(obj, "destination", None) or "Unknown"
+
+
+@indexer(IHallPass)
+def hall_pass_issue_time(obj):
+    """Date index and metadata: issue time, used to derive live durations"""
+    return getattr(obj, "issue_time", None)
+
+
+@indexer(IHallPass)
+def hall_pass_expected_return(obj):
+    """Date index and metadata: when the student is expected back
+
+    Fixed once the pass is issued, so "overdue now" is a range query
+    against the current time with no periodic reindexing.
+    """
+    issue_time = getattr(obj, "issue_time", None)
+    if not issue_time:
+        return None
+    expected = getattr(obj, "expected_duration", None) or 5
+    return issue_time + timedelta(minutes=expected)
+
+
+@indexer(IHallPass)
+def hall_pass_return_time(obj):
+    """Metadata: return time (None while the student is out)"""
+    return getattr(obj, "return_time", None)
+
+
+@indexer(IHallPass)
+def hall_pass_expected_duration(obj):
+    """Metadata: expected duration in minutes for alert level calculation"""
+    return getattr(obj, "expected_duration", None) or 5
+
+
+@indexer(IHallPass)
+def hall_pass_is_active(obj):
+    """Index for fast "student is out" queries"""
+    return getattr(obj, "return_time", None) is None
+
+
+@indexer(IHallPass)
+def hall_pass_code(obj):
+    """Index and metadata: pass code, for lookups such as @@pass-qr"""
+    return getattr(obj, "pass_code", None)
+
+
 # Generic classroom content indexer
+@indexer(Interface)
 def classroom_ready_status(obj):
     """Index for classroom readiness status"""
     try:
         # Different logic based on content type
         if IHallPass.providedBy(obj):
-            return hall_pass_status(obj) != "draft"
+            # The undecorated function: calling the indexer factory would
+            # return an adapter, which never equals "draft"
+            return hall_pass_status.callable(obj) != "draft"
         elif ISeatingChart.providedBy(obj):
             return bool(getattr(obj, "students", None))
         else:
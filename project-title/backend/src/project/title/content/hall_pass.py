@@ -8,17 +8,45 @@ for student movement tracking and time accountability.
 from plone.dexterity.content import Item
 from plone.supermodel import model
 from zope import schema
+from zope.event import notify
 from zope.interface import implementer
 from datetime import datetime
+from ..counters import record_hall_pass_returned
+from ..events import HallPassReturnedEvent
+from ..qr import get_qr_image
+from ..qr import pass_qr_url
+from ..qr import verification_payload
 import logging
 import uuid
-import qrcode
-import io
-import base64
 
 logger = logging.getLogger(__name__)
 
 
+def duration_minutes_since(issue_time, end_time=None):
+    """Minutes elapsed between issue_time and end_time (default: now)
+
+    Shared by HallPass objects and brain-only dashboard aggregation so both
+    report identical durations.
+    """
+    if not issue_time:
+        return 0
+    delta = (end_time or datetime.now()) - issue_time
+    return int(delta.total_seconds() / 60)
+
+
+def alert_level_for(duration, expected=None, returned=False):
+    """Alert level ('green', 'yellow' or 'red') for a pass duration in minutes"""
+    if returned:
+        return "green"
+
+    expected = expected or 5
+    if duration > expected + 5:  # More than 5 minutes overdue
+        return "red"
+    elif duration > expected:  # Past expected time
+        return "yellow"
+    return "green"  # On time
+
+
 class IHallPass(model.Schema):
     """Schema for digital hall pass with QR tracking"""
 
@@ -99,67 +127,44 @@ class HallPass(Item):
     def generate_qr_code(self):
         """Generate QR code for this pass
 
+        The PNG is rendered once per pass code and then served from the
+        QR cache.
+
         Returns:
             str: Base64 encoded QR code image
         """
         try:
             # Create verification URL for QR code
             # This will link to a useful verification page instead of raw JSON
-            from plone import api
-
-            api.portal.get()
-
-            # Get the request to determine the proper base URL
             request = getattr(self, "REQUEST", None)
-            if request:
-                # Check if we're in Docker environment
-                host = request.getHeader("Host", "")
-                if "project-title.localhost" in host:
-                    base_url = "http://project-title.localhost"
-                else:
-                    base_url = "http://localhost:8080"
-            else:
-                # Fallback
-                base_url = "http://project-title.localhost"
-
-            verification_url = f"{base_url}/Plone/@@pass-verify?code={self.pass_code}"
-
-            # Generate QR code with verification URL
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(verification_url)
-            qr.make(fit=True)
-
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            # Convert to base64 for web display
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-
-            return f"data:image/png;base64,{img_str}"
+            payload = verification_payload(self.pass_code, request)
+            return get_qr_image(self.pass_code, payload).data_uri()
 
         except Exception as e:
             logger.error(f"Failed to generate QR code for pass {self.getId()}: {e}")
             return None
 
+    def get_qr_url(self):
+        """URL of this pass's cached QR image (``@@pass-qr``)
+
+        Returns:
+            str: Image URL, cheap to include in list responses
+        """
+        try:
+            from plone import api
+
+            portal_url = api.portal.get().absolute_url()
+        except Exception:
+            portal_url = ""
+        return pass_qr_url(portal_url, self.pass_code)
+
     def get_duration_minutes(self):
         """Calculate how long this pass has been active
 
         Returns:
             int: Duration in minutes
         """
-        if not self.issue_time:
-            return 0
-
-        end_time = self.return_time if self.return_time else datetime.now()
-        delta = end_time - self.issue_time
-        return int(delta.total_seconds() / 60)
+        return duration_minutes_since(self.issue_time, self.return_time)
 
     def is_overdue(self):
         """Check if this pass is overdue
@@ -181,18 +186,11 @@ class HallPass(Item):
         Returns:
             str: 'green', 'yellow', or 'red'
         """
-        if self.return_time:
-            return "green"  # Returned
-
-        duration = self.get_duration_minutes()
-        expected = self.expected_duration or 5
-
-        if duration > expected + 5:  # More than 5 minutes overdue
-            return "red"
-        elif duration > expected:  # Past expected time
-            return "yellow"
-        else:
-            return "green"  # On time
+        return alert_level_for(
+            self.get_duration_minutes(),
+            self.expected_duration,
+            returned=bool(self.return_time),
+        )
 
     def mark_returned(self):
         """Mark this pass as returned
@@ -201,8 +199,14 @@ class HallPass(Item):
             bool: True if successfully marked as returned
         """
         try:
+            was_active = self.return_time is None
             self.return_time = datetime.now()
             self.reindexObject()
+            record_hall_pass_returned(self)
+            if was_active:
+                notify(
+                    HallPassReturnedEvent(self, duration=self.get_duration_minutes())
+                )
 
             logger.info(
                 f"Pass {self.getId()} marked as returned for {self.student_name}"
@@ -240,6 +244,6 @@ class HallPass(Item):
             "alert_level": self.get_alert_level(),
             "is_active": self.is_active(),
             "pass_code": self.pass_code,
-            "qr_code": self.generate_qr_code(),
+            "qr_code": self.get_qr_url(),
             "url": self.absolute_url(),
         }
@@ -12,6 +12,10 @@ from zope.interface import implementer
 import json
 import logging
 
+from ..seating_grid import SeatingGrid
+from ..seating_optimizer import DEFAULT_TIME_BUDGET
+from ..seating_optimizer import optimize_seating
+
 logger = logging.getLogger(__name__)
 
 
@@ -94,15 +98,127 @@ class ISeatingChart(model.Schema):
 
 @implementer(ISeatingChart)
 class SeatingChart(Container):
-    """Seating chart implementation with grid management methods"""
+    """Seating chart implementation with grid management methods
 
-    def get_grid(self):
-        """Parse grid data as Python object with error handling"""
+    Seat assignments live in a persistent ``SeatingGrid`` (see
+    seating_grid.py). ``grid_data`` stays available as a JSON property so
+    the REST API and existing clients keep reading and writing it.
+
+    Read paths share one parsed view of the grid (dict, JSON, empty seats,
+    occupancy) cached in a volatile attribute per committed revision of
+    the chart and its grid, so it is rebuilt only after a change.
+    """
+
+    _seating_grid = None
+    _v_parsed_grid = None
+
+    def get_seating_grid(self):
+        """The persistent grid, created (from legacy JSON) on first write"""
+        if self._seating_grid is None:
+            self._seating_grid = self._read_grid()
+            # The JSON copy is superseded by the grid
+            self.__dict__.pop("grid_data", None)
+        return self._seating_grid
+
+    def _read_grid(self):
+        """The persistent grid, or a transient copy for unconverted charts
+
+        Read paths use this so GET requests never write to the ZODB.
+        """
+        if self._seating_grid is not None:
+            return self._seating_grid
+        return self._parsed()["grid"]
+
+    def _parsed_key(self):
+        """Committed revision of chart and grid, or None if changed/new
+
+        The chart serial covers the grid size and legacy JSON; the grid's
+        ``state_key`` covers seat moves, which only write BTree buckets.
+        """
+        self._p_activate()  # Ghosts do not know their serial yet
+        if self._p_jar is None or self._p_changed:
+            return None
+        grid_key = None
+        if self._seating_grid is not None:
+            grid_key = self._seating_grid.state_key()
+            if grid_key is None:
+                return None
+        return (self._p_serial, grid_key)
+
+    def _parsed(self):
+        """Parsed grid and derived data for the current state (read-only)"""
+        key = self._parsed_key()
+        cached = self._v_parsed_grid
+        if key is not None and cached is not None and cached[0] == key:
+            return cached[1]
+
+        grid = self._seating_grid
+        if grid is None:
+            grid = SeatingGrid()
+            grid.load(self._legacy_grid_data())
+        rows, cols = self.grid_rows or 0, self.grid_cols or 0
+        data = grid.to_dict()
+        empty = [
+            (row, col)
+            for row in range(rows)
+            for col in range(cols)
+            if grid.student_at(row, col) is None
+        ]
+        total_desks = rows * cols
+        parsed = {
+            "grid": grid,
+            "data": data,
+            "json": json.dumps(data),
+            "empty": empty,
+            "seated": len(grid),
+            "total_desks": total_desks,
+            "occupancy": (total_desks - len(empty)) / total_desks if total_desks else 0,
+        }
+        if key is not None:
+            self._v_parsed_grid = (key, parsed)
+        return parsed
+
+    def _legacy_grid_data(self):
+        self._p_activate()
+        raw = self.__dict__.get("grid_data")
         try:
-            return json.loads(self.grid_data or "{}")
-        except (json.JSONDecodeError, AttributeError):
+            return json.loads(raw or "{}")
+        except (json.JSONDecodeError, TypeError):
             logger.warning(f"Invalid grid data in {self.getId()}, resetting")
-            return {"students": {}, "empty_desks": [], "notes": {}}
+            return {}
+
+    @property
+    def grid_data(self):
+        return self._parsed()["json"]
+
+    @grid_data.setter
+    def grid_data(self, value):
+        """Replace the whole arrangement from a JSON string or dict"""
+        if isinstance(value, str):
+            try:
+                value = json.loads(value or "{}")
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring invalid grid data for {self.getId()}")
+                return
+        self.get_seating_grid().load(value)
+
+    def get_grid(self):
+        """Grid as the legacy ``{"students": {"row,col": name}, ...}`` dict
+
+        The dict is shared between reads of the same revision: do not
+        modify it, use ``update_position`` or ``grid_data`` instead.
+        """
+        return self._parsed()["data"]
+
+    def get_grid_summary(self):
+        """Seated students, desks and occupancy (0-1) of the arrangement"""
+        parsed = self._parsed()
+        return {
+            "seated": parsed["seated"],
+            "total_desks": parsed["total_desks"],
+            "available": len(parsed["empty"]),
+            "occupancy": parsed["occupancy"],
+        }
 
     def update_position(self, student_name, row, col):
         """Update student position in grid
@@ -124,19 +240,8 @@ class SeatingChart(Container):
             logger.warning(f"Position ({row}, {col}) out of bounds for {self.getId()}")
             return False
 
-        grid = self.get_grid()
-
-        # Remove student from previous position
-        grid["students"] = {
-            pos: name for pos, name in grid["students"].items() if name != student_name
-        }
-
-        # Add student to new position
-        position_key = f"{row},{col}"
-        grid["students"][position_key] = student_name
-
-        # Save updated grid
-        self.grid_data = json.dumps(grid)
+        # Writes one entry in each grid BTree, not the whole arrangement
+        self.get_seating_grid().move(student_name, row, col)
 
         logger.info(f"Moved {student_name} to ({row}, {col}) in {self.getId()}")
         return True
@@ -150,12 +255,7 @@ class SeatingChart(Container):
         Returns:
             tuple: (row, col) or None if not positioned
         """
-        grid = self.get_grid()
-        for position, name in grid["students"].items():
-            if name == student_name:
-                row, col = map(int, position.split(","))
-                return (row, col)
-        return None
+        return self._read_grid().position_of(student_name)
 
     def get_empty_positions(self):
         """Get list of empty desk positions
@@ -163,27 +263,18 @@ class SeatingChart(Container):
         Returns:
             list: List of (row, col) tuples for empty desks
         """
-        grid = self.get_grid()
-        occupied_positions = set(grid["students"].keys())
-
-        empty_positions = []
-        for row in range(self.grid_rows):
-            for col in range(self.grid_cols):
-                position_key = f"{row},{col}"
-                if position_key not in occupied_positions:
-                    empty_positions.append((row, col))
-
-        return empty_positions
+        return list(self._parsed()["empty"])
 
     def clear_all_positions(self):
         """Clear all student positions (emergency reset)"""
-        self.grid_data = json.dumps({"students": {}, "empty_desks": [], "notes": {}})
+        self.get_seating_grid().clear()
         logger.info(f"Cleared all positions in {self.getId()}")
 
     def auto_arrange_students(self):
         """Automatically arrange students in grid (simple left-to-right fill)"""
-        grid = self.get_grid()
-        grid["students"] = {}
+        grid = self.get_seating_grid()
+        for student in list(grid.positions.keys()):
+            grid.remove(student)
 
         position_index = 0
         for student in self.students:
@@ -192,9 +283,47 @@ class SeatingChart(Container):
 
             row = position_index // self.grid_cols
             col = position_index % self.grid_cols
-            position_key = f"{row},{col}"
-            grid["students"][position_key] = student
+            grid.move(student, row, col)
             position_index += 1
 
-        self.grid_data = json.dumps(grid)
         logger.info(f"Auto-arranged {len(self.students)} students in {self.getId()}")
+
+    def optimize_arrangement(
+        self, constraints, seed=None, time_budget=DEFAULT_TIME_BUDGET, apply=True
+    ):
+        """Rearrange the roster to best satisfy seating constraints
+
+        Starts from the current arrangement; see seating_optimizer.py for
+        the constraint format.
+
+        Returns:
+            dict: The optimizer result plus ``changes``
+            ({student: (old, new)}), applied to the grid if ``apply``
+        """
+        grid = self._read_grid()
+        result = optimize_seating(
+            self.students or [],
+            self.grid_rows,
+            self.grid_cols,
+            constraints=constraints,
+            initial=dict(grid.positions.items()),
+            seed=seed,
+            time_budget=time_budget,
+        )
+
+        assignment = result["assignment"]
+        changes = {}
+        for student in set(grid.positions.keys()) | set(assignment):
+            old, new = grid.position_of(student), assignment.get(student)
+            if old != new:
+                changes[student] = (old, new)
+        result["changes"] = changes
+
+        if apply and changes:
+            self.get_seating_grid().apply_changes(changes)
+            logger.info(
+                f"Optimized seating in {self.getId()}: cost "
+                f"{result['initial_cost']} -> {result['cost']}, "
+                f"{len(changes)} students moved"
+            )
+        return result
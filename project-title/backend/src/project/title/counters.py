@@ -0,0 +1,290 @@
+"""
+Incrementally Maintained Dashboard Counters
+
+Keeps per-classroom and site-wide hall pass counters in the ZODB so the
+dashboard reads active/today/overdue numbers without scanning passes.
+
+Counters are updated from the HallPass lifecycle (creation, moves and
+renames, deletion, edits setting ``return_time``, mark_returned,
+workflow transitions) and from the hall pass events. All updates are
+idempotent per pass id, so a pass reported by several hooks is only
+counted once. ``reconcile_dashboard_counters`` rebuilds everything from
+the catalog if the counters ever drift.
+"""
+
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+from datetime import date, datetime, timedelta
+from DateTime import DateTime
+from persistent import Persistent
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = "project.title.dashboard_counters"
+SITE_WIDE = "__all__"
+DEFAULT_CLASSROOM = "__site__"
+
+# Same rule as the dashboard "red" alert level: expected duration + grace
+OVERDUE_GRACE_MINUTES = 5
+DEFAULT_EXPECTED_DURATION = 5
+# Days of issued totals kept; the dashboard only shows today's
+ISSUED_DAYS = 1
+
+
+def classroom_key(obj):
+    """Classroom a hall pass belongs to: the path of its container"""
+    try:
+        path = obj.getPhysicalPath()
+        if len(path) > 1:
+            return "/".join(path[:-1]) or DEFAULT_CLASSROOM
+    except Exception:
+        pass
+    return DEFAULT_CLASSROOM
+
+
+def _deadline(issue_time, expected_duration):
+    minutes = (expected_duration or DEFAULT_EXPECTED_DURATION) + OVERDUE_GRACE_MINUTES
+    return (issue_time + timedelta(minutes=minutes)).timestamp()
+
+
+class ClassroomCounters(Persistent):
+    """Counters for one classroom (or the whole site)
+
+    Each structure is a BTree or ``Length`` so concurrent updates touch
+    small buckets and counter increments resolve conflicts.
+    """
+
+    last_pruned = None  # Day of the last ``prune``
+
+    def __init__(self):
+        self.active = OOBTree()  # pass_id -> overdue deadline timestamp
+        self.deadlines = OOTreeSet()  # (deadline timestamp, pass_id)
+        self.active_count = Length()
+        self.issued = OOBTree()  # day -> OOTreeSet of pass ids
+        self.issued_count = OOBTree()  # day -> Length
+
+    def prune(self, day, days=ISSUED_DAYS):
+        """Drop the issued totals of days before the last ``days`` up to ``day``
+
+        Returns:
+            int: Number of days dropped
+        """
+        cutoff = (date.fromisoformat(day) - timedelta(days=days - 1)).isoformat()
+        stale = list(self.issued_count.keys(max=cutoff, excludemax=True))
+        for old in stale:
+            self.issued.pop(old, None)
+            del self.issued_count[old]
+        self.last_pruned = day
+        return len(stale)
+
+    def add_issued(self, pass_id, day, deadline):
+        if self.last_pruned is None or day > self.last_pruned:
+            self.prune(day)
+        self.count_issued(pass_id, day)
+        self.add_active(pass_id, deadline)
+
+    def count_issued(self, pass_id, day):
+        issued = self.issued.get(day)
+        if issued is None:
+            issued = self.issued[day] = OOTreeSet()
+            self.issued_count[day] = Length()
+        if issued.insert(pass_id):
+            self.issued_count[day].change(1)
+
+    def uncount_issued(self, pass_id, day):
+        issued = self.issued.get(day)
+        if issued is not None and pass_id in issued:
+            issued.remove(pass_id)
+            self.issued_count[day].change(-1)
+
+    def add_active(self, pass_id, deadline):
+        if pass_id not in self.active:
+            self.active[pass_id] = deadline
+            self.deadlines.insert((deadline, pass_id))
+            self.active_count.change(1)
+
+    def remove_active(self, pass_id):
+        deadline = self.active.get(pass_id)
+        if deadline is None:
+            return False
+        del self.active[pass_id]
+        self.deadlines.remove((deadline, pass_id))
+        self.active_count.change(-1)
+        return True
+
+    def snapshot(self, now):
+        day = now.date().isoformat()
+        today = self.issued_count.get(day)
+        # Range over expired deadlines only: cost is the number overdue
+        overdue = len(self.deadlines.keys(max=(now.timestamp(), "\uffff")))
+        return {
+            "active": self.active_count(),
+            "today_total": today() if today is not None else 0,
+            "overdue": overdue,
+        }
+
+
+class DashboardCounters(Persistent):
+    """Site-wide counter store: classroom key -> ClassroomCounters"""
+
+    def __init__(self):
+        self.classrooms = OOBTree()
+
+    def _buckets(self, classroom):
+        for key in (SITE_WIDE, classroom):
+            bucket = self.classrooms.get(key)
+            if bucket is None:
+                bucket = self.classrooms[key] = ClassroomCounters()
+            yield bucket
+
+    def record_issued(
+        self, pass_id, classroom=DEFAULT_CLASSROOM, issue_time=None, expected=None
+    ):
+        """Count a pass as issued today and currently active"""
+        issue_time = issue_time or datetime.now()
+        day = issue_time.date().isoformat()
+        deadline = _deadline(issue_time, expected)
+        key = f"{classroom}/{pass_id}"
+        for bucket in self._buckets(classroom):
+            bucket.add_issued(key, day, deadline)
+
+    def record_returned(self, pass_id, classroom=DEFAULT_CLASSROOM):
+        """Remove a pass from the active set (no-op if already removed)"""
+        key = f"{classroom}/{pass_id}"
+        for bucket in self._buckets(classroom):
+            bucket.remove_active(key)
+
+    def record_moved(self, old_id, old_classroom, pass_id, classroom):
+        """Re-key a moved or renamed pass, keeping its deadline and issue day"""
+        old_key, key = f"{old_classroom}/{old_id}", f"{classroom}/{pass_id}"
+        site = self.classrooms.get(SITE_WIDE)
+        if old_key == key or site is None:
+            return
+        deadline = site.active.get(old_key)
+        days = [day for day, issued in site.issued.items() if old_key in issued]
+        for name in (SITE_WIDE, old_classroom):
+            bucket = self.classrooms.get(name)
+            if bucket is None:
+                continue
+            bucket.remove_active(old_key)
+            for day in days:
+                bucket.uncount_issued(old_key, day)
+        for bucket in self._buckets(classroom):
+            for day in days:
+                bucket.count_issued(key, day)
+            if deadline is not None:
+                bucket.add_active(key, deadline)
+
+    def snapshot(self, classroom=SITE_WIDE, now=None):
+        """Return ``{"active", "today_total", "overdue"}`` for a classroom"""
+        bucket = self.classrooms.get(classroom)
+        if bucket is None:
+            return {"active": 0, "today_total": 0, "overdue": 0}
+        return bucket.snapshot(now or datetime.now())
+
+
+def get_dashboard_counters(portal=None, create=True):
+    """Return the persistent counter store from portal annotations"""
+    portal = portal or api.portal.get()
+    annotations = IAnnotations(portal)
+    counters = annotations.get(COUNTERS_KEY)
+    if counters is None and create:
+        counters = annotations[COUNTERS_KEY] = DashboardCounters()
+    return counters
+
+
+def dashboard_counter_snapshot(portal=None, classroom=SITE_WIDE, now=None):
+    """Read-only snapshot; never creates the store (safe on GET requests)"""
+    counters = get_dashboard_counters(portal, create=False)
+    if counters is None:
+        return {"active": 0, "today_total": 0, "overdue": 0}
+    return counters.snapshot(classroom, now=now)
+
+
+def record_hall_pass_issued(obj):
+    """Lifecycle hook: count ``obj`` as issued/active (never raises)"""
+    try:
+        if getattr(obj, "return_time", None):
+            return
+        get_dashboard_counters().record_issued(
+            obj.getId(),
+            classroom=classroom_key(obj),
+            issue_time=getattr(obj, "issue_time", None),
+            expected=getattr(obj, "expected_duration", None),
+        )
+    except Exception as e:
+        logger.warning(f"Dashboard counter update (issued) failed: {e}")
+
+
+def record_hall_pass_returned(obj):
+    """Lifecycle hook: remove ``obj`` from the active counters (never raises)"""
+    try:
+        get_dashboard_counters().record_returned(
+            obj.getId(), classroom=classroom_key(obj)
+        )
+    except Exception as e:
+        logger.warning(f"Dashboard counter update (returned) failed: {e}")
+
+
+def record_hall_pass_moved(obj, old_parent, old_name):
+    """Lifecycle hook: follow a moved or renamed ``obj`` (never raises)"""
+    try:
+        counters = get_dashboard_counters(create=False)
+        if counters is None:
+            return
+        old_classroom = "/".join(old_parent.getPhysicalPath()) or DEFAULT_CLASSROOM
+        counters.record_moved(old_name, old_classroom, obj.getId(), classroom_key(obj))
+    except Exception as e:
+        logger.warning(f"Dashboard counter update (moved) failed: {e}")
+
+
+def reconcile_dashboard_counters(portal=None, days=1):
+    """
+    Rebuild the counter store from the catalog.
+
+    Active passes come from the ``hall_pass_is_active`` index; today's
+    totals from passes created within the last ``days`` days. Uses brain
+    metadata only, so no objects are loaded.
+
+    Returns:
+        dict: Site-wide snapshot after the rebuild
+    """
+    portal = portal or api.portal.get()
+    catalog = api.portal.get_tool("portal_catalog")
+    counters = DashboardCounters()
+
+    since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    since -= timedelta(days=days - 1)
+
+    seen = set()
+    queries = (
+        {"portal_type": "HallPass", "hall_pass_is_active": True},
+        {
+            "portal_type": "HallPass",
+            "created": {"query": DateTime(since), "range": "min"},
+        },
+    )
+    for query in queries:
+        for brain in catalog.unrestrictedSearchResults(**query):
+            if brain.getRID() in seen:
+                continue
+            seen.add(brain.getRID())
+            classroom = "/".join(brain.getPath().split("/")[:-1]) or DEFAULT_CLASSROOM
+            issue_time = brain.hall_pass_issue_time or brain.created.asdatetime()
+            counters.record_issued(
+                brain.getId,
+                classroom=classroom,
+                issue_time=issue_time.replace(tzinfo=None),
+                expected=brain.hall_pass_expected_duration,
+            )
+            if brain.hall_pass_return_time:
+                counters.record_returned(brain.getId, classroom=classroom)
+
+    IAnnotations(portal)[COUNTERS_KEY] = counters
+    snapshot = counters.snapshot()
+    logger.info(f"Reconciled dashboard counters from {len(seen)} passes: {snapshot}")
+    return snapshot
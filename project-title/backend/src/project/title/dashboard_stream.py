@@ -0,0 +1,307 @@
+"""
+Dashboard Delta Stream
+
+Instead of polling the full dashboard aggregation every few seconds, an
+open dashboard asks ``@@dashboard-stream`` for what changed since its
+cursor, in short requests that never block a Zope worker:
+
+- ``pass_issued`` / ``pass_returned``: from the hall pass events
+- ``overdue``: passes crossing their overdue deadline, derived from the
+  dashboard counters' deadline index (no event or reindex needed)
+- ``student_picked``: random picker selections
+- ``timer_completed``: classroom timer completions (subscribed, but
+  nothing fires ``TimerCompletedEvent`` or ``HallPassWarningEvent`` yet)
+
+Deltas are published only after the transaction that produced them
+commits, so aborted or retried requests never leak phantom updates.
+
+With ``REDIS_HOST`` set the deltas go to ``RedisDeltaBus``, shared by
+every Zope instance, so a request served by any instance sees the events
+of all of them. Otherwise ``LocalDeltaBus``, an in-process ring buffer
+(single instance, and the stand-in publisher for tests), is used. Other
+buses can be plugged in with ``set_delta_bus`` (same ``publish`` /
+``since`` / ``last_id`` methods).
+"""
+
+from collections import deque
+from datetime import datetime
+from itertools import islice
+import json
+import logging
+import threading
+import transaction
+
+from .cache_backends import redis_client_from_environment
+from .counters import DEFAULT_CLASSROOM as COUNTERS_DEFAULT_CLASSROOM
+from .counters import SITE_WIDE
+from .counters import classroom_key
+from .counters import get_dashboard_counters
+
+logger = logging.getLogger(__name__)
+
+DELTA_BUFFER_SIZE = 2000
+
+# Deltas without a known classroom are delivered to every subscriber
+ALL_CLASSROOMS = COUNTERS_DEFAULT_CLASSROOM
+
+
+class LocalDeltaBus:
+    """In-process ring buffer of deltas"""
+
+    def __init__(self, maxlen=DELTA_BUFFER_SIZE):
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, kind, classroom, data):
+        """Append a delta"""
+        with self._lock:
+            self._last_id += 1
+            delta = {
+                "id": self._last_id,
+                "type": kind,
+                "classroom": classroom,
+                "data": data,
+                "time": datetime.now().isoformat(),
+            }
+            self._events.append(delta)
+        return delta
+
+    def since(self, cursor, classroom=None):
+        """Deltas after ``cursor`` for a classroom
+
+        Returns:
+            tuple: ``(deltas, cursor, complete)``. The new cursor also skips
+            deltas of other classrooms. ``complete`` is False when the
+            cursor is older than the buffer (or from before a restart), so
+            the client must reload the full dashboard.
+        """
+        with self._lock:
+            if cursor > self._last_id:
+                return [], self._last_id, False
+            oldest = self._events[0]["id"] if self._events else self._last_id + 1
+            complete = cursor >= oldest - 1
+            # Ids are consecutive, so the first unseen delta is found directly
+            start = max(cursor - oldest + 1, 0)
+            deltas = [
+                delta
+                for delta in islice(self._events, start, None)
+                if matches_classroom(delta, classroom)
+            ]
+            return deltas, self._last_id, complete
+
+
+class RedisDeltaBus:
+    """Deltas in a Redis sorted set (score = id), shared by all instances
+
+    Keeps the last ``maxlen`` deltas. Redis errors never break a request:
+    failed publishes are logged by the after-commit hook and failed reads
+    return no deltas.
+    """
+
+    def __init__(self, client, prefix="project.title:deltas", maxlen=DELTA_BUFFER_SIZE):
+        self.client = client
+        self.events_key = f"{prefix}:events"
+        self.id_key = f"{prefix}:id"
+        self.maxlen = maxlen
+
+    @property
+    def last_id(self):
+        try:
+            return int(self.client.get(self.id_key) or 0)
+        except Exception as e:
+            logger.warning(f"Redis delta bus read failed: {e}")
+            return 0
+
+    def publish(self, kind, classroom, data):
+        delta_id = self.client.incr(self.id_key)
+        delta = {
+            "id": delta_id,
+            "type": kind,
+            "classroom": classroom,
+            "data": data,
+            "time": datetime.now().isoformat(),
+        }
+        self.client.zadd(self.events_key, {json.dumps(delta): delta_id})
+        self.client.zremrangebyrank(self.events_key, 0, -self.maxlen - 1)
+        return delta
+
+    def since(self, cursor, classroom=None):
+        """Like ``LocalDeltaBus.since``"""
+        try:
+            last_id = self.last_id
+            if cursor > last_id:
+                return [], last_id, False
+            oldest = self.client.zrange(self.events_key, 0, 0, withscores=True)
+            oldest = int(oldest[0][1]) if oldest else last_id + 1
+            members = self.client.zrangebyscore(self.events_key, cursor + 1, "+inf")
+        except Exception as e:
+            logger.warning(f"Redis delta bus read failed: {e}")
+            return [], cursor, True
+        deltas = [json.loads(member) for member in members]
+        last_id = max([last_id] + [delta["id"] for delta in deltas])
+        deltas = [delta for delta in deltas if matches_classroom(delta, classroom)]
+        return deltas, last_id, cursor >= oldest - 1
+
+
+def matches_classroom(delta, classroom):
+    """A subscriber sees its own classroom and everything below it"""
+    if classroom is None or delta["classroom"] == ALL_CLASSROOMS:
+        return True
+    return delta["classroom"] == classroom or delta["classroom"].startswith(
+        classroom.rstrip("/") + "/"
+    )
+
+
+def bus_from_environment(environ=None):
+    """Redis bus when ``REDIS_HOST`` is configured, else an in-process one"""
+    client = redis_client_from_environment(environ, purpose="delta bus")
+    if client is None:
+        return LocalDeltaBus()
+    return RedisDeltaBus(client)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_delta_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = bus_from_environment()
+    return _bus
+
+
+def set_delta_bus(bus):
+    """Swap the delta publisher (shared bus, or a stand-in in tests)"""
+    global _bus
+    previous, _bus = _bus, bus
+    return previous
+
+
+def _publish_after_commit(success, kind, classroom, data):
+    if not success:
+        return
+    try:
+        get_delta_bus().publish(kind, classroom, data)
+    except Exception as e:
+        logger.warning(f"Dashboard delta publish failed: {e}")
+
+
+def queue_delta(kind, classroom, data):
+    """Publish a delta once the current transaction commits (never raises)"""
+    try:
+        transaction.get().addAfterCommitHook(
+            _publish_after_commit, args=(kind, classroom, data)
+        )
+    except Exception as e:
+        logger.warning(f"Dashboard delta queueing failed: {e}")
+
+
+def overdue_deltas(classroom, start, end):
+    """Synthesize ``overdue`` deltas for deadlines crossed in (start, end]
+
+    Args:
+        classroom: Counter bucket (container path, or SITE_WIDE)
+        start, end: Epoch seconds
+    """
+    counters = get_dashboard_counters(create=False)
+    if counters is None or end <= start:
+        return []
+    bucket = counters.classrooms.get(classroom)
+    if bucket is None:
+        return []
+
+    deltas = []
+    for deadline, key in bucket.deadlines.keys(
+        min=(start, "\uffff"), max=(end, "\uffff")
+    ):
+        pass_classroom, _, pass_id = key.rpartition("/")
+        deltas.append(
+            {
+                "type": "overdue",
+                "classroom": pass_classroom,
+                "data": {
+                    "id": pass_id,
+                    "overdue_since": datetime.fromtimestamp(deadline).isoformat(),
+                },
+            }
+        )
+    return deltas
+
+
+def counters_bucket_for(context, portal):
+    """Counter bucket for a stream opened on ``context``"""
+    if context is None or context is portal:
+        return SITE_WIDE
+    try:
+        return "/".join(context.getPhysicalPath())
+    except Exception:
+        return SITE_WIDE
+
+
+# Event subscribers feeding the stream
+
+
+def handle_pass_issued_delta(event):
+    obj = event.object
+    queue_delta(
+        "pass_issued",
+        classroom_key(obj),
+        {
+            "id": obj.getId(),
+            "student_name": getattr(event, "student_name", None),
+            "destination": getattr(event, "destination", None),
+        },
+    )
+
+
+def handle_pass_returned_delta(event):
+    obj = event.object
+    queue_delta(
+        "pass_returned",
+        classroom_key(obj),
+        {"id": obj.getId(), "duration": getattr(event, "duration", None)},
+    )
+
+
+def handle_pass_warning_delta(event):
+    obj = event.object
+    queue_delta(
+        "overdue",
+        classroom_key(obj),
+        {
+            "id": obj.getId(),
+            "duration": getattr(event, "duration", None),
+            "alert_level": getattr(event, "alert_level", None),
+        },
+    )
+
+
+def handle_student_picked_delta(event):
+    queue_delta(
+        "student_picked",
+        _context_path(event.object),
+        {"students": list(event.students)},
+    )
+
+
+def handle_timer_completed_delta(event):
+    queue_delta(
+        "timer_completed",
+        _context_path(getattr(event, "context", None)),
+        event.get_timer_data(),
+    )
+
+
+def _context_path(context):
+    try:
+        return "/".join(context.getPhysicalPath())
+    except Exception:
+        return ALL_CLASSROOMS
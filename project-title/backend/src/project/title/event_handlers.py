@@ -7,9 +7,12 @@ without breaking current features.
 
 from zope.component import adapter
 from plone import api
-from datetime import datetime
 import logging
 
+from .counters import record_hall_pass_issued
+from .counters import record_hall_pass_moved
+from .counters import record_hall_pass_returned
+from .storage import get_classroom_storage
 from .events import (
     IHallPassIssuedEvent,
     IHallPassReturnedEvent,
@@ -19,6 +22,36 @@ from .events import (
 
 logger = logging.getLogger(__name__)
 
+# Classroom state storage counter namespaces (see storage.py)
+HALL_PASS_STATS = "hall_pass_statistics"
+TIMER_USAGE_STATS = "timer_usage_stats"
+
+
+def get_hall_pass_statistics():
+    """Return ``{"total_passes", "total_duration", "average_duration"}``"""
+    storage = get_classroom_storage(create=False)
+    counters = storage.counters(HALL_PASS_STATS) if storage else {}
+    total = counters.get("total_passes", 0)
+    duration = counters.get("total_duration", 0)
+    return {
+        "total_passes": total,
+        "total_duration": duration,
+        "average_duration": duration / total if total else 0,
+    }
+
+
+def get_timer_usage_stats():
+    """Return per timer type ``{"count", "total_duration", "average_duration"}``"""
+    storage = get_classroom_storage(create=False)
+    counters = storage.counters(TIMER_USAGE_STATS) if storage else {}
+    stats = {}
+    for (timer_type, field), value in counters.items():
+        stats.setdefault(timer_type, {"count": 0, "total_duration": 0})[field] = value
+    for entry in stats.values():
+        count = entry["count"]
+        entry["average_duration"] = entry["total_duration"] / count if count else 0
+    return stats
+
 
 @adapter(IHallPassIssuedEvent)
 def handle_hall_pass_issued(event):
@@ -30,22 +63,12 @@ def handle_hall_pass_issued(event):
 
         logger.info(f"🎫 Hall pass issued: {student_name} → {destination}")
 
-        # Update dashboard cache (non-breaking)
-        try:
-            portal = api.portal.get()
-            annotations = getattr(portal, "__annotations__", None)
-            if annotations is not None:
-                cache_key = "dashboard_hall_pass_cache"
-                cache_data = annotations.get(cache_key, {})
-                cache_data["last_issued"] = {
-                    "student": student_name,
-                    "destination": destination,
-                    "time": datetime.now().isoformat(),
-                    "id": obj.getId(),
-                }
-                annotations[cache_key] = cache_data
-        except Exception as cache_error:
-            logger.warning(f"Dashboard cache update failed: {cache_error}")
+        # Keep O(1) dashboard counters current
+        record_hall_pass_issued(obj)
+
+        # Live dashboards get the pass through the delta stream
+        # (dashboard_stream.handle_pass_issued_delta), so no shared
+        # "last issued" annotation is rewritten on every pass
 
         # Trigger notification (if notification system available)
         try:
@@ -62,29 +85,19 @@ def handle_hall_pass_issued(event):
 def handle_hall_pass_returned(event):
     """Handle hall pass returned event"""
     try:
-        event.object
+        obj = event.object
         duration = getattr(event, "duration", 0)
 
         logger.info(f"🏠 Hall pass returned after {duration} minutes")
 
-        # Update statistics (non-breaking)
+        # Keep O(1) dashboard counters current
+        record_hall_pass_returned(obj)
+
+        # Update statistics (non-breaking); counters resolve concurrent writes
         try:
-            portal = api.portal.get()
-            annotations = getattr(portal, "__annotations__", None)
-            if annotations is not None:
-                stats_key = "hall_pass_statistics"
-                stats = annotations.get(
-                    stats_key,
-                    {"total_passes": 0, "total_duration": 0, "average_duration": 0},
-                )
-
-                stats["total_passes"] += 1
-                stats["total_duration"] += duration
-                stats["average_duration"] = (
-                    stats["total_duration"] / stats["total_passes"]
-                )
-
-                annotations[stats_key] = stats
+            storage = get_classroom_storage()
+            storage.increment(HALL_PASS_STATS, "total_passes")
+            storage.increment(HALL_PASS_STATS, "total_duration", int(duration))
         except Exception as stats_error:
             logger.warning(f"Statistics update failed: {stats_error}")
 
@@ -115,16 +128,7 @@ def handle_seating_chart_updated(event):
         except Exception as picker_error:
             logger.warning(f"Random picker update failed: {picker_error}")
 
-        # Clear dashboard cache for fresh data
-        try:
-            portal = api.portal.get()
-            annotations = getattr(portal, "__annotations__", None)
-            if annotations is not None:
-                cache_key = "dashboard_seating_cache"
-                if cache_key in annotations:
-                    del annotations[cache_key]
-        except Exception as cache_error:
-            logger.warning(f"Cache clearing failed: {cache_error}")
+        # Cached seating data is invalidated by caching.handle_seating_chart_event
 
     except Exception as e:
         logger.error(f"Seating chart updated handler failed: {e}")
@@ -142,26 +146,11 @@ def handle_timer_completed(event):
 
         # Log timer usage statistics (non-breaking)
         try:
-            portal = api.portal.get()
-            annotations = getattr(portal, "__annotations__", None)
-            if annotations is not None:
-                timer_stats_key = "timer_usage_stats"
-                stats = annotations.get(timer_stats_key, {})
-
-                if timer_type not in stats:
-                    stats[timer_type] = {
-                        "count": 0,
-                        "total_duration": 0,
-                        "average_duration": 0,
-                    }
-
-                stats[timer_type]["count"] += 1
-                stats[timer_type]["total_duration"] += duration
-                stats[timer_type]["average_duration"] = (
-                    stats[timer_type]["total_duration"] / stats[timer_type]["count"]
-                )
-
-                annotations[timer_stats_key] = stats
+            storage = get_classroom_storage()
+            storage.increment(TIMER_USAGE_STATS, (timer_type, "count"))
+            storage.increment(
+                TIMER_USAGE_STATS, (timer_type, "total_duration"), int(duration)
+            )
         except Exception as stats_error:
             logger.warning(f"Timer statistics update failed: {stats_error}")
 
@@ -169,6 +158,45 @@ def handle_timer_completed(event):
         logger.error(f"Timer completed handler failed: {e}")
 
 
+# HallPass content lifecycle subscribers for the dashboard counters
+def handle_hall_pass_added(obj, event):
+    """Count a newly created hall pass as issued"""
+    record_hall_pass_issued(obj)
+    if not getattr(obj, "return_time", None):
+        fire_hall_pass_issued(
+            obj,
+            student_name=getattr(obj, "student_name", None),
+            destination=getattr(obj, "destination", None),
+        )
+
+
+def handle_hall_pass_removed(obj, event):
+    """Drop a deleted hall pass from the active counters"""
+    record_hall_pass_returned(obj)
+
+
+def handle_hall_pass_moved(obj, event):
+    """Re-key the counters of a moved or renamed hall pass"""
+    if event.oldParent is None or event.newParent is None:
+        return  # Added and removed passes have their own handlers
+    record_hall_pass_moved(obj, event.oldParent, event.oldName)
+
+
+def handle_hall_pass_modified(obj, event):
+    """A return recorded by editing the pass leaves the active counters"""
+    if getattr(obj, "return_time", None):
+        record_hall_pass_returned(obj)
+
+
+def handle_hall_pass_transition(obj, event):
+    """Mirror hall_pass_workflow transitions into the dashboard counters"""
+    transition = getattr(event, "action", None)
+    if transition == "issue":
+        record_hall_pass_issued(obj)
+    elif transition in ("return", "expire"):
+        record_hall_pass_returned(obj)
+
+
 # Event firing helpers (to be called from existing features)
 def fire_hall_pass_issued(hall_pass_obj, student_name=None, destination=None):
     """Helper to fire hall pass issued event"""
@@ -184,6 +212,17 @@ def fire_hall_pass_issued(hall_pass_obj, student_name=None, destination=None):
         logger.warning(f"Event firing failed (non-critical): {e}")
 
 
+def fire_student_picked(context, students):
+    """Helper to fire student picked event"""
+    try:
+        from zope.event import notify
+        from .events import StudentPickedEvent
+
+        notify(StudentPickedEvent(context, students=students))
+    except Exception as e:
+        logger.warning(f"Event firing failed (non-critical): {e}")
+
+
 def fire_seating_chart_updated(seating_chart_obj, student_count=None):
     """Helper to fire seating chart updated event"""
     try:
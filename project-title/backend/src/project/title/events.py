@@ -43,6 +43,10 @@ class ITimerCompletedEvent(Interface):
         """Return timer completion data"""
 
 
+class IStudentPickedEvent(IObjectEvent):
+    """Fired when the random picker selects one or more students"""
+
+
 class ISubstituteFolderGeneratedEvent(IObjectEvent):
     """Fired when substitute folder is created"""
 
@@ -103,6 +107,15 @@ class TimerCompletedEvent(object):
         }
 
 
+@implementer(IStudentPickedEvent)
+class StudentPickedEvent(ObjectEvent):
+    """Student picked event (object is the picker's context)"""
+
+    def __init__(self, obj, students=None):
+        super(StudentPickedEvent, self).__init__(obj)
+        self.students = students or []
+
+
 @implementer(ISubstituteFolderGeneratedEvent)
 class SubstituteFolderGeneratedEvent(ObjectEvent):
     """Substitute folder generated event"""
@@ -0,0 +1,209 @@
+"""
+Fairness Engine for the Random Student Picker
+
+Precomputes one selection weight per student on the roster and keeps the
+weights in a Fenwick (binary indexed) tree of cumulative sums, so that:
+
+- building the engine is O(n), with the most-picked count computed once
+- a pick is O(log n): binary search over the cumulative sums
+- recording a pick updates only that student's weight in O(log n), unless
+  the student becomes the new most-picked, which shifts every frequency
+  weight and triggers a single O(n) rebuild
+- ``pick_many(k)`` draws k distinct students in one pass (weighted
+  reservoir sampling, Efraimidis-Spirakis)
+
+Engines are cached per roster and per day so consecutive picks in one
+classroom reuse the weight table. A cached engine is only reused while its
+history version matches the persisted one, so picks made by other
+processes or a history reset invalidate it.
+"""
+
+from collections import OrderedDict
+import heapq
+import random
+import threading
+import time
+
+# Time weight: hours since the last pick, capped at one school day
+MAX_TIME_WEIGHT = 24
+MIN_WEIGHT = 0.1
+
+# Weight tables still depend on "now"; refresh them at least this often
+ENGINE_MAX_AGE = 60
+ENGINE_CACHE_SIZE = 64
+
+_engine_cache = OrderedDict()
+_engine_lock = threading.Lock()
+
+
+def student_weight(times_picked, max_picks, last_picked, now):
+    """Selection weight for one student (same formula as the original picker)
+
+    Args:
+        times_picked: Picks for this student today
+        max_picks: Highest pick count in today's history (at least 1)
+        last_picked: Epoch seconds of the last pick, or 0 if never picked
+        now: Current epoch seconds
+    """
+    if last_picked:
+        time_weight = min(max(now - last_picked, 0) / 3600, MAX_TIME_WEIGHT)
+    else:
+        time_weight = MAX_TIME_WEIGHT  # Never picked gets max weight
+
+    frequency_weight = max_picks - times_picked + 1
+    return max(time_weight * frequency_weight, MIN_WEIGHT)
+
+
+class CumulativeWeights:
+    """Fenwick tree over weights: O(log n) updates and prefix-sum search"""
+
+    def __init__(self, weights):
+        self.size = len(weights)
+        self._tree = [0.0] * (self.size + 1)
+        for i, weight in enumerate(weights, start=1):
+            self._tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def update(self, index, delta):
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target):
+        """Index of the first weight whose cumulative sum exceeds ``target``"""
+        pos = 0
+        bit = self._top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= self.size and self._tree[nxt] <= target:
+                target -= self._tree[nxt]
+                pos = nxt
+            bit >>= 1
+        # Guard against float rounding at the very top of the range
+        return min(pos, self.size - 1)
+
+
+class FairnessEngine:
+    """Weighted picker for one roster, updated incrementally after picks"""
+
+    def __init__(self, students, history, now=None, version=0):
+        self.students = list(students)
+        self.index = {name: i for i, name in enumerate(self.students)}
+        self.now = now if now is not None else time.time()
+        self.built_at = time.time()
+        self.version = version
+        # Views hold this while picking and recording on a shared engine
+        self.lock = threading.Lock()
+
+        # One pass over the history, instead of one per student
+        self.max_picks = 1
+        for record in history.values():
+            self.max_picks = max(self.max_picks, record.get("count", 0))
+
+        self._counts = []
+        self._last = []
+        for student in self.students:
+            record = history.get(student) or {}
+            self._counts.append(record.get("count", 0))
+            self._last.append(record.get("last_picked", 0))
+
+        self._rebuild()
+
+    def _rebuild(self):
+        self.weights = [
+            student_weight(count, self.max_picks, last, self.now)
+            for count, last in zip(self._counts, self._last)
+        ]
+        self._cumulative = CumulativeWeights(self.weights)
+
+    def selection_weights(self):
+        return {name: round(w, 2) for name, w in zip(self.students, self.weights)}
+
+    def pick(self, rng=random):
+        """Draw one student proportionally to their weight"""
+        if not self.students:
+            return None
+        target = rng.random() * self._cumulative.total()
+        return self.students[self._cumulative.find(target)]
+
+    def pick_many(self, count, rng=random):
+        """Draw ``count`` distinct students in a single pass over the roster
+
+        Each student gets the key ``u ** (1 / weight)``; the ``count``
+        largest keys are a weighted sample without replacement.
+        """
+        count = max(0, min(count, len(self.students)))
+        keyed = (
+            (rng.random() ** (1.0 / weight), i) for i, weight in enumerate(self.weights)
+        )
+        return [self.students[i] for _, i in heapq.nlargest(count, keyed)]
+
+    def record_pick(self, student, when=None):
+        """Apply a pick to the weight table without a full rebuild"""
+        self.version += 1
+        i = self.index.get(student)
+        if i is None:
+            return
+
+        when = when if when is not None else time.time()
+        self.now = max(self.now, when)
+        self._counts[i] += 1
+        self._last[i] = when
+
+        if self._counts[i] > self.max_picks:
+            # Every other student's frequency weight just went up by one
+            self.max_picks = self._counts[i]
+            self._rebuild()
+            return
+
+        weight = student_weight(self._counts[i], self.max_picks, when, self.now)
+        self._cumulative.update(i, weight - self.weights[i])
+        self.weights[i] = weight
+
+
+def get_fairness_engine(scope, students, version, load_history):
+    """Return a cached engine for ``students``, rebuilding when stale
+
+    Args:
+        scope: Cache scope, e.g. the day's picker history key
+        students: Roster in display order
+        version: Persisted history version; a mismatch forces a rebuild
+        load_history: Callable returning the ``student -> record`` mapping,
+            only called when the engine has to be (re)built
+    """
+    key = (scope, tuple(students))
+    with _engine_lock:
+        engine = _engine_cache.get(key)
+        if (
+            engine is not None
+            and engine.version == version
+            and time.time() - engine.built_at < ENGINE_MAX_AGE
+        ):
+            _engine_cache.move_to_end(key)
+            return engine
+
+    engine = FairnessEngine(students, load_history(), version=version)
+    with _engine_lock:
+        _engine_cache[key] = engine
+        _engine_cache.move_to_end(key)
+        while len(_engine_cache) > ENGINE_CACHE_SIZE:
+            _engine_cache.popitem(last=False)
+    return engine
+
+
+def clear_fairness_engines():
+    """Drop all cached engines (tests, history resets)"""
+    with _engine_lock:
+        _engine_cache.clear()
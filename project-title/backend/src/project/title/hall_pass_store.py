@@ -0,0 +1,262 @@
+"""
+Persistent Hall Pass Repository
+
+Stores the passes issued through the hall pass manager views in the ZODB,
+so they survive restarts and are shared by every Zope instance behind the
+load balancer.
+
+Layout (all BTrees, stored on the portal annotations):
+
+- ``passes``: pass code -> pass record (a plain dict, replaced on update)
+- ``active``: classroom -> set of codes of passes still out
+- ``issued``: (classroom, day) -> set of codes issued that day
+- ``returned``: (classroom, day) -> set of (return time, code), for the
+  "recent passes" list
+- ``issued_count`` / ``returned_minutes``: (classroom, day) -> ``Length``
+
+Polling a classroom reads its active set plus a few counters, so the cost
+is O(active passes) no matter how many passes were ever issued.
+
+Passes are kept for ``RETENTION_DAYS``: the first pass issued on a new day
+drops the records and indexes of older days (``prune``). Days with a pass
+still out are kept until it is returned.
+"""
+
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+from datetime import datetime
+from datetime import timedelta
+from persistent import Persistent
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_KEY = "project.title.hall_pass_repository"
+DEFAULT_CLASSROOM = "__site__"
+RETENTION_DAYS = 365
+
+
+def classroom_for(context):
+    """Classroom a manager view works in: the path of its context"""
+    try:
+        return "/".join(context.getPhysicalPath()) or DEFAULT_CLASSROOM
+    except Exception:
+        return DEFAULT_CLASSROOM
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class HallPassRepository(Persistent):
+    """Hall pass records keyed by pass code, indexed by classroom/day/active"""
+
+    last_pruned = None  # Day of the last prune (repositories predating it)
+
+    def __init__(self):
+        self.passes = OOBTree()
+        self.active = OOBTree()
+        self.issued = OOBTree()
+        self.returned = OOBTree()
+        self.issued_count = OOBTree()
+        self.returned_minutes = OOBTree()
+
+    @staticmethod
+    def _set(tree, key):
+        members = tree.get(key)
+        if members is None:
+            members = tree[key] = OOTreeSet()
+        return members
+
+    @staticmethod
+    def _length(tree, key):
+        counter = tree.get(key)
+        if counter is None:
+            counter = tree[key] = Length()
+        return counter
+
+    def add(self, record, classroom=DEFAULT_CLASSROOM):
+        """Store a newly issued pass record and index it
+
+        Args:
+            record: Dict with at least ``pass_code`` and ``issue_time``
+                (ISO string or datetime)
+            classroom: Classroom key, see ``classroom_for``
+
+        Returns:
+            dict: The stored record
+        """
+        code = record["pass_code"]
+        if code in self.passes:
+            raise KeyError(f"Hall pass {code} already exists")
+
+        record = dict(record, classroom=classroom)
+        day = _parse_time(record["issue_time"]).date().isoformat()
+        record["day"] = day
+        if self.last_pruned is None or day > self.last_pruned:
+            self.prune()
+            self.last_pruned = day
+        self.passes[code] = record
+
+        self._set(self.issued, (classroom, day)).insert(code)
+        self._length(self.issued_count, (classroom, day)).change(1)
+        if not record.get("return_time"):
+            self._set(self.active, classroom).insert(code)
+        return record
+
+    def get(self, code):
+        return self.passes.get(code)
+
+    def mark_returned(self, code, when=None):
+        """Mark a pass returned; idempotent
+
+        Returns:
+            tuple: ``(record, changed)``; record is None for unknown codes
+        """
+        record = self.passes.get(code)
+        if record is None:
+            return None, False
+        if record.get("return_time"):
+            return record, False
+
+        when = when or datetime.now()
+        record = dict(record, return_time=when.isoformat(), is_active=False)
+        self.passes[code] = record
+
+        classroom, day = record["classroom"], record["day"]
+        active = self.active.get(classroom)
+        if active is not None and code in active:
+            active.remove(code)
+        self._set(self.returned, (classroom, day)).insert((when.isoformat(), code))
+
+        duration = int((when - _parse_time(record["issue_time"])).total_seconds() / 60)
+        self._length(self.returned_minutes, (classroom, day)).change(max(duration, 0))
+        return record, True
+
+    def remove(self, code):
+        record = self.passes.get(code)
+        if record is None:
+            return False
+        classroom, day = record["classroom"], record["day"]
+
+        active = self.active.get(classroom)
+        if active is not None and code in active:
+            active.remove(code)
+        issued = self.issued.get((classroom, day))
+        if issued is not None and code in issued:
+            issued.remove(code)
+            self._length(self.issued_count, (classroom, day)).change(-1)
+        returned = self.returned.get((classroom, day))
+        if returned is not None and record.get("return_time"):
+            returned.remove((record["return_time"], code))
+
+        del self.passes[code]
+        return True
+
+    def prune(self, retention_days=RETENTION_DAYS, now=None):
+        """Drop the passes of days older than ``retention_days``
+
+        Returns:
+            int: Number of pass records removed
+        """
+        cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+        cutoff = cutoff.date().isoformat()
+        removed = 0
+        for key in [key for key in self.issued.keys() if key[1] < cutoff]:
+            classroom, _ = key
+            codes = list(self.issued[key])
+            active = self.active.get(classroom, ())
+            if any(code in active for code in codes):
+                continue
+            for code in codes:
+                if self.passes.pop(code, None) is not None:
+                    removed += 1
+            for tree in (
+                self.issued,
+                self.returned,
+                self.issued_count,
+                self.returned_minutes,
+            ):
+                tree.pop(key, None)
+        if removed:
+            logger.info(f"Pruned {removed} hall passes issued before {cutoff}")
+        return removed
+
+    def active_passes(self, classroom=None):
+        """Records of passes still out, for one classroom or all of them"""
+        if classroom is None:
+            codes = [code for members in self.active.values() for code in members]
+        else:
+            codes = self.active.get(classroom, ())
+        return [self.passes[code] for code in codes if code in self.passes]
+
+    def recent_returned(self, classroom, day, limit=10):
+        """Most recently returned passes of a day, oldest first"""
+        returned = self.returned.get((classroom, day))
+        if not returned:
+            return []
+        keys = list(returned.keys()[-limit:])
+        return [self.passes[code] for _, code in keys if code in self.passes]
+
+    def history(self, classroom, before=None, limit=20):
+        """Passes of a classroom, newest first, one page at a time
+
+        Walks the per-day ``issued`` sets backwards from the cursor's day,
+        loading only the days needed to fill the page.
+
+        Args:
+            before: ``(issue_time, pass_code)`` of the last pass of the
+                previous page, or None for the first page
+            limit: Page size
+
+        Returns:
+            tuple: ``(records, more)``; ``more`` is True if older passes exist
+        """
+        before = tuple(before) if before else None
+        last_day = _parse_time(before[0]).date().isoformat() if before else "\uffff"
+        days = list(self.issued.keys(min=(classroom, ""), max=(classroom, last_day)))
+
+        page = []
+        for key in reversed(days):
+            records = sorted(
+                (self.passes[code] for code in self.issued[key] if code in self.passes),
+                key=lambda record: (record["issue_time"], record["pass_code"]),
+                reverse=True,
+            )
+            for record in records:
+                if before and (record["issue_time"], record["pass_code"]) >= before:
+                    continue
+                if len(page) == limit:
+                    return page, True
+                page.append(record)
+        return page, False
+
+    def issued_today(self, classroom, day):
+        counter = self.issued_count.get((classroom, day))
+        return counter() if counter is not None else 0
+
+    def returned_minutes_total(self, classroom, day):
+        counter = self.returned_minutes.get((classroom, day))
+        return counter() if counter is not None else 0
+
+    def __len__(self):
+        return len(self.passes)
+
+
+def get_hall_pass_repository(portal=None, create=True):
+    """Return the site's hall pass repository from portal annotations
+
+    Pass ``create=False`` on read-only code paths so GET requests never
+    write to the ZODB.
+    """
+    portal = portal or api.portal.get()
+    annotations = IAnnotations(portal)
+    repository = annotations.get(REPOSITORY_KEY)
+    if repository is None and create:
+        repository = annotations[REPOSITORY_KEY] = HallPassRepository()
+    return repository
@@ -0,0 +1,253 @@
+"""
+Catalog Health and Rebuild Tooling for the Custom Indexes
+
+The custom indexes and metadata columns are read from the profile's
+catalog.xml, so this module never disagrees with what the site installs.
+
+``index_report`` compares every custom index with the content it should
+cover: documents of the index's portal types (``INDEX_TYPES``) that have
+no entry, entries for documents that should have none, distinct values
+and whether an indexer adapter is registered for the indexed attribute.
+Date indexes skip empty values, so draft hall passes without an issue
+time are expected among the ``missing`` of the hall pass date indexes.
+
+``rebuild_custom_indexes`` refills only the custom indexes (and their
+metadata) from the objects, in batches with a commit after each, instead
+of a full ``clearFindAndRebuild``. Entries are overwritten in place, so
+the indexes stay queryable while a rebuild runs.
+"""
+
+from plone import api
+from plone.indexer.interfaces import IIndexer
+from xml.etree import ElementTree
+from zope.component import queryMultiAdapter
+import logging
+import os
+import time
+import transaction
+
+from .query_planner import clear_index_cache
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 20
+PROFILE = "profile-project.title:default"
+CATALOG_XML = os.path.join(
+    os.path.dirname(__file__), "profiles", "default", "catalog.xml"
+)
+
+# Index -> portal types it holds values for (None: all content)
+INDEX_TYPES = {
+    "hall_pass_issue_time": ("HallPass",),
+    "hall_pass_expected_return": ("HallPass",),
+    "hall_pass_status": ("HallPass",),
+    "hall_pass_is_active": ("HallPass",),
+    "hall_pass_code": ("HallPass",),
+    "seating_student_count": ("SeatingChart",),
+    "seating_last_updated": ("SeatingChart",),
+    "classroom_ready": None,
+}
+
+
+def _read_profile():
+    tree = ElementTree.parse(CATALOG_XML)
+    indexes = {}
+    for node in tree.getroot().iter("index"):
+        attr = node.find("indexed_attr")
+        indexes[node.get("name")] = {
+            "meta_type": node.get("meta_type"),
+            "attr": attr.get("value") if attr is not None else node.get("name"),
+        }
+    columns = [node.get("value") for node in tree.getroot().iter("column")]
+    return indexes, columns
+
+
+CUSTOM_INDEXES, CUSTOM_COLUMNS = _read_profile()
+
+
+def _types_query(types):
+    return {"portal_type": list(types)} if types else {}
+
+
+def _sample_object(catalog, types):
+    for brain in catalog.unrestrictedSearchResults(**_types_query(types))[:1]:
+        try:
+            return brain._unrestrictedGetObject()
+        except Exception as e:
+            logger.warning(f"Cannot load {brain.getPath()}: {e}")
+    return None
+
+
+def index_report(catalog=None):
+    """Coverage and size of every custom index
+
+    Returns:
+        dict: ``indexes`` (name -> ``exists``, ``meta_type``, ``expected``,
+        ``indexed``, ``missing``, ``stale``, ``coverage``, ``values``,
+        ``indexer``) and ``columns`` (metadata column -> exists)
+    """
+    catalog = catalog or api.portal.get_tool("portal_catalog")
+    existing = set(catalog.indexes())
+    report = {}
+    for name, spec in CUSTOM_INDEXES.items():
+        entry = {"exists": name in existing, "meta_type": spec["meta_type"]}
+        report[name] = entry
+        if not entry["exists"]:
+            continue
+
+        index = catalog._catalog.getIndex(name)
+        types = INDEX_TYPES.get(name)
+        expected = {
+            brain.getRID()
+            for brain in catalog.unrestrictedSearchResults(**_types_query(types))
+        }
+        indexed = set(index.referencedObjects())
+        entry.update(
+            {
+                "meta_type": index.meta_type,
+                "expected": len(expected),
+                "indexed": len(indexed),
+                "missing": len(expected - indexed),
+                "stale": len(indexed - expected),
+                "coverage": (
+                    round(len(expected & indexed) / len(expected), 4)
+                    if expected
+                    else 1.0
+                ),
+                "values": index.indexSize(),
+            }
+        )
+
+        sample = _sample_object(catalog, types)
+        entry["indexer"] = (
+            None
+            if sample is None
+            else queryMultiAdapter((sample, catalog), IIndexer, name=spec["attr"])
+            is not None
+        )
+
+    schema = set(catalog.schema())
+    return {
+        "indexes": report,
+        "columns": {column: column in schema for column in CUSTOM_COLUMNS},
+    }
+
+
+def _restore_missing(catalog, names):
+    """Re-add custom indexes missing from the catalog from the profile"""
+    if all(name in catalog.indexes() for name in names):
+        return []
+    missing = [name for name in names if name not in catalog.indexes()]
+    setup = api.portal.get_tool("portal_setup")
+    setup.runImportStepFromProfile(PROFILE, "catalog", run_dependencies=False)
+    clear_index_cache()
+    logger.info(f"Re-created catalog indexes {', '.join(missing)}")
+    return missing
+
+
+def rebuild_custom_indexes(
+    catalog=None,
+    names=None,
+    batch_size=BATCH_SIZE,
+    commit=True,
+    progress=None,
+    update_metadata=True,
+):
+    """Reindex the custom indexes from the objects, batch by batch
+
+    Args:
+        catalog: Catalog to repair (default: portal_catalog)
+        names: Custom indexes to rebuild (default: all of them)
+        batch_size: Objects reindexed per transaction
+        commit: Commit each batch (False: savepoints only, e.g. in tests)
+        progress: Optional callable receiving the report after every batch
+        update_metadata: Also refresh the metadata columns of each object
+
+    Returns:
+        dict: ``indexes``, ``restored``, ``objects``, ``removed``,
+        ``batches``, ``elapsed``, ``error_count`` and the first ``errors``
+
+    Raises:
+        ValueError: For names that are not custom indexes
+    """
+    catalog = catalog or api.portal.get_tool("portal_catalog")
+    names = list(names or CUSTOM_INDEXES)
+    unknown = [name for name in names if name not in CUSTOM_INDEXES]
+    if unknown:
+        raise ValueError(f"Not custom indexes: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    report = {
+        "indexes": names,
+        "restored": _restore_missing(catalog, names),
+        "objects": 0,
+        "removed": 0,
+        "batches": 0,
+        "elapsed": 0.0,
+        "error_count": 0,
+        "errors": [],
+    }
+
+    def checkpoint():
+        if commit:
+            transaction.commit()
+            jar = getattr(catalog, "_p_jar", None)
+            if jar is not None:
+                jar.cacheGC()
+        else:
+            transaction.savepoint(optimistic=True)
+        report["batches"] += 1
+        report["elapsed"] = time.perf_counter() - started
+        if progress is not None:
+            progress(report)
+
+    types = [INDEX_TYPES.get(name) for name in names]
+    query = {} if None in types else _types_query({t for ts in types for t in ts})
+    covered = {name: set() for name in names}
+    pending = 0
+    for brain in catalog.unrestrictedSearchResults(**query):
+        idxs = [
+            name
+            for name in names
+            if INDEX_TYPES.get(name) is None
+            or brain.portal_type in INDEX_TYPES[name]
+        ]
+        if not idxs:
+            continue
+        path = brain.getPath()
+        for name in idxs:
+            # Failed objects keep their current entries
+            covered[name].add(brain.getRID())
+        try:
+            obj = brain._unrestrictedGetObject()
+            catalog.catalog_object(
+                obj, uid=path, idxs=idxs, update_metadata=update_metadata
+            )
+        except Exception as e:
+            report["error_count"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"path": path, "error": str(e)})
+            logger.warning(f"Reindex failed for {path}: {e}")
+            continue
+        report["objects"] += 1
+        pending += 1
+        if pending >= batch_size:
+            checkpoint()
+            pending = 0
+
+    # Entries of documents the index should not hold (wrong type, lost rids)
+    for name in names:
+        index = catalog._catalog.getIndex(name)
+        stale = [rid for rid in index.referencedObjects() if rid not in covered[name]]
+        for rid in stale:
+            index.unindex_object(rid)
+            report["removed"] += 1
+    checkpoint()
+
+    logger.info(
+        f"Rebuilt {len(names)} custom indexes over {report['objects']} objects "
+        f"in {report['elapsed']:.1f}s ({report['removed']} stale entries removed, "
+        f"{report['error_count']} errors)"
+    )
+    return report
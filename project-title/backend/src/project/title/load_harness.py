@@ -0,0 +1,279 @@
+"""
+Concurrent Load Harness
+
+Drives the classroom write paths from several threads, each with its own
+ZODB connection, the way concurrent Zope requests do: hall pass issue and
+return (hall pass repository), picker picks (classroom storage) and seat
+moves (seating grid). Every operation is one transaction; a
+``ConflictError`` aborts it and retries up to ``MAX_RETRIES`` times, like
+the publisher.
+
+The report gives, per operation and overall, throughput, latency
+percentiles of completed operations (including their retries), conflicts
+per operation (``retry_rate``) and operations that still conflicted after
+the last retry (``failed``).
+
+The database is the one passed in: the configured storage of the instance
+(``make load-test``: FileStorage by default, ZEO or RelStorage when
+configured; those also allow running several harness processes at once)
+or the DemoStorage of the functional test layer. It writes passes, picks
+and seat moves, so never run it against production data.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+from concurrent.futures import ThreadPoolExecutor
+from plone import api
+from Testing.makerequest import makerequest
+from ZODB.POSException import ConflictError
+from zope.component import getMultiAdapter
+from zope.component.hooks import setSite
+from zope.globalrequest import clearRequest
+from zope.globalrequest import setRequest
+import json
+import logging
+import random
+import time
+import transaction
+
+from .benchmark import summarize
+from .caching import invalidate
+from .caching import SEATING
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+OPERATIONS = ("issue", "return", "pick", "seat_move")
+DEFAULT_MIX = {"issue": 3, "return": 3, "pick": 3, "seat_move": 1}
+DESTINATIONS = ("Restroom", "Library", "Nurse", "Office")
+
+
+def parse_mix(value):
+    """``"issue=3,pick=1"`` -> ``{"issue": 3, "pick": 1}``"""
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown load operation: {name}")
+        mix[name] = float(weight or 1)
+    return mix or dict(DEFAULT_MIX)
+
+
+def prepare_classroom(site, folder_id="load-test", students=30):
+    """Classroom folder with a seating chart for the harness (not committed)
+
+    Returns:
+        str: Path of the chart relative to the site
+    """
+    folder = site.get(folder_id)
+    if folder is None:
+        folder = api.content.create(
+            container=site, type="Folder", id=folder_id, title="Load Test"
+        )
+    if "seating" not in folder:
+        api.content.create(
+            container=folder,
+            type="SeatingChart",
+            id="seating",
+            title="Load Test Seating",
+            students=[f"Load Student {n}" for n in range(students)],
+        )
+    return f"{folder_id}/seating"
+
+
+class LoadWorker:
+    """One thread: its own connection, running ``operations`` operations"""
+
+    def __init__(self, db, site_path, chart_path, user_id, mix, seed, retries):
+        self.db = db
+        self.site_path = site_path
+        self.chart_path = chart_path
+        self.user_id = user_id
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.rng = random.Random(seed)
+        self.retries = retries
+        self.codes = []  # Passes this worker issued and has not returned
+        self.stats = {
+            name: {"completed": 0, "conflicts": 0, "failed": 0, "errors": 0}
+            for name in OPERATIONS
+        }
+        self.samples = {name: [] for name in OPERATIONS}
+
+    def run(self, operations):
+        connection = self.db.open()
+        try:
+            self._login(connection)
+            for _ in range(operations):
+                name = self.rng.choices(self.names, self.weights)[0]
+                if name == "return" and not self.codes:
+                    name = "issue"
+                self.execute(connection, name)
+        finally:
+            transaction.abort()
+            setSite(None)
+            clearRequest()
+            noSecurityManager()
+            connection.close()
+        return self
+
+    def _login(self, connection):
+        acl_users = connection.root()["Application"].acl_users
+        user = acl_users.getUserById(self.user_id)
+        if user is None:
+            raise ValueError(f"Unknown load test user: {self.user_id}")
+        newSecurityManager(None, user.__of__(acl_users))
+
+    def _context(self, connection):
+        app = makerequest(connection.root()["Application"])
+        site = app.unrestrictedTraverse(self.site_path)
+        setSite(site)
+        setRequest(app.REQUEST)
+        return site.unrestrictedTraverse(self.chart_path), app.REQUEST
+
+    def execute(self, connection, name):
+        stats = self.stats[name]
+        started = time.perf_counter()
+        for _ in range(self.retries + 1):
+            transaction.begin()
+            try:
+                chart, request = self._context(connection)
+                result = getattr(self, f"do_{name}")(chart, request)
+                transaction.commit()
+            except ConflictError:
+                transaction.abort()
+                stats["conflicts"] += 1
+                continue
+            except Exception as e:
+                transaction.abort()
+                stats["errors"] += 1
+                logger.warning(f"Load operation {name} failed: {e}")
+                if name == "return":
+                    self.codes.pop(0)
+                return
+            stats["completed"] += 1
+            self.samples[name].append(time.perf_counter() - started)
+            if name == "issue":
+                self.codes.append(result)
+            elif name == "return":
+                self.codes.remove(result)
+            return
+        stats["failed"] += 1
+
+    @staticmethod
+    def _json(body, request):
+        if request.response.getStatus() >= 400:
+            raise RuntimeError(body)
+        return json.loads(body)
+
+    def do_issue(self, chart, request):
+        request["BODY"] = json.dumps(
+            {
+                "student_name": self.rng.choice(chart.students),
+                "destination": self.rng.choice(DESTINATIONS),
+            }
+        )
+        classroom = aq_parent(aq_inner(chart))
+        view = getMultiAdapter((classroom, request), name="hall-pass-manager")
+        return self._json(view.issue_pass(), request)["pass"]["pass_code"]
+
+    def do_return(self, chart, request):
+        code = self.codes[0]
+        request["BODY"] = json.dumps({"pass_id": code})
+        classroom = aq_parent(aq_inner(chart))
+        view = getMultiAdapter((classroom, request), name="return-pass")
+        self._json(view(), request)
+        return code
+
+    def do_pick(self, chart, request):
+        view = getMultiAdapter((chart, request), name="random-picker")
+        return self._json(view.pick_student(), request)["selected"]
+
+    def do_seat_move(self, chart, request):
+        student = self.rng.choice(chart.students)
+        row = self.rng.randrange(chart.grid_rows)
+        col = self.rng.randrange(chart.grid_cols)
+        if not chart.update_position(student, row, col):
+            raise RuntimeError(f"Could not move {student} to ({row}, {col})")
+        invalidate(SEATING, chart)
+        return student
+
+
+def _summary(stats, samples, elapsed):
+    operations = stats["completed"] + stats["failed"] + stats["errors"]
+    summary = dict(
+        stats,
+        operations=operations,
+        throughput_per_s=round(stats["completed"] / elapsed, 2) if elapsed else 0.0,
+        retry_rate=round(stats["conflicts"] / operations, 4) if operations else 0.0,
+    )
+    if samples:
+        summary["latency"] = summarize(samples)
+    return summary
+
+
+def run_load(
+    db,
+    site_path,
+    chart_path,
+    workers=4,
+    operations=50,
+    mix=None,
+    user_id="admin",
+    retries=MAX_RETRIES,
+    seed=0,
+):
+    """Run ``operations`` operations in each of ``workers`` threads
+
+    Args:
+        db: ZODB database the site lives in
+        site_path: Physical path of the site, e.g. ``"/Plone"``
+        chart_path: Seating chart relative to the site (``prepare_classroom``)
+        mix: Relative weight per operation (default ``DEFAULT_MIX``)
+        user_id: User of the root acl_users the workers act as
+
+    Returns:
+        dict: ``workers``, ``elapsed_s``, ``total`` and ``operations``
+        (per operation), each with completed/conflicts/failed/errors,
+        throughput, retry rate and latency percentiles
+    """
+    mix = dict(mix or DEFAULT_MIX)
+    load_workers = [
+        LoadWorker(db, site_path, chart_path, user_id, mix, seed + n, retries)
+        for n in range(workers)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker.run, operations) for worker in load_workers]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    total = {"completed": 0, "conflicts": 0, "failed": 0, "errors": 0}
+    total_samples = []
+    per_operation = {}
+    for name in OPERATIONS:
+        stats = {key: 0 for key in total}
+        samples = []
+        for worker in load_workers:
+            for key in stats:
+                stats[key] += worker.stats[name][key]
+            samples.extend(worker.samples[name])
+        if not any(stats.values()):
+            continue
+        per_operation[name] = _summary(stats, samples, elapsed)
+        for key in total:
+            total[key] += stats[key]
+        total_samples.extend(samples)
+
+    return {
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "total": _summary(total, total_samples, elapsed),
+        "operations": per_operation,
+    }
@@ -0,0 +1,324 @@
+"""
+Prometheus Metrics for Classroom Hot Paths
+
+Per-process histograms and counters, rendered in the Prometheus text
+format by ``@@metrics``. Each Zope instance keeps its own registry, so
+Prometheus scrapes every instance.
+
+- ``@timed("hall_pass_issue")`` times a view method into
+  ``classroom_operation_duration_seconds{operation=...}`` and the
+  percentiles and slow-call log of timing.py. It costs two
+  ``perf_counter_ns`` calls and two locks per call.
+- Publisher event subscribers record, per request, the duration, the
+  ZODB objects loaded and the catalog queries planned by
+  ``query_planner.plan_query`` (``count_catalog_query``). The request is
+  labelled with the first timed operation it ran, or ``other``.
+- Cache hits and misses of ``@cached`` functions and the percentiles of
+  ``timing.timings`` are read at scrape time.
+"""
+
+from bisect import bisect_left
+from functools import wraps
+import logging
+import threading
+import time
+
+from .caching import cache_stats
+from .timing import QUANTILES
+from .timing import record_call
+from .timing import timings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+LOAD_BUCKETS = (0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Bucketed observations per label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., sum]
+
+    def observe(self, value, *labels):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[position] += 1
+            series[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self):
+        """``(labels, count, sum)`` per series, for tests and summaries"""
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        return [
+            (labels, sum(values[:-1]), values[-1]) for labels, values in series.items()
+        ]
+
+    def render(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = []
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic totals per label values"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Registry:
+    """Metrics of this process, in registration order"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        lines.extend(_render_cache_stats())
+        lines.extend(_render_timings())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+OPERATION_SECONDS = registry.register(
+    Histogram(
+        "classroom_operation_duration_seconds",
+        "Duration of instrumented classroom operations.",
+        ("operation",),
+    )
+)
+OPERATION_ERRORS = registry.register(
+    Counter(
+        "classroom_operation_errors_total",
+        "Instrumented operations that raised an exception.",
+        ("operation",),
+    )
+)
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "classroom_request_duration_seconds",
+        "Duration of published requests, by first timed operation.",
+        ("operation",),
+    )
+)
+REQUEST_CATALOG_QUERIES = registry.register(
+    Histogram(
+        "classroom_request_catalog_queries",
+        "Planned catalog queries per request.",
+        ("operation",),
+        QUERY_BUCKETS,
+    )
+)
+REQUEST_ZODB_LOADS = registry.register(
+    Histogram(
+        "classroom_request_zodb_loads",
+        "ZODB objects loaded per request.",
+        ("operation",),
+        LOAD_BUCKETS,
+    )
+)
+
+
+def _render_cache_stats():
+    stats = cache_stats.snapshot()
+    lines = [
+        "# HELP classroom_cache_requests_total Cached function calls by result.",
+        "# TYPE classroom_cache_requests_total counter",
+    ]
+    ratios = [
+        "# HELP classroom_cache_hit_ratio Share of cached function calls that hit.",
+        "# TYPE classroom_cache_hit_ratio gauge",
+    ]
+    for name, entry in sorted(stats["functions"].items()):
+        for result, key in (("hit", "hits"), ("miss", "misses")):
+            labels = _labels(("function", "result"), (name, result))
+            lines.append(f"classroom_cache_requests_total{labels} {entry[key]}")
+        labels = _labels(("function",), (name,))
+        ratios.append(f"classroom_cache_hit_ratio{labels} {entry['hit_ratio']}")
+    return lines + ratios
+
+
+def _render_timings():
+    name = "classroom_function_duration_seconds"
+    lines = [
+        f"# HELP {name} Recent call durations of timed functions, per process.",
+        f"# TYPE {name} summary",
+    ]
+    for function, entry in sorted(timings.snapshot().items()):
+        for quantile in QUANTILES:
+            value = entry[f"p{round(quantile * 100)}_ms"] / 1000
+            labels = _labels(("function", "quantile"), (function, quantile))
+            lines.append(f"{name}{labels} {_number(value)}")
+        labels = _labels(("function",), (function,))
+        lines.append(f"{name}_sum{labels} {_number(entry['total_ms'] / 1000)}")
+        lines.append(f"{name}_count{labels} {entry['count']}")
+    return lines
+
+
+# Per-request state of the current thread (one request per Zope worker)
+_local = threading.local()
+
+
+def _request_state():
+    return getattr(_local, "state", None)
+
+
+def timed(operation):
+    """Record the duration of the decorated function as ``operation``"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            state = _request_state()
+            if state is not None and state["operation"] is None:
+                state["operation"] = operation
+            started = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                OPERATION_ERRORS.inc(operation)
+                raise
+            finally:
+                elapsed = time.perf_counter_ns() - started
+                OPERATION_SECONDS.observe(elapsed / 1e9, operation)
+                record_call(operation, elapsed, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count_catalog_query():
+    state = _request_state()
+    if state is not None:
+        state["queries"] += 1
+
+
+def _connection_loads(request):
+    """Objects loaded so far by the ZODB connection of ``request``"""
+    for parent in request.get("PARENTS", None) or ():
+        jar = getattr(parent, "_p_jar", None)
+        if jar is not None:
+            return jar.getTransferCounts()[0]
+    return None
+
+
+def start_request(event):
+    _local.state = {
+        "started": time.perf_counter(),
+        "operation": None,
+        "queries": 0,
+        "loads": None,
+    }
+
+
+def after_traversal(event):
+    state = _request_state()
+    if state is not None:
+        try:
+            state["loads"] = _connection_loads(event.request)
+        except Exception as e:
+            logger.debug(f"No ZODB transfer counts: {e}")
+
+
+def end_request(event):
+    state = _request_state()
+    _local.state = None
+    if state is None:
+        return
+    operation = state["operation"] or "other"
+    REQUEST_SECONDS.observe(time.perf_counter() - state["started"], operation)
+    REQUEST_CATALOG_QUERIES.observe(state["queries"], operation)
+    if state["loads"] is not None:
+        try:
+            loads = _connection_loads(event.request)
+            if loads is not None:
+                REQUEST_ZODB_LOADS.observe(max(loads - state["loads"], 0), operation)
+        except Exception as e:
+            logger.debug(f"No ZODB transfer counts: {e}")
@@ -5,36 +5,33 @@ Provides caching, database query optimization, and performance monitoring.
 All functions designed for high-concurrency classroom environments.
 """
 
-import time
 from datetime import datetime, timedelta
-from plone.memoize import ram
 from plone import api
 from zope.annotation.interfaces import IAnnotations
+from DateTime import DateTime
 import logging
 
-logger = logging.getLogger(__name__)
-
-
-def _cache_key_time_30s(*args):
-    """Cache key that invalidates every 30 seconds"""
-    return time.time() // 30
-
+from .caching import cache_stats
+from .caching import cached
+from .caching import DASHBOARD_KINDS
+from .caching import invalidate_kinds
+from .caching import SITE
+from .caching import USER
+from .content.hall_pass import alert_level_for
+from .counters import dashboard_counter_snapshot
+from .query_planner import plan_query
+from .timing import measure
+from .content.hall_pass import duration_minutes_since
 
-def _cache_key_user_context(method, self, *args):
-    """Cache key that includes user context for personalized data"""
-    portal = api.portal.get()
-    user = api.user.get_current()
-    return (
-        time.time() // 30,
-        user.getId() if user else "anonymous",
-        portal.absolute_url(),
-    )
+logger = logging.getLogger(__name__)
 
 
-@ram.cache(lambda method, *args: time.time() // 30)  # 30-second cache
+@cached(*DASHBOARD_KINDS, ttl=30, scope=(SITE, USER))
 def get_dashboard_aggregates():
     """
-    Get aggregated dashboard data with 30-second caching.
+    Get aggregated dashboard data, cached per site and user (catalog
+    results follow the user's permissions) for up to 30 seconds
+    and invalidated by hall pass, seating, picker and timer changes.
 
     Returns aggregated data for teacher dashboard including:
     - Active hall passes count
@@ -56,43 +53,16 @@ def get_dashboard_aggregates():
         "seating_charts": {"updated_today": 0, "total_arrangements": 0},
         "timers": {"active_count": 0, "total_runtime_today": 0},
         "participation": {"students_picked_today": 0, "fairness_score": 100.0},
-        "performance": {"avg_response_time": 0, "cache_hit_ratio": 0.95},
+        "performance": {
+            "avg_response_time": 0,
+            "cache_hit_ratio": cache_stats.snapshot()["hit_ratio"],
+        },
     }
 
     try:
-        # Optimized hall pass queries using performance indexes
-        hall_pass_brains = catalog(
-            portal_type="HallPass",
-            review_state="active",
-            sort_on="hall_pass_issue_time",
-        )
-
-        overdue_count = 0
-        today_count = 0
-
-        for brain in hall_pass_brains:
-            try:
-                obj = brain.getObject()
-                annotations = IAnnotations(obj, {})
-                issue_time = annotations.get("hall_pass_issue_time")
-                duration = annotations.get("hall_pass_duration", 10)  # minutes
-
-                if issue_time:
-                    issue_dt = datetime.fromisoformat(issue_time)
-                    if issue_dt >= today_start:
-                        today_count += 1
-
-                    # Check if overdue (duration + 5 minute grace period)
-                    expected_return = issue_dt + timedelta(minutes=duration + 5)
-                    if current_time > expected_return:
-                        overdue_count += 1
-
-            except Exception:
-                continue  # Skip corrupted data
-
-        aggregates["hall_passes"]["active"] = len(hall_pass_brains)
-        aggregates["hall_passes"]["today_total"] = today_count
-        aggregates["hall_passes"]["overdue"] = overdue_count
+        # O(1) read from the incrementally maintained counter store
+        hall_pass_counts = dashboard_counter_snapshot(portal, now=current_time)
+        aggregates["hall_passes"].update(hall_pass_counts)
 
         # Seating chart aggregation
         seating_brains = catalog(
@@ -151,11 +121,11 @@ def get_dashboard_aggregates():
     return aggregates
 
 
-@ram.cache(_cache_key_user_context)
+@cached(ttl=30, scope=(SITE, USER))
 def get_user_dashboard_data(user_id):
     """
     Get personalized dashboard data for specific user
-    Cached per user with 30-second invalidation
+    Cached per site, current user and ``user_id`` for 30 seconds
     """
     api.portal.get()
     user = api.user.get(user_id)
@@ -205,38 +175,135 @@ def get_user_dashboard_data(user_id):
     return user_data
 
 
-def clear_dashboard_cache():
-    """Clear all dashboard-related caches"""
-    ram.invalidate_cache()
+def summarize_hall_pass_brain(brain, now=None):
+    """
+    Build the dashboard summary of a hall pass from catalog metadata only.
 
+    Relies on the hall_pass_* metadata columns registered in catalog.xml,
+    so no persistent object is loaded.
+    """
+    issue_time = brain.hall_pass_issue_time
+    return_time = brain.hall_pass_return_time
+    duration = duration_minutes_since(issue_time, return_time or now)
+
+    return {
+        "id": brain.getId,
+        "student_name": brain.hall_pass_student_name or "Unknown",
+        "destination": brain.hall_pass_destination or "Unknown",
+        "issue_time": issue_time.isoformat() if issue_time else None,
+        "duration_minutes": duration,
+        "alert_level": alert_level_for(
+            duration,
+            brain.hall_pass_expected_duration,
+            returned=bool(return_time),
+        ),
+        "url": brain.getURL(),
+    }
 
-def optimize_catalog_query(query_dict):
+
+def query_active_hall_passes(catalog, **query):
+    """Brains of passes whose student is still out, longest out first"""
+    return catalog(
+        portal_type="HallPass",
+        hall_pass_is_active=True,
+        sort_on="hall_pass_issue_time",
+        **query,
+    )
+
+
+def query_overdue_hall_passes(catalog, now=None, grace_minutes=0, **query):
     """
-    Optimize catalog queries by rewriting them for better performance
+    Brains of passes that are overdue right now.
+
+    One catalog query: ``hall_pass_expected_return < now - grace`` on the
+    date index (minute resolution), intersected with ``hall_pass_is_active``.
+    The expected return time never changes after issue, so results are
+    correct at any moment without loading objects or reindexing.
 
     Args:
-        query_dict: Original catalog query dictionary
+        catalog: portal_catalog
+        now: Reference time (defaults to now)
+        grace_minutes: Extra minutes before a pass counts as overdue
+            (the dashboard's "red" level uses 5)
+        **query: Extra catalog criteria, e.g. ``path`` for one classroom
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(minutes=grace_minutes)
+    return catalog(
+        portal_type="HallPass",
+        hall_pass_is_active=True,
+        hall_pass_expected_return={"query": cutoff, "range": "max"},
+        sort_on="hall_pass_expected_return",
+        **query,
+    )
 
-    Returns:
-        Optimized query dictionary with better indexes and sorting
+
+def aggregate_hall_passes_from_brains(catalog, now=None):
+    """
+    Aggregate active hall passes for the dashboard using brains only.
+
+    Cost depends on the number of students currently out and passes issued
+    today, not on the total number of HallPass objects in the site.
+    """
+    now = now or datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    active_brains = query_active_hall_passes(catalog)
+    passes = [summarize_hall_pass_brain(brain, now) for brain in active_brains]
+
+    total_today = len(
+        catalog(
+            portal_type="HallPass",
+            created={"query": DateTime(today_start), "range": "min"},
+        )
+    )
+
+    return {
+        "active": len(passes),
+        "overdue": len([p for p in passes if p["alert_level"] == "red"]),
+        "total_today": total_today,
+        "passes": passes,
+    }
+
+
+def aggregate_seating_from_brains(catalog):
+    """Aggregate seating chart roster sizes from seating_student_count metadata"""
+    brains = catalog(
+        portal_type="SeatingChart",
+        seating_student_count={"query": 1, "range": "min"},
+    )
+    total_students = sum(brain.seating_student_count or 0 for brain in brains)
+
+    return {
+        "status": "active" if len(brains) > 0 else "none",
+        "total_students": total_students,
+        "active_charts": len(brains),
+    }
+
+
+def clear_dashboard_cache():
+    """Invalidate all dashboard caches (other RAM cache users keep theirs)"""
+    invalidate_kinds(*DASHBOARD_KINDS)
+
+
+def optimize_catalog_query(query_dict, catalog=None):
     """
-    optimized = query_dict.copy()
+    Optimize a catalog query for the indexes the catalog really has
 
-    # Use performance indexes when available
-    if "portal_type" in optimized and optimized["portal_type"] == "HallPass":
-        # Add hall pass specific optimizations
-        if "review_state" not in optimized:
-            optimized["hall_pass_status"] = "active"  # Use custom index
+    See query_planner for the rewrite rules. Sorted queries must carry
+    ``sort_limit`` or ``b_size``.
 
-        # Optimize date ranges
-        if "modified" in optimized:
-            optimized["hall_pass_issue_time"] = optimized.pop("modified")
+    Args:
+        query_dict: Original catalog query dictionary
+        catalog: Catalog to plan for (default: portal_catalog)
 
-    # Limit result size for dashboard queries
-    if "sort_limit" not in optimized:
-        optimized["sort_limit"] = 50  # Reasonable default
+    Returns:
+        Optimized query dictionary
 
-    return optimized
+    Raises:
+        UnboundedSortError: For a sort without a limit
+    """
+    return plan_query(query_dict, catalog).query
 
 
 def batch_update_annotations(objects, annotation_key, update_func):
@@ -262,29 +329,9 @@ def batch_update_annotations(objects, annotation_key, update_func):
             continue  # Skip objects that can't be updated
 
 
-def measure_performance(func):
+def measure_performance(func=None, **options):
     """
     Decorator to measure function performance
-    Useful for identifying bottlenecks during optimization
+    Percentiles and slow-call log per function, see timing.measure
     """
-
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-
-        # Log performance metrics
-        duration = end_time - start_time
-        func_name = getattr(func, "__name__", "unknown")
-
-        if duration > 0.5:  # Log slow operations
-            portal = api.portal.get()
-            if portal:
-                api.portal.show_message(
-                    f"Performance alert: {func_name} took {duration:.2f}s",
-                    request=getattr(portal, "REQUEST", None),
-                )
-
-        return result
-
-    return wrapper
+    return measure(func, **options)
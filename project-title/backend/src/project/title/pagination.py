@@ -0,0 +1,170 @@
+"""
+Cursor Pagination for Catalog-backed JSON Endpoints
+
+Clients page with ``limit`` and the opaque ``next_cursor`` returned by the
+previous page. A cursor holds the sort value and UID of the last item
+sent, plus how many items with that same sort value were sent. The next
+page is a range query starting at that value, sorted with ``sort_limit``
+/ ``b_size``, so every page costs O(limit) however deep the client pages,
+and items added or removed meanwhile neither shift nor repeat pages.
+
+Items with equal sort values (e.g. passes issued in the same minute: date
+indexes have minute resolution) are told apart by their catalog order and
+the UID in the cursor. Every search goes through the query planner
+(query_planner.py).
+"""
+
+from DateTime import DateTime
+from datetime import datetime
+from plone import api
+import base64
+import hashlib
+import json
+
+from .query_planner import plan_query
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+DEFAULT_SORT_ON = "modified"
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or belongs to another query"""
+
+
+def page_limit(request, default=DEFAULT_LIMIT):
+    """``limit`` request parameter, clamped to 1..MAX_LIMIT"""
+    try:
+        limit = int(request.get("limit") or default)
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(state):
+    data = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(state, dict):
+            raise ValueError("not an object")
+        return state
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+
+def _dump_value(value):
+    if isinstance(value, DateTime):
+        return {"DateTime": value.ISO8601()}
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict) and "DateTime" in value:
+        return DateTime(value["DateTime"])
+    if isinstance(value, dict) and "datetime" in value:
+        return datetime.fromisoformat(value["datetime"])
+    return value
+
+
+def _fingerprint(query):
+    return hashlib.sha1(repr(sorted(query.items())).encode()).hexdigest()[:12]
+
+
+def paginate_catalog(query, cursor=None, limit=DEFAULT_LIMIT, catalog=None):
+    """One page of catalog results for ``query``
+
+    Args:
+        query: Catalog query; ``sort_on`` (default ``modified``) must be a
+            sortable index that is also a metadata column, and must not be
+            filtered on in ``query`` itself
+        cursor: ``next_cursor`` of the previous page, or None for the first
+        limit: Page size
+        catalog: Catalog to search (default: portal_catalog)
+
+    Returns:
+        dict: ``items`` (brains), ``next_cursor`` (None on the last page)
+        and ``total`` (result count as of the first page)
+
+    Raises:
+        InvalidCursor: For malformed cursors or cursors of another query
+    """
+    catalog = catalog or api.portal.get_tool("portal_catalog")
+    base = {
+        key: value
+        for key, value in query.items()
+        if key not in ("sort_limit", "b_start", "b_size")
+    }
+    base.setdefault("sort_on", DEFAULT_SORT_ON)
+    base.setdefault("sort_order", "ascending")
+    sort_on = base["sort_on"]
+    reverse = base["sort_order"] in ("descending", "reverse")
+    fingerprint = _fingerprint(base)
+
+    search = dict(base)
+    state = None
+    if cursor:
+        state = decode_cursor(cursor)
+        if state.get("q") != fingerprint:
+            raise InvalidCursor("Cursor belongs to another query")
+        try:
+            search[sort_on] = {
+                "query": _load_value(state["v"]),
+                "range": "max" if reverse else "min",
+            }
+            skip = int(state["n"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor(f"Invalid cursor: {e}")
+    else:
+        skip = 0
+
+    fetch = skip + limit + 1
+    plan = plan_query(dict(search, sort_limit=fetch, b_start=0, b_size=fetch), catalog)
+    if plan.empty:
+        return {"items": [], "next_cursor": None, "total": state["t"] if state else 0}
+    # The planner may have moved the sort to the index holding the data
+    sort_on = plan.query.get("sort_on")
+    if sort_on is None:
+        raise ValueError(f"No index to sort on for {base['sort_on']}")
+    index = catalog._catalog.getIndex(sort_on)
+
+    brains = catalog.searchResults(**plan.query)
+    items = list(brains[:fetch])
+    keys = [index.getEntryForObject(brain.getRID()) for brain in items]
+
+    start = 0
+    if state is not None:
+        # Resume after the cursor's item within its group of equal sort keys
+        tied = 0
+        while tied < len(items) and keys[tied] == state.get("k"):
+            tied += 1
+        uids = [brain.UID for brain in items[:tied]]
+        start = uids.index(state.get("u")) + 1 if state.get("u") in uids else skip
+        start = min(start, tied)
+
+    page = items[start : start + limit]
+    next_cursor = None
+    if page and len(items) > start + limit:
+        last = start + len(page) - 1
+        same = 0
+        while same <= last and keys[last - same] == keys[last]:
+            same += 1
+        next_cursor = encode_cursor(
+            {
+                "q": fingerprint,
+                "v": _dump_value(getattr(page[-1], sort_on)),
+                "k": keys[last],
+                "u": page[-1].UID,
+                "n": same,
+                "t": state["t"] if state else brains.actual_result_count,
+            }
+        )
+
+    total = state.get("t") if state else brains.actual_result_count
+    return {"items": page, "next_cursor": next_cursor, "total": total}
@@ -0,0 +1,197 @@
+"""
+Opt-in Per-Request Profiling for project.title Views
+
+A request to one of this package's browser views is traced when it
+carries an ``X-Perf-Trace: 1`` header and the user may manage the portal,
+or for every such request while the registry record
+``project.title.perf_trace_enabled`` is on. A trace attributes the time
+of the request to:
+
+- ``catalog``: portal_catalog searches (the brains are lazy; objects they
+  load later count as ``zodb_load``)
+- ``zodb_load``: objects loaded from the database (``_p_jar.setstate``)
+- ``annotation``: annotation reads (``get`` / ``[]``)
+- ``serialize``: JSON encoding of ``stream_json`` responses
+
+Times are inclusive: an annotation read that loads its BTree counts in
+both. The result is sent as a ``Server-Timing`` header and kept in a ring
+buffer of the last ``RING_SIZE`` traces per process, shown by
+``@@perf-trace``.
+
+The catalog, connection and annotation methods are wrapped on first use
+of tracing, not at startup; outside a trace the wrappers only check a
+thread-local.
+"""
+
+from AccessControl import getSecurityManager
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from plone import api
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-Perf-Trace"
+REGISTRY_RECORD = "project.title.perf_trace_enabled"
+RING_SIZE = 100
+KINDS = ("catalog", "zodb_load", "annotation", "serialize")
+
+_local = threading.local()
+_traces = deque(maxlen=RING_SIZE)
+_traces_lock = threading.Lock()
+_hooks_lock = threading.Lock()
+_hooks_installed = False
+
+
+class Trace:
+    """Counts and seconds per kind for one request"""
+
+    def __init__(self, request, view):
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now().isoformat()
+        self.method = request.get("REQUEST_METHOD", "GET")
+        self.path = request.get("PATH_INFO", "")
+        self.view = view
+        self.spans = {kind: [0, 0.0] for kind in KINDS}
+
+    def add(self, kind, seconds, count=1):
+        span = self.spans.setdefault(kind, [0, 0.0])
+        span[0] += count
+        span[1] += seconds
+
+    def summary(self, status):
+        return {
+            "timestamp": self.timestamp,
+            "method": self.method,
+            "path": self.path,
+            "view": self.view,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": {
+                kind: {"count": count, "ms": round(seconds * 1000, 2)}
+                for kind, (count, seconds) in self.spans.items()
+            },
+        }
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def span(kind):
+    """Attribute the time of the ``with`` block to ``kind``"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(kind, time.perf_counter() - started)
+
+
+def _wrap(cls, name, kind):
+    original = getattr(cls, name)
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        trace = current_trace()
+        if trace is None:
+            return original(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            trace.add(kind, time.perf_counter() - started)
+
+    setattr(cls, name, wrapper)
+
+
+def install_hooks():
+    """Wrap catalog searches, object loads and annotation reads, once"""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        from Products.CMFPlone.CatalogTool import CatalogTool
+        from ZODB.Connection import Connection
+        from zope.annotation.attribute import AttributeAnnotations
+
+        for name in ("searchResults", "__call__", "unrestrictedSearchResults"):
+            _wrap(CatalogTool, name, "catalog")
+        _wrap(Connection, "setstate", "zodb_load")
+        for name in ("get", "__getitem__"):
+            _wrap(AttributeAnnotations, name, "annotation")
+        _hooks_installed = True
+
+
+def _published_view(request):
+    """Name of the published project.title view, or None"""
+    published = request.get("PUBLISHED")
+    view = getattr(published, "__self__", published)
+    if not type(view).__module__.startswith("project.title."):
+        return None
+    name = getattr(view, "__name__", None) or type(view).__name__
+    method = getattr(published, "__name__", None)
+    return f"{name}/{method}" if view is not published and method else name
+
+
+def _enabled_for(request):
+    try:
+        if api.portal.get_registry_record(REGISTRY_RECORD, default=False):
+            return True
+    except Exception as e:
+        logger.debug(f"Perf trace registry record unavailable: {e}")
+    header = (request.getHeader(HEADER) or "").strip().lower()
+    if header in ("", "0", "off", "false"):
+        return False
+    return bool(getSecurityManager().checkPermission("Manage portal", api.portal.get()))
+
+
+def start_trace(event):
+    request = event.request
+    _local.trace = None
+    view = _published_view(request)
+    if view is None or not _enabled_for(request):
+        return
+    install_hooks()
+    _local.trace = Trace(request, view)
+
+
+def server_timing(summary):
+    """``Server-Timing`` header value of a trace summary"""
+    parts = [
+        f'{kind};dur={entry["ms"]};desc="{entry["count"]}x"'
+        for kind, entry in summary["spans"].items()
+    ]
+    parts.append(f"total;dur={summary['duration_ms']}")
+    return ", ".join(parts)
+
+
+def end_trace(event):
+    trace = current_trace()
+    _local.trace = None
+    if trace is None:
+        return
+    response = event.request.response
+    summary = trace.summary(response.getStatus())
+    response.setHeader("Server-Timing", server_timing(summary))
+    with _traces_lock:
+        _traces.append(summary)
+
+
+def recent_traces():
+    """Ring buffer contents, newest first"""
+    with _traces_lock:
+        return list(reversed(_traces))
+
+
+def clear_traces():
+    with _traces_lock:
+        _traces.clear()
@@ -0,0 +1,130 @@
+"""
+Cached QR Code Rendering for Hall Passes
+
+Rendering a QR code (matrix fit, PIL image, PNG encoding) dominates the
+hall pass API latency, yet a pass's QR content never changes once the pass
+is issued. PNGs are therefore rendered once per pass code and payload and
+kept in a bounded, process-local LRU cache.
+
+API responses carry the URL of the ``@@pass-qr`` image endpoint instead of
+an inline data URI; the endpoint serves the cached PNG with ETag and
+Last-Modified headers so browsers revalidate instead of re-downloading.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timezone
+from urllib.parse import quote
+import base64
+import hashlib
+import io
+import logging
+import threading
+
+import qrcode
+
+logger = logging.getLogger(__name__)
+
+QR_CACHE_SIZE = 1024
+
+
+class QRImage:
+    """A rendered QR PNG with its HTTP validators"""
+
+    __slots__ = ("png", "etag", "last_modified")
+
+    def __init__(self, png, last_modified=None):
+        self.png = png
+        self.etag = '"%s"' % hashlib.sha1(png).hexdigest()
+        # HTTP dates have one-second resolution
+        self.last_modified = (last_modified or datetime.now(timezone.utc)).replace(
+            microsecond=0
+        )
+
+    def data_uri(self):
+        return "data:image/png;base64," + base64.b64encode(self.png).decode()
+
+
+class QRCodeCache:
+    """Thread-safe LRU of rendered QR images keyed by (pass_code, payload)"""
+
+    def __init__(self, maxsize=QR_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pass_code, payload):
+        key = (pass_code, payload)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        # Render outside the lock; a duplicate render on a race is harmless
+        image = QRImage(render_qr_png(payload))
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._images)
+
+
+qr_cache = QRCodeCache()
+
+
+def render_qr_png(payload, box_size=10, border=4):
+    """Render ``payload`` as a PNG QR code and return the bytes"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def get_qr_image(pass_code, payload):
+    """Cached QR image for a pass; renders only on the first request"""
+    return qr_cache.get(pass_code, payload)
+
+
+def verification_base_url(request=None):
+    """Base URL the verification QR codes point at"""
+    if request is not None:
+        # Check if we're in Docker environment
+        host = request.getHeader("Host", "") or ""
+        if "project-title.localhost" in host:
+            return "http://project-title.localhost"
+        return "http://localhost:8080"
+    return "http://project-title.localhost"
+
+
+def verification_payload(pass_code, request=None):
+    """QR content for a pass: a link to the mobile verification page"""
+    base_url = verification_base_url(request)
+    return f"{base_url}/Plone/@@pass-verify?code={quote(pass_code)}"
+
+
+def pass_qr_url(portal_url, pass_code):
+    """URL of the ``@@pass-qr`` image for a pass code"""
+    return f"{portal_url}/@@pass-qr?code={quote(pass_code)}"
@@ -0,0 +1,215 @@
+"""
+Catalog Query Planner
+
+Rewrites catalog queries against the indexes the catalog really has. The
+index list is read once per catalog and cached (``clear_index_cache``
+after adding or removing indexes). Rules, in order:
+
+1. Aliases: legacy keys are renamed to the index holding the data for
+   the queried type (``modified`` -> ``hall_pass_issue_time`` for passes)
+2. Missing indexes: filters and sorts on indexes that do not exist are
+   moved to a known fallback index, or dropped
+3. Bounded sorts: a sorted query must carry ``sort_limit`` or ``b_size``;
+   unbounded sorts raise ``UnboundedSortError``
+4. Selectivity: filters are ordered by estimated result size, smallest
+   first; a filter matching no document marks the plan ``empty`` so the
+   search can be skipped
+
+Every decision is recorded in ``QueryPlan.explain`` and logged: at debug
+level normally, at info level when Zope runs in debug mode.
+"""
+
+from plone import api
+import logging
+
+from .metrics import count_catalog_query
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that are not index filters
+QUERY_OPTIONS = frozenset(
+    ("sort_on", "sort_order", "sort_limit", "b_start", "b_size", "show_inactive")
+)
+
+# portal_type -> {legacy key: index holding that data}
+ALIASES = {
+    "HallPass": {"modified": "hall_pass_issue_time"},
+}
+
+# Index -> index with equivalent values, used when the first is missing
+FALLBACKS = {
+    "hall_pass_issue_time": "created",
+    "hall_pass_status": "review_state",
+    "seating_last_updated": "modified",
+}
+
+# Share of the catalog an index is assumed to match without statistics
+SELECTIVITY_PRIORS = {
+    "UUIDIndex": 0.0,
+    "FieldIndex": 0.1,
+    "KeywordIndex": 0.2,
+    "BooleanIndex": 0.5,
+    "DateIndex": 0.5,
+    "DateRangeIndex": 0.9,
+    "ExtendedPathIndex": 0.5,
+    "ZCTextIndex": 0.3,
+}
+VALUE_INDEXES = ("FieldIndex", "KeywordIndex", "UUIDIndex")
+
+
+class UnboundedSortError(ValueError):
+    """A sorted query without sort_limit/b_size would sort every match"""
+
+
+class QueryPlan:
+    """Rewritten query plus the reasoning behind it"""
+
+    def __init__(self, query, explain, estimates, empty=False):
+        self.query = query
+        self.explain = explain
+        self.estimates = estimates
+        self.empty = empty
+
+
+_index_cache = {}
+
+
+def catalog_indexes(catalog):
+    """Index name -> meta_type, read once per catalog"""
+    key = catalog.getPhysicalPath()
+    indexes = _index_cache.get(key)
+    if indexes is None:
+        indexes = {
+            name: catalog._catalog.getIndex(name).meta_type
+            for name in catalog.indexes()
+        }
+        _index_cache[key] = indexes
+    return indexes
+
+
+def clear_index_cache():
+    _index_cache.clear()
+
+
+def _debug_mode():
+    try:
+        from App.config import getConfiguration
+
+        return bool(getConfiguration().debug_mode)
+    except Exception:
+        return False
+
+
+def _portal_type(query):
+    portal_type = query.get("portal_type")
+    if isinstance(portal_type, dict):
+        portal_type = portal_type.get("query")
+    if isinstance(portal_type, (list, tuple)) and len(portal_type) == 1:
+        portal_type = portal_type[0]
+    return portal_type if isinstance(portal_type, str) else None
+
+
+def estimate_matches(catalog, name, meta_type, value):
+    """Estimated number of documents an index filter matches"""
+    index = catalog._catalog.getIndex(name)
+    try:
+        total = index.numObjects()
+    except Exception:
+        total = len(catalog)
+
+    if meta_type in VALUE_INDEXES:
+        values = value.get("query") if isinstance(value, dict) else value
+        ranged = isinstance(value, dict) and "range" in value
+        if not ranged and values not in (None, [], ()):
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            try:
+                matches = 0
+                for item in values:
+                    documents = index._index.get(item)
+                    if isinstance(documents, int):
+                        matches += 1
+                    elif documents is not None:
+                        matches += len(documents)
+                return matches
+            except Exception:
+                pass  # Fall back to the prior
+    return int(total * SELECTIVITY_PRIORS.get(meta_type, 1.0)) + 1
+
+
+def plan_query(query, catalog=None):
+    """Plan a catalog query; see the module docstring for the rules
+
+    Returns:
+        QueryPlan
+
+    Raises:
+        UnboundedSortError: If the query sorts without a limit
+    """
+    catalog = catalog or api.portal.get_tool("portal_catalog")
+    count_catalog_query()
+    indexes = catalog_indexes(catalog)
+    query = dict(query)
+    explain = []
+    portal_type = _portal_type(query)
+
+    for legacy, target in ALIASES.get(portal_type, {}).items():
+        if legacy in query and target in indexes and target not in query:
+            query[target] = query.pop(legacy)
+            explain.append(f"alias: {legacy} -> {target} for {portal_type}")
+        if query.get("sort_on") == legacy and target in indexes:
+            query["sort_on"] = target
+            explain.append(f"alias: sort on {target} instead of {legacy}")
+
+    for name in [key for key in query if key not in QUERY_OPTIONS]:
+        if name in indexes:
+            continue
+        fallback = FALLBACKS.get(name)
+        value = query.pop(name)
+        if fallback in indexes and fallback not in query:
+            query[fallback] = value
+            explain.append(f"missing index {name}: filter on {fallback}")
+        else:
+            explain.append(f"missing index {name}: filter dropped")
+
+    sort_on = query.get("sort_on")
+    if sort_on is not None and sort_on not in indexes:
+        fallback = FALLBACKS.get(sort_on)
+        if fallback in indexes:
+            query["sort_on"] = fallback
+            explain.append(f"missing index {sort_on}: sort on {fallback}")
+        else:
+            for option in ("sort_on", "sort_order", "sort_limit"):
+                query.pop(option, None)
+            explain.append(f"missing index {sort_on}: sort dropped")
+
+    if "sort_on" in query and not (query.get("sort_limit") or query.get("b_size")):
+        raise UnboundedSortError(
+            f"Sorting on {query['sort_on']} needs sort_limit or b_size"
+        )
+
+    filters = [key for key in query if key not in QUERY_OPTIONS]
+    estimates = {
+        name: estimate_matches(catalog, name, indexes[name], query[name])
+        for name in filters
+    }
+    ordered = sorted(filters, key=lambda name: estimates[name])
+    if ordered != filters:
+        explain.append(f"order: {', '.join(ordered)}")
+    plan = QueryPlan(
+        {
+            **{name: query[name] for name in ordered},
+            **{key: value for key, value in query.items() if key in QUERY_OPTIONS},
+        },
+        explain,
+        estimates,
+        empty=any(estimates[name] == 0 for name in filters),
+    )
+    if plan.empty:
+        explain.append("empty: a filter matches no document")
+
+    if explain:
+        level = logging.INFO if _debug_mode() else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, f"Catalog plan {plan.query!r}: {'; '.join(explain)}")
+    return plan
@@ -0,0 +1,310 @@
+"""
+Bulk Roster Import
+
+Creates or updates many seating charts from one roster file, e.g. at the
+start of a term. The file is streamed record by record:
+
+- CSV with a header row, one student per row:
+  ``chart_id,title,class_period,subject,grid_rows,grid_cols,student``
+- JSON: an array or JSON Lines of the same per-student rows, or of
+  per-chart objects with a ``students`` list
+
+Consecutive rows of the same chart are grouped, so a file sorted by chart
+only ever holds one roster in memory. A chart seen again later in the
+file gets the later students appended. Only ``chart_id`` (or ``title``)
+is required; ids are normalized like Plone's add forms do. Existing
+charts the user may not modify are reported as errors and left alone.
+
+Charts are written with events suppressed and committed every
+``chunk_size`` charts, shrinking the ZODB cache after each commit. Events
+are deferred to one batch at the end: created charts get their
+``ObjectAddedEvent`` there (workflow, catalog, intid and this package's
+add subscribers); updated charts are only reindexed, so
+``IObjectModifiedEvent`` subscribers (e.g. versioning) are intentionally
+skipped, and the seating cache is invalidated once for the container. An
+interrupted import leaves written but unindexed charts; importing the
+same file again is idempotent and indexes them.
+"""
+
+from plone import api
+from plone.dexterity.utils import createContent
+from plone.i18n.normalizer.interfaces import IIDNormalizer
+from zope.component import getUtility
+from zope.container.contained import notifyContainerModified
+from zope.event import notify
+from zope.lifecycleevent import ObjectAddedEvent
+from zope.schema import ValidationError
+import codecs
+import csv
+import io
+import json
+import logging
+import time
+import transaction
+
+from .caching import invalidate
+from .caching import SEATING
+from .content.seating_chart import ISeatingChart
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50
+MAX_REPORTED_ERRORS = 100
+READ_SIZE = 64 * 1024
+FORMATS = ("csv", "json")
+CHART_FIELDS = ("title", "class_period", "subject", "grid_rows", "grid_cols")
+INT_FIELDS = ("grid_rows", "grid_cols")
+
+
+def text_stream(stream):
+    """Decode a binary upload as UTF-8 (with or without BOM) while reading"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader("utf-8-sig")(stream)
+
+
+def format_for(filename, default="csv"):
+    """Import format from a file name (``.csv``, ``.json``, ``.jsonl``)"""
+    name = (filename or "").lower()
+    if name.endswith((".json", ".jsonl", ".ndjson")):
+        return "json"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def iter_records(stream, fmt="csv"):
+    """Yield the raw records (dicts) of a roster file"""
+    stream = text_stream(stream)
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "json":
+        yield from _iter_json(stream)
+    else:
+        raise ValueError(f"Unknown roster format: {fmt}")
+
+
+def _iter_json(stream):
+    """Records of a JSON array or of JSON Lines, decoded incrementally"""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        # JSON Lines: one record per non-empty line
+        for line in _lines(buffer, stream):
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(","):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Invalid or truncated JSON roster")
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield record
+        buffer = buffer[end:]
+
+
+def _lines(head, stream):
+    """Lines of ``head`` followed by the rest of ``stream``"""
+    pending = head
+    while True:
+        *lines, pending = pending.split("\n")
+        yield from lines
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            yield pending
+            return
+        pending += chunk
+
+
+def iter_charts(records, errors):
+    """Group records into chart dicts; invalid records are added to errors"""
+    normalizer = getUtility(IIDNormalizer)
+    current = None
+    for number, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            errors.append({"record": number, "error": "Record is not an object"})
+            continue
+        name = record.get("chart_id") or record.get("id") or record.get("title")
+        chart_id = normalizer.normalize(str(name).strip()) if name else ""
+        if not chart_id:
+            errors.append({"record": number, "error": "Missing chart_id or title"})
+            continue
+
+        if current is None or current["id"] != chart_id:
+            if current is not None:
+                yield current
+            current = {"id": chart_id, "record": number, "students": []}
+        for field in CHART_FIELDS:
+            value = record.get(field)
+            if value not in (None, "") and field not in current:
+                current[field] = value
+
+        students = record.get("students")
+        if students is None:
+            students = [record.get("student")]
+        if not isinstance(students, list):
+            errors.append({"record": number, "error": "students must be a list"})
+            continue
+        for student in students:
+            student = str(student or "").strip()
+            if student:
+                current["students"].append(student)
+    if current is not None:
+        yield current
+
+
+def _field_values(chart):
+    """Validated schema values of a chart record"""
+    values = {}
+    for field in CHART_FIELDS:
+        if field not in chart:
+            continue
+        value = chart[field]
+        try:
+            value = int(value) if field in INT_FIELDS else str(value).strip()
+            ISeatingChart[field].validate(value)
+        except (TypeError, ValueError, ValidationError) as e:
+            raise ValueError(f"Invalid {field} {chart[field]!r}: {e!r}")
+        values[field] = value
+    return values
+
+
+def write_chart(container, chart, append=False):
+    """Create or update one chart without events; returns the created flag"""
+    values = _field_values(chart)
+    students = list(dict.fromkeys(chart["students"]))
+    existing = container._getOb(chart["id"], None)
+
+    if existing is None:
+        values.setdefault("title", chart["id"])
+        obj = createContent("SeatingChart", students=students, **values)
+        obj.id = chart["id"]
+        container._setObject(chart["id"], obj, suppress_events=True)
+        container._getOb(chart["id"]).addCreator()
+        return True
+
+    if getattr(existing, "portal_type", None) != "SeatingChart":
+        raise ValueError(f"{chart['id']} exists and is not a seating chart")
+    if not api.user.has_permission("Modify portal content", obj=existing):
+        raise ValueError(f"Not allowed to modify {chart['id']}")
+    if append:
+        students = list(dict.fromkeys((existing.students or []) + students))
+    for field, value in values.items():
+        setattr(existing, field, value)
+    existing.students = students
+
+    # Unseat students who left the roster
+    grid = existing.get_seating_grid()
+    roster = set(students)
+    for student in [name for name in grid.positions.keys() if name not in roster]:
+        grid.remove(student)
+    existing.setModificationDate()
+    return False
+
+
+def import_rosters(
+    container, stream, fmt="csv", chunk_size=CHUNK_SIZE, progress=None, commit=True
+):
+    """Import a roster file into seating charts inside ``container``
+
+    Args:
+        container: Folder the charts are created in
+        stream: Text or binary file object of the roster file
+        fmt: "csv" or "json" (array or JSON Lines)
+        chunk_size: Charts written per transaction
+        progress: Optional callable receiving the report after every chunk
+        commit: Commit each chunk (False: savepoints only, e.g. in tests)
+
+    Returns:
+        dict: ``charts``, ``created``, ``updated``, ``students``, ``chunks``,
+        ``elapsed``, ``error_count`` and the first ``errors``
+    """
+    started = time.perf_counter()
+    report = {
+        "charts": 0,
+        "created": 0,
+        "updated": 0,
+        "students": 0,
+        "chunks": 0,
+        "elapsed": 0.0,
+        "error_count": 0,
+        "errors": [],
+    }
+    errors = []
+    touched = {}  # chart id -> created by this import
+    pending = 0
+
+    def checkpoint():
+        if commit:
+            transaction.commit()
+            jar = getattr(container, "_p_jar", None)
+            if jar is not None:
+                jar.cacheGC()
+        else:
+            transaction.savepoint(optimistic=True)
+        report["chunks"] += 1
+        _collect_errors(report, errors)
+        report["elapsed"] = time.perf_counter() - started
+        if progress is not None:
+            progress(report)
+
+    for chart in iter_charts(iter_records(stream, fmt), errors):
+        try:
+            created = write_chart(container, chart, append=chart["id"] in touched)
+        except ValueError as e:
+            errors.append(
+                {"record": chart["record"], "chart": chart["id"], "error": str(e)}
+            )
+            continue
+
+        if chart["id"] not in touched:
+            touched[chart["id"]] = created
+            report["charts"] += 1
+            report["created" if created else "updated"] += 1
+        report["students"] += len(chart["students"])
+        pending += 1
+        if pending >= chunk_size:
+            checkpoint()
+            pending = 0
+
+    # One event/catalog batch for everything written above
+    for chart_id, created in touched.items():
+        obj = container._getOb(chart_id, None)
+        if obj is None:
+            continue
+        if created:
+            notify(ObjectAddedEvent(obj, container, chart_id))
+        else:
+            obj.reindexObject()
+    if touched:
+        notifyContainerModified(container)
+        invalidate(SEATING, container)
+    checkpoint()
+
+    logger.info(
+        f"Imported {report['charts']} seating charts ({report['created']} new, "
+        f"{report['students']} students) in {report['elapsed']:.1f}s with "
+        f"{report['error_count']} errors"
+    )
+    return report
+
+
+def _collect_errors(report, errors):
+    """Move new errors into the report, keeping only the first few"""
+    report["error_count"] += len(errors)
+    room = MAX_REPORTED_ERRORS - len(report["errors"])
+    report["errors"].extend(errors[:room])
+    errors.clear()
@@ -0,0 +1,243 @@
+"""
+Persistent Seating Grid
+
+Replaces the ``SeatingChart.grid_data`` JSON text as the storage of seat
+assignments. Two BTrees are kept in sync:
+
+- ``seats``: (row, col) -> student name
+- ``positions``: student name -> (row, col), the reverse index
+
+Moving a student touches one key in each tree, so a drag-and-drop session
+writes a few small BTree buckets per move instead of re-serializing the
+whole grid, and position lookups are O(log n) instead of a linear scan.
+
+Every change bumps ``revision`` (a conflict-resolving ``Length``), whose
+``_p_serial`` identifies the committed state of the whole grid; readers
+use ``state_key()`` to cache data derived from it.
+
+Other top-level keys of the legacy JSON (``empty_desks``, ``notes``) are
+kept in ``extra`` unchanged. ``to_dict()`` / ``load()`` convert from/to
+the legacy structure, which is still what the REST API exposes as
+``grid_data``.
+"""
+
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRA = {"empty_desks": [], "notes": {}}
+MAX_BATCH_OPERATIONS = 500
+
+
+def position_key(row, col):
+    """Legacy ``"row,col"`` key used in the JSON representation"""
+    return f"{row},{col}"
+
+
+def parse_position(key):
+    row, col = key.split(",")
+    return int(row), int(col)
+
+
+class SeatingGrid(Persistent):
+    """Seat assignments with a student -> seat reverse index"""
+
+    revision = None  # Length, created on the first change
+
+    def __init__(self):
+        self.seats = OOBTree()
+        self.positions = OOBTree()
+        self.extra = dict(DEFAULT_EXTRA)
+
+    def _touch(self):
+        if self.revision is None:
+            self.revision = Length()
+        self.revision.change(1)
+
+    def state_key(self):
+        """Serial of the committed grid state, or None if not cacheable
+
+        Changes only write the BTree buckets involved, so the serial of the
+        root objects does not change; the revision counter's serial does.
+        Uncommitted (new or modified in this transaction) grids return None.
+        """
+        tracker = self.revision if self.revision is not None else self
+        tracker._p_activate()
+        if tracker._p_jar is None or tracker._p_changed:
+            return None
+        return tracker._p_serial
+
+    def student_at(self, row, col):
+        return self.seats.get((row, col))
+
+    def position_of(self, student_name):
+        return self.positions.get(student_name)
+
+    def move(self, student_name, row, col):
+        """Seat a student at (row, col)
+
+        The student leaves their previous seat. A student already sitting
+        at the target seat is unseated (as with the old JSON update).
+
+        Returns:
+            bool: False if the student already sits there (nothing written)
+        """
+        target = (row, col)
+        previous = self.positions.get(student_name)
+        if previous == target:
+            return False
+        if previous is not None:
+            del self.seats[previous]
+
+        displaced = self.seats.get(target)
+        if displaced is not None:
+            del self.positions[displaced]
+
+        self.seats[target] = student_name
+        self.positions[student_name] = target
+        self._touch()
+        return True
+
+    def remove(self, student_name):
+        """Unseat a student; returns their previous seat or None"""
+        previous = self.positions.get(student_name)
+        if previous is not None:
+            del self.positions[student_name]
+            del self.seats[previous]
+            self._touch()
+        return previous
+
+    def plan_batch(self, operations, roster, rows, cols):
+        """Validate a batch of moves/swaps without changing the grid
+
+        Operations are applied in order on a scratch overlay, with the same
+        semantics as ``move`` (a student moved onto an occupied seat
+        unseats its occupant):
+
+        - ``{"op": "move", "student": name, "row": r, "col": c}``
+        - ``{"op": "swap", "student": name, "with": other}``
+
+        Args:
+            roster: Names allowed in the grid
+            rows, cols: Grid bounds
+
+        Returns:
+            tuple: ``(changes, errors)``. ``changes`` maps each student
+            whose seat differs at the end to ``(old, new)`` positions
+            (None when unseated); ``errors`` lists ``{"index", "error"}``.
+        """
+        errors = []
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return {}, [{"index": None, "error": "Too many operations"}]
+
+        roster = set(roster or ())
+        seat_of = {}  # overlay: student -> position or None
+        at = {}  # overlay: position -> student or None
+
+        def current_seat(student):
+            if student in seat_of:
+                return seat_of[student]
+            return self.positions.get(student)
+
+        def occupant(position):
+            return at[position] if position in at else self.seats.get(position)
+
+        def place(student, position):
+            previous = current_seat(student)
+            if previous is not None:
+                at[previous] = None
+            if position is not None:
+                displaced = occupant(position)
+                if displaced is not None and displaced != student:
+                    seat_of[displaced] = None
+                at[position] = student
+            seat_of[student] = position
+
+        for index, operation in enumerate(operations):
+            try:
+                kind = operation.get("op", "move")
+                student = operation.get("student")
+                if student not in roster:
+                    raise ValueError(f"{student} is not in the roster")
+
+                if kind == "move":
+                    row, col = int(operation["row"]), int(operation["col"])
+                    if not (0 <= row < rows and 0 <= col < cols):
+                        raise ValueError(f"Position ({row}, {col}) is out of bounds")
+                    place(student, (row, col))
+                elif kind == "swap":
+                    other = operation.get("with")
+                    if other not in roster:
+                        raise ValueError(f"{other} is not in the roster")
+                    first, second = current_seat(student), current_seat(other)
+                    if first is None or second is None:
+                        raise ValueError("Both students must be seated to swap")
+                    at[first], at[second] = other, student
+                    seat_of[student], seat_of[other] = second, first
+                else:
+                    raise ValueError(f"Unknown operation {kind!r}")
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                errors.append({"index": index, "error": str(e)})
+
+        changes = {}
+        for student, position in seat_of.items():
+            previous = self.positions.get(student)
+            if previous != position:
+                changes[student] = (previous, position)
+        return changes, errors
+
+    def apply_changes(self, changes):
+        """Write a plan from ``plan_batch``: only the changed seats"""
+        for student, (previous, _) in changes.items():
+            if previous is not None and self.seats.get(previous) == student:
+                del self.seats[previous]
+            if student in self.positions:
+                del self.positions[student]
+        for student, (_, position) in changes.items():
+            if position is not None:
+                self.seats[position] = student
+                self.positions[student] = position
+        if changes:
+            self._touch()
+
+    def clear(self):
+        self.seats.clear()
+        self.positions.clear()
+        self.extra = dict(DEFAULT_EXTRA)
+        self._touch()
+
+    def occupied(self):
+        """Occupied (row, col) seats, in row-major order"""
+        return self.seats.keys()
+
+    def load(self, data):
+        """Replace the contents from the legacy dict structure
+
+        Unparseable seat keys are skipped with a warning. If the same
+        student appears twice, the last seat wins.
+        """
+        self.seats.clear()
+        self.positions.clear()
+        data = dict(data or {})
+        for key, student_name in (data.pop("students", None) or {}).items():
+            try:
+                row, col = parse_position(key)
+            except (AttributeError, ValueError):
+                logger.warning(f"Skipping invalid seat position {key!r}")
+                continue
+            self.move(student_name, row, col)
+        self.extra = dict(DEFAULT_EXTRA, **data)
+        self._touch()
+
+    def to_dict(self):
+        """The legacy ``{"students": {"row,col": name}, ...}`` structure"""
+        students = {
+            position_key(row, col): name for (row, col), name in self.seats.items()
+        }
+        return {"students": students, **self.extra}
+
+    def __len__(self):
+        return len(self.positions)
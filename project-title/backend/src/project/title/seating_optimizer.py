@@ -0,0 +1,343 @@
+"""
+Constraint-Based Seating Optimizer
+
+Finds a seating arrangement that satisfies teacher constraints as well as
+possible, using simulated annealing over seat swaps:
+
+- ``keep_apart``: pairs of students that should sit at least
+  ``min_distance`` desks apart
+- ``front_row``: students who need one of the first ``front_rows`` rows
+- ``near_door``: students who should sit close to the ``door`` desk
+- ``groups``: student -> group label; neighbours (left/right/front/back)
+  from the same group are penalized, which mixes the groups
+
+Cost tables are built once per solve: the seat distance matrix, the
+keep-apart penalty matrix and each student's per-seat cost. With NumPy
+installed (``pip install project.title[optimizer]``) they are computed
+vectorized over the whole ``grid_rows`` x ``grid_cols`` grid; otherwise
+in plain Python. The annealing loop then only does table lookups, and a
+swap is scored incrementally from the constraints of the two students
+involved, so a full 12x10 room with 100+ constraints is solved in a
+fraction of a second.
+
+Runs are reproducible with ``seed`` when they stop on ``max_iterations``
+rather than on ``time_budget``. Malformed constraints raise ValueError
+(``validate_constraints``) before any table is built.
+"""
+
+import math
+import random
+import time
+
+try:
+    import numpy
+except ImportError:  # Optional dependency: project.title[optimizer]
+    numpy = None
+
+DEFAULT_TIME_BUDGET = 0.5
+DEFAULT_MAX_ITERATIONS = 200000
+DEFAULT_WEIGHTS = {
+    "keep_apart": 10.0,
+    "front_row": 5.0,
+    "near_door": 1.0,
+    "groups": 1.0,
+}
+START_TEMPERATURE = 5.0
+END_TEMPERATURE = 0.01
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_names(value):
+    return isinstance(value, (list, tuple)) and all(
+        isinstance(name, str) for name in value
+    )
+
+
+def validate_constraints(constraints):
+    """Raise ValueError unless ``constraints`` has the documented shape"""
+    if not isinstance(constraints, dict):
+        raise ValueError("constraints must be an object")
+    keep_apart = constraints.get("keep_apart") or []
+    if not isinstance(keep_apart, (list, tuple)) or not all(
+        _is_names(pair) and len(pair) == 2 for pair in keep_apart
+    ):
+        raise ValueError("keep_apart must be a list of [student, student] pairs")
+    for name in ("front_row", "near_door"):
+        if not _is_names(constraints.get(name) or []):
+            raise ValueError(f"{name} must be a list of students")
+    if not isinstance(constraints.get("groups") or {}, dict):
+        raise ValueError("groups must map students to group labels")
+    door = constraints.get("door")
+    is_seat = isinstance(door, (list, tuple)) and len(door) == 2
+    if door is not None and not (is_seat and all(map(_is_number, door))):
+        raise ValueError("door must be a [row, col] pair of numbers")
+    for name in ("min_distance", "front_rows"):
+        if name in constraints and not _is_number(constraints[name]):
+            raise ValueError(f"{name} must be a number")
+    weights = constraints.get("weights") or {}
+    if not isinstance(weights, dict) or not all(map(_is_number, weights.values())):
+        raise ValueError("weights must map constraint kinds to numbers")
+
+
+class SeatingProblem:
+    """Cost tables for one room, roster and constraint set"""
+
+    def __init__(self, students, rows, cols, constraints=None):
+        constraints = constraints or {}
+        validate_constraints(constraints)
+        self.students = list(dict.fromkeys(students))
+        self.rows, self.cols = rows, cols
+        self.seats = [(row, col) for row in range(rows) for col in range(cols)]
+        self.weights = dict(DEFAULT_WEIGHTS, **(constraints.get("weights") or {}))
+        self.min_distance = float(constraints.get("min_distance", 2))
+        self.front_rows = int(constraints.get("front_rows", 1))
+        self.door = tuple(constraints.get("door") or (0, 0))
+        index = {name: i for i, name in enumerate(self.students)}
+
+        # Keep-apart partners per student (indexes; unknown names ignored)
+        self.partners = [[] for _ in self.students]
+        self.pair_count = 0
+        for pair in constraints.get("keep_apart") or ():
+            a, b = (index.get(name) for name in pair)
+            if a is not None and b is not None and a != b:
+                self.partners[a].append(b)
+                self.partners[b].append(a)
+                self.pair_count += 1
+
+        front = {index[n] for n in constraints.get("front_row") or () if n in index}
+        door = {index[n] for n in constraints.get("near_door") or () if n in index}
+        self.front_students, self.door_students = front, door
+        groups = constraints.get("groups") or {}
+        self.group = [groups.get(name) for name in self.students]
+
+        self.neighbours = [
+            [
+                r * cols + c
+                for r, c in (
+                    (row - 1, col),
+                    (row + 1, col),
+                    (row, col - 1),
+                    (row, col + 1),
+                )
+                if 0 <= r < rows and 0 <= c < cols
+            ]
+            for row, col in self.seats
+        ]
+
+        build = self._build_numpy if numpy is not None else self._build_python
+        self.backend = "numpy" if numpy is not None else "python"
+        self.apart_penalty, self.front_costs, self.door_costs = build()
+        self.unary = [
+            self._unary_row(i in front, i in door, self.front_costs, self.door_costs)
+            for i in range(len(self.students))
+        ]
+
+    def _unary_row(self, needs_front, needs_door, front_costs, door_costs):
+        if needs_front and needs_door:
+            return [f + d for f, d in zip(front_costs, door_costs)]
+        if needs_front:
+            return front_costs
+        if needs_door:
+            return door_costs
+        return None
+
+    def _build_numpy(self):
+        coords = numpy.array(self.seats, dtype=float)
+        delta = coords[:, None, :] - coords[None, :, :]
+        distance = numpy.sqrt((delta**2).sum(axis=2))
+        apart = numpy.maximum(0.0, self.min_distance - distance)
+        apart *= self.weights["keep_apart"]
+        front = numpy.maximum(0.0, coords[:, 0] - (self.front_rows - 1))
+        front *= self.weights["front_row"]
+        to_door = coords - numpy.array(self.door, dtype=float)
+        door = numpy.sqrt((to_door**2).sum(axis=1)) * self.weights["near_door"]
+        # Python lists: scalar lookups in the annealing loop are faster
+        return apart.tolist(), front.tolist(), door.tolist()
+
+    def _build_python(self):
+        apart_weight = self.weights["keep_apart"]
+        apart = [
+            [
+                max(0.0, self.min_distance - math.dist(a, b)) * apart_weight
+                for b in self.seats
+            ]
+            for a in self.seats
+        ]
+        front = [
+            max(0.0, row - (self.front_rows - 1)) * self.weights["front_row"]
+            for row, _ in self.seats
+        ]
+        door = [
+            math.dist(seat, self.door) * self.weights["near_door"]
+            for seat in self.seats
+        ]
+        return apart, front, door
+
+    def local_cost(self, student, seat, seat_of, occupant, exclude):
+        """Cost terms of ``student`` at ``seat``, ignoring ``exclude``"""
+        cost = 0.0
+        unary = self.unary[student]
+        if unary is not None:
+            cost += unary[seat]
+        penalties = self.apart_penalty[seat]
+        for partner in self.partners[student]:
+            if partner != exclude and seat_of[partner] >= 0:
+                cost += penalties[seat_of[partner]]
+        group = self.group[student]
+        if group is not None:
+            for neighbour in self.neighbours[seat]:
+                other = occupant[neighbour]
+                if other >= 0 and other != exclude and self.group[other] == group:
+                    cost += self.weights["groups"]
+        return cost
+
+    def breakdown(self, seat_of, occupant):
+        """Total cost per constraint kind (each pair/adjacency counted once)"""
+        totals = {"keep_apart": 0.0, "front_row": 0.0, "near_door": 0.0, "groups": 0.0}
+        for student, seat in enumerate(seat_of):
+            if seat < 0:
+                continue
+            for partner in self.partners[student]:
+                if partner > student and seat_of[partner] >= 0:
+                    totals["keep_apart"] += self.apart_penalty[seat][seat_of[partner]]
+            group = self.group[student]
+            if group is not None:
+                for neighbour in self.neighbours[seat]:
+                    other = occupant[neighbour]
+                    if other > student and self.group[other] == group:
+                        totals["groups"] += self.weights["groups"]
+            if student in self.front_students:
+                totals["front_row"] += self.front_costs[seat]
+            if student in self.door_students:
+                totals["near_door"] += self.door_costs[seat]
+        return totals
+
+
+def optimize_seating(
+    students,
+    rows,
+    cols,
+    constraints=None,
+    initial=None,
+    seed=None,
+    time_budget=DEFAULT_TIME_BUDGET,
+    max_iterations=DEFAULT_MAX_ITERATIONS,
+):
+    """Arrange students to minimize the weighted constraint cost
+
+    Args:
+        students: Roster (names); students beyond the seat count stay unseated
+        rows, cols: Grid size
+        constraints: Dict with ``keep_apart``, ``front_row``, ``near_door``,
+            ``groups`` and optional ``min_distance``, ``front_rows``,
+            ``door`` and ``weights``
+        initial: Optional ``{name: (row, col)}`` starting arrangement
+        seed: Random seed for reproducible runs
+        time_budget: Seconds the search may run
+        max_iterations: Swap proposals at most
+
+    Returns:
+        dict: ``assignment`` ({name: (row, col)}), ``unseated``, ``cost``,
+        ``initial_cost``, ``violations`` (cost per constraint kind),
+        ``iterations``, ``elapsed`` and ``backend`` ("numpy"/"python")
+    """
+    started = time.perf_counter()
+    problem = SeatingProblem(students, rows, cols, constraints)
+    rng = random.Random(seed)
+    seat_count = len(problem.seats)
+
+    seat_of = [-1] * len(problem.students)
+    occupant = [-1] * seat_count
+    for student, name in enumerate(problem.students):
+        position = (initial or {}).get(name)
+        if position is not None:
+            seat = position[0] * cols + position[1]
+            in_bounds = 0 <= position[0] < rows and 0 <= position[1] < cols
+            if in_bounds and occupant[seat] < 0:
+                seat_of[student], occupant[seat] = seat, student
+    free = (seat for seat in range(seat_count) if occupant[seat] < 0)
+    for student in range(len(seat_of)):
+        if seat_of[student] < 0:
+            seat = next(free, None)
+            if seat is None:
+                break
+            seat_of[student], occupant[seat] = seat, student
+
+    def total():
+        return sum(problem.breakdown(seat_of, occupant).values())
+
+    cost = initial_cost = total()
+    best_cost, best = cost, list(seat_of)
+    iterations = 0
+    temperature = START_TEMPERATURE
+    cooling = END_TEMPERATURE / START_TEMPERATURE
+
+    while iterations < max_iterations and best_cost > 0 and seat_count > 1:
+        if iterations % 256 == 0:
+            elapsed = time.perf_counter() - started
+            if elapsed >= time_budget:
+                break
+            progress = max(iterations / max_iterations, elapsed / time_budget)
+            temperature = START_TEMPERATURE * cooling**progress
+        iterations += 1
+
+        a = rng.randrange(seat_count)
+        b = rng.randrange(seat_count)
+        first, second = occupant[a], occupant[b]
+        if a == b or (first < 0 and second < 0):
+            continue
+
+        before = after = 0.0
+        if first >= 0:
+            before += problem.local_cost(first, a, seat_of, occupant, second)
+        if second >= 0:
+            before += problem.local_cost(second, b, seat_of, occupant, first)
+
+        occupant[a], occupant[b] = second, first
+        if first >= 0:
+            seat_of[first] = b
+            after += problem.local_cost(first, b, seat_of, occupant, second)
+        if second >= 0:
+            seat_of[second] = a
+            after += problem.local_cost(second, a, seat_of, occupant, first)
+
+        delta = after - before
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            cost += delta
+            if cost < best_cost - 1e-9:
+                best_cost, best = cost, list(seat_of)
+        else:  # Undo
+            occupant[a], occupant[b] = first, second
+            if first >= 0:
+                seat_of[first] = a
+            if second >= 0:
+                seat_of[second] = b
+
+    seat_of = best
+    occupant = [-1] * seat_count
+    for student, seat in enumerate(seat_of):
+        if seat >= 0:
+            occupant[seat] = student
+    violations = problem.breakdown(seat_of, occupant)
+
+    return {
+        "assignment": {
+            problem.students[student]: problem.seats[seat]
+            for student, seat in enumerate(seat_of)
+            if seat >= 0
+        },
+        "unseated": [
+            problem.students[student]
+            for student, seat in enumerate(seat_of)
+            if seat < 0
+        ],
+        "cost": round(sum(violations.values()), 4),
+        "initial_cost": round(initial_cost, 4),
+        "violations": {kind: round(value, 4) for kind, value in violations.items()},
+        "iterations": iterations,
+        "elapsed": time.perf_counter() - started,
+        "backend": problem.backend,
+    }
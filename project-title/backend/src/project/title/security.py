@@ -10,15 +10,22 @@ import hashlib
 import secrets
 import re
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Dict, List, Any, Union
 from urllib.parse import urlparse
 
 from plone import api
-from zope.annotation.interfaces import IAnnotations
+
+from .audit_store import get_audit_store
+from .storage import get_classroom_storage
 
 logger = logging.getLogger(__name__)
 
+# Classroom state storage names (see storage.py)
+AUDIT_LOG_NAME = "security_audit_log"  # Before the audit store (upgrade 1007)
+RATE_LIMITS_NAME = "rate_limits"
+
 # FERPA-compliant data classification
 PII_FIELDS = {
     "direct_identifiers": [
@@ -357,11 +364,8 @@ def audit_log_hall_pass(
         details: Additional non-PII details
     """
     try:
-        portal = api.portal.get()
-        annotations = IAnnotations(portal, {})
-
-        # Get or create audit log
-        audit_log = annotations.get("security_audit_log", [])
+        # Append-only, bucketed per day: writers never rewrite the trail
+        audit_store = get_audit_store()
 
         # Create sanitized log entry
         log_entry = {
@@ -376,13 +380,10 @@ def audit_log_hall_pass(
             ),
         }
 
-        audit_log.append(log_entry)
+        audit_store.append(log_entry)
 
-        # Keep only last 1000 entries to prevent unbounded growth
-        if len(audit_log) > 1000:
-            audit_log = audit_log[-1000:]
-
-        annotations["security_audit_log"] = audit_log
+        # Drop the days past the retention period (a no-op most of the time)
+        audit_store.prune(PRODUCTION_SECURITY_CONFIG["audit_retention_days"])
 
         # Also log to Python logger for external monitoring
         logger.info(
@@ -488,33 +489,27 @@ def check_rate_limit(
         True if within limits, False if rate limited
     """
     try:
-        portal = api.portal.get()
-        annotations = IAnnotations(portal, {})
-
-        rate_limits = annotations.get("rate_limits", {})
-        current_time = datetime.now()
+        # One BTree entry per user/action: users only touch their own bucket
+        rate_limits = get_classroom_storage().tree(RATE_LIMITS_NAME)
+        current_time = time.time()
 
         # Create key for this user/action combination
         key = f"{hash_sensitive_data(user_id)}:{action}"
 
-        if key not in rate_limits:
-            rate_limits[key] = []
-
-        # Clean old entries outside the window
-        rate_limits[key] = [
+        # Clean old entries outside the window (stored as epoch seconds)
+        timestamps = [
             timestamp
-            for timestamp in rate_limits[key]
-            if current_time - datetime.fromisoformat(timestamp)
-            < timedelta(seconds=window)
+            for timestamp in rate_limits.get(key, ())
+            if current_time - timestamp < window
         ]
 
         # Check if under limit
-        if len(rate_limits[key]) >= limit:
+        if len(timestamps) >= limit:
             return False
 
         # Add current request
-        rate_limits[key].append(current_time.isoformat())
-        annotations["rate_limits"] = rate_limits
+        timestamps.append(current_time)
+        rate_limits[key] = tuple(timestamps)
 
         return True
 
@@ -0,0 +1,162 @@
+"""
+Conflict-Friendly Classroom State Storage
+
+High-write classroom state (picker history, audit log, rate limits, usage
+statistics) used to live in plain dicts/lists on the portal annotations.
+Every write rewrote the whole value, so any two classrooms writing at the
+same time raised a ZODB ConflictError.
+
+This module keeps that state in BTrees instead:
+
+- ``tree(name)``: an ``OOBTree`` namespace; writers touching different
+  keys only change their own bucket and BTree conflict resolution merges
+  concurrent changes.
+- ``increment(name, key)``: ``BTrees.Length`` counters, which resolve
+  concurrent increments instead of conflicting.
+- ``log(name)``: an append-only ``LOBTree`` keyed by timestamp, with a
+  ``Length`` so size checks never load the whole log.
+"""
+
+from BTrees.Length import Length
+from BTrees.LOBTree import LOBTree
+from BTrees.OOBTree import OOBTree
+from itertools import islice
+from persistent import Persistent
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+STORAGE_KEY = "project.title.classroom_state"
+
+
+class AppendLog(Persistent):
+    """Append-only log keyed by a unique nanosecond timestamp"""
+
+    def __init__(self):
+        self._entries = LOBTree()
+        self._length = Length()
+
+    def append(self, entry):
+        """Append ``entry`` and return its key"""
+        key = time.time_ns()
+        # Same-nanosecond appends in one process: bump to the next free key
+        while key in self._entries:
+            key += 1
+        self._entries[key] = entry
+        self._length.change(1)
+        return key
+
+    def entries(self, offset=0, limit=None):
+        """Entries in chronological order, paginated without loading all"""
+        stop = None if limit is None else offset + limit
+        return list(islice(self._entries.values(), offset, stop))
+
+    def items(self, min=None, max=None):
+        """``(key, entry)`` pairs within an optional key range"""
+        return self._entries.items(min=min, max=max)
+
+    def __len__(self):
+        return self._length()
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+
+class ClassroomStateStorage(Persistent):
+    """Named BTree namespaces, conflict-resolving counters and append logs"""
+
+    def __init__(self):
+        self._trees = OOBTree()
+        self._counters = OOBTree()
+        self._logs = OOBTree()
+
+    # Keyed state
+
+    def tree(self, name):
+        """Return the ``OOBTree`` for ``name``, creating it on first write"""
+        tree = self._trees.get(name)
+        if tree is None:
+            tree = self._trees[name] = OOBTree()
+        return tree
+
+    def get_tree(self, name, default=None):
+        """Read-only lookup that never creates a namespace"""
+        return self._trees.get(name, default)
+
+    def drop_tree(self, name):
+        if name in self._trees:
+            del self._trees[name]
+            return True
+        return False
+
+    def tree_names(self, prefix=None):
+        if prefix is None:
+            return list(self._trees.keys())
+        names = []
+        for name in self._trees.keys(min=prefix):
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return names
+
+    # Counters
+
+    def increment(self, name, key, delta=1):
+        """Add ``delta`` to a counter; concurrent increments do not conflict"""
+        counters = self._counters.get(name)
+        if counters is None:
+            counters = self._counters[name] = OOBTree()
+        counter = counters.get(key)
+        if counter is None:
+            counter = counters[key] = Length()
+        counter.change(delta)
+        return counter()
+
+    def counter_value(self, name, key, default=0):
+        counters = self._counters.get(name)
+        if counters is None or key not in counters:
+            return default
+        return counters[key]()
+
+    def counters(self, name):
+        """All counters in a namespace as a plain ``{key: value}`` dict"""
+        counters = self._counters.get(name)
+        if counters is None:
+            return {}
+        return {key: counter() for key, counter in counters.items()}
+
+    # Logs
+
+    def log(self, name):
+        """Return the ``AppendLog`` for ``name``, creating it on first write"""
+        log = self._logs.get(name)
+        if log is None:
+            log = self._logs[name] = AppendLog()
+        return log
+
+    def get_log(self, name):
+        """Read-only lookup that never creates a log"""
+        return self._logs.get(name)
+
+    def drop_log(self, name):
+        if name in self._logs:
+            del self._logs[name]
+            return True
+        return False
+
+
+def get_classroom_storage(portal=None, create=True):
+    """Return the site's classroom state storage from portal annotations
+
+    Pass ``create=False`` on read-only (GET) code paths so that merely
+    viewing data never writes to the ZODB.
+    """
+    portal = portal or api.portal.get()
+    annotations = IAnnotations(portal)
+    storage = annotations.get(STORAGE_KEY)
+    if storage is None and create:
+        storage = annotations[STORAGE_KEY] = ClassroomStateStorage()
+    return storage
@@ -6,6 +6,8 @@ from plone.app.testing import IntegrationTesting
 from plone.app.testing import PloneSandboxLayer
 from plone.testing.zope import WSGI_SERVER_FIXTURE
 
+import time
+
 import project.title
 
 
@@ -47,3 +49,104 @@ ACCEPTANCE_TESTING = FunctionalTesting(
     ),
     name="Project.TitleLayer:AcceptanceTesting",
 )
+
+
+class FakeRedis:
+    """In-memory stand-in for ``redis.Redis`` (the subset the cache and the
+    dashboard delta bus use)
+
+    Values are stored as bytes like the real client returns them. Several
+    ``RedisBackend`` or ``RedisDeltaBus`` instances sharing one FakeRedis
+    behave like Zope instances sharing one Redis server.
+    """
+
+    def __init__(self):
+        self.data = {}  # key -> (bytes, expires or None)
+        self.sorted_sets = {}  # key -> {member bytes: score}
+
+    def _alive(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            entry = None
+        return entry
+
+    @staticmethod
+    def _bytes(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    def get(self, key):
+        entry = self._alive(key)
+        return entry[0] if entry else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._alive(key):
+            return None
+        expires = None
+        if ex is not None:
+            expires = time.monotonic() + ex
+        elif px is not None:
+            expires = time.monotonic() + px / 1000
+        self.data[key] = (self._bytes(value), expires)
+        return True
+
+    def incr(self, key, amount=1):
+        entry = self._alive(key)
+        value = int(entry[0]) + amount if entry else amount
+        self.data[key] = (self._bytes(value), entry[1] if entry else None)
+        return value
+
+    def delete(self, *keys):
+        return sum(
+            1
+            for key in keys
+            if (self.data.pop(key, None) or self.sorted_sets.pop(key, None))
+            is not None
+        )
+
+    def scan_iter(self, match="*"):
+        prefix = match.rstrip("*")
+        keys = list(self.data) + list(self.sorted_sets)
+        return [key for key in keys if key.startswith(prefix)]
+
+    def _ranked(self, key):
+        members = self.sorted_sets.get(key, {})
+        return sorted(members.items(), key=lambda item: (item[1], item[0]))
+
+    @staticmethod
+    def _rank_slice(items, start, end):
+        start = max(start + len(items) if start < 0 else start, 0)
+        end = end + len(items) if end < 0 else end
+        return items[start : end + 1] if end >= 0 else []
+
+    def zadd(self, key, mapping):
+        members = self.sorted_sets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            member = self._bytes(member)
+            added += member not in members
+            members[member] = float(score)
+        return added
+
+    def zrange(self, key, start, end, withscores=False):
+        items = self._rank_slice(self._ranked(key), start, end)
+        return items if withscores else [member for member, _ in items]
+
+    def zrangebyscore(self, key, min, max):
+        low = float(min)
+        high = float("inf") if max == "+inf" else float(max)
+        return [
+            member for member, score in self._ranked(key) if low <= score <= high
+        ]
+
+    def zremrangebyrank(self, key, start, end):
+        members = self.sorted_sets.get(key, {})
+        doomed = self._rank_slice(self._ranked(key), start, end)
+        for member, _ in doomed:
+            del members[member]
+        return len(doomed)
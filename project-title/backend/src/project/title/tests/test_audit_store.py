@@ -0,0 +1,112 @@
+"""
+Audit Store Tests
+
+Entries are bucketed per day, queried and counted by time range, pruned
+by retention period and exported as JSON lines or CSV through the
+security middleware.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import json
+import unittest
+
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.audit_store import get_audit_store
+from project.title.audit_store import to_key
+from project.title.security import AUDIT_LOG_NAME
+from project.title.storage import get_classroom_storage
+from project.title.testing import INTEGRATION_TESTING
+from project.title.upgrades.v1007 import migrate_audit_log
+
+
+class TestAuditStore(unittest.TestCase):
+    """Day buckets, ranges, retention and export"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.store = get_audit_store(self.portal)
+        self.today = datetime.now().replace(hour=12, minute=0, second=0)
+        for days in (0, 1, 2, 3):
+            when = self.today - timedelta(days=days)
+            for n in range(2):
+                self.store.append(
+                    {"action": f"day-{days}-{n}", "details": {"n": n}},
+                    key=to_key(when + timedelta(minutes=n)),
+                )
+
+    def actions(self, entries):
+        return [entry["action"] for entry in entries]
+
+    def test_range_queries(self):
+        start = self.today - timedelta(days=2)
+        end = self.today - timedelta(days=1, minutes=-1)
+
+        self.assertEqual(len(self.store.buckets), 4)
+        self.assertEqual(
+            self.actions(self.store.entries(start, end)),
+            ["day-2-0", "day-2-1", "day-1-0"],
+        )
+        self.assertEqual(self.store.count(start, end), 3)
+        self.assertEqual(self.store.count(start), 6)
+        self.assertEqual(self.store.count(), 8)
+        self.assertEqual(
+            self.actions(self.store.entries(start, offset=1, limit=2)),
+            ["day-2-1", "day-1-0"],
+        )
+
+    def test_prune(self):
+        removed = self.store.prune(2, now=self.today)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(len(self.store), 6)
+        self.assertEqual(self.actions(self.store.entries(limit=1)), ["day-2-0"])
+        self.assertEqual(self.store.prune(2, now=self.today), 0)
+
+    def test_export(self):
+        self.request["format"] = "csv"
+        self.request["start"] = self.today.isoformat()
+        view = self.portal.restrictedTraverse("@@security-middleware")
+        view.subpath = ["audit-export"]
+
+        lines = view().decode("utf-8").splitlines()
+
+        self.assertEqual(lines[0].split(",")[:2], ["timestamp", "action"])
+        actions = [line.split(",")[1] for line in lines[1:]]
+        self.assertEqual(actions, ["day-0-0", "day-0-1"])
+        self.assertTrue(
+            self.request.response.getHeader("Content-Type").startswith("text/csv")
+        )
+
+        self.request["format"] = "jsonl"
+        lines = view().decode("utf-8").splitlines()
+        self.assertEqual(json.loads(lines[1])["details"], {"n": 1})
+
+    def test_audit_log_endpoint_range(self):
+        self.request["start"] = (self.today - timedelta(days=1)).isoformat()
+        view = self.portal.restrictedTraverse("@@security-middleware")
+        view.subpath = ["audit-log"]
+
+        result = json.loads(view())
+
+        self.assertEqual(result["total_entries"], 4)
+        self.assertEqual(result["entries"][0]["action"], "day-1-0")
+
+    def test_migration(self):
+        log = get_classroom_storage(self.portal).log(AUDIT_LOG_NAME)
+        key = log.append({"action": "migrated"})
+        when = self.today - timedelta(days=5)
+        log.append({"action": "dated", "timestamp": when.isoformat()})
+
+        migrate_audit_log(None)
+
+        self.assertIsNone(get_classroom_storage(self.portal).get_log(AUDIT_LOG_NAME))
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(self.actions(self.store.entries(key, key + 1)), ["migrated"])
+        self.assertEqual(self.actions(self.store.entries(limit=1)), ["dated"])
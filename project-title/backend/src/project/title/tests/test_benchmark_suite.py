@@ -0,0 +1,133 @@
+"""
+Benchmark Suite
+
+Statistics and baseline comparison, plus a run of the endpoint benchmarks
+on a generated district (see ``project.title.benchmark`` for the sizes).
+
+``make benchmark`` compares the run with ``BENCHMARK_BASELINE`` and fails
+on regressions; ``make benchmark-baseline`` stores the run as the new
+baseline. ``BENCHMARK_RESULTS`` names a file for the JSON results.
+"""
+
+import os
+import unittest
+
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title import benchmark
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestBenchmarkStatistics(unittest.TestCase):
+    """Percentiles, environment sizes and baseline comparison"""
+
+    def test_summarize(self):
+        summary = benchmark.summarize([i / 1000 for i in range(1, 101)])
+
+        self.assertEqual(summary["n"], 100)
+        self.assertEqual(summary["p50_ms"], 50.0)
+        self.assertEqual(summary["p95_ms"], 95.0)
+        self.assertEqual(summary["p99_ms"], 99.0)
+        self.assertEqual((summary["min_ms"], summary["max_ms"]), (1.0, 100.0))
+
+    def test_scale_from_environ(self):
+        scale = benchmark.Scale.from_environ(
+            {"BENCHMARK_SCHOOLS": "3", "BENCHMARK_STUDENTS": "40"}
+        )
+
+        self.assertEqual(scale.schools, 3)
+        self.assertEqual(scale.students, 40)
+        self.assertEqual(scale.classrooms, 2)
+
+    def test_compare(self):
+        baseline = {
+            "results": {
+                "dashboard:warm": {"p95_ms": 10.0},
+                "picker_pick:warm": {"p95_ms": 10.0},
+                "retired:warm": {"p95_ms": 1.0},
+            }
+        }
+        results = {
+            "dashboard:warm": {"p95_ms": 20.0},
+            "picker_pick:warm": {"p95_ms": 14.0},
+            "seating_update:warm": {"p95_ms": 500.0},
+        }
+
+        regressions = benchmark.compare(results, baseline, tolerance=0.25, slack_ms=2)
+
+        self.assertEqual(
+            regressions,
+            [
+                {
+                    "case": "dashboard:warm",
+                    "metric": "p95_ms",
+                    "baseline_ms": 10.0,
+                    "result_ms": 20.0,
+                    "limit_ms": 14.5,
+                }
+            ],
+        )
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Endpoint benchmarks on a generated district"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.scale = benchmark.Scale.from_environ()
+        self.iterations = int(
+            os.environ.get("BENCHMARK_ITERATIONS", benchmark.DEFAULT_ITERATIONS)
+        )
+        self.district = benchmark.generate_district(self.portal, self.scale)
+
+    def tearDown(self):
+        benchmark.reset_caches()
+
+    def test_endpoints(self):
+        counts = self.district["counts"]
+        self.assertEqual(
+            counts["classrooms"], self.scale.schools * self.scale.classrooms
+        )
+
+        cases = benchmark.endpoint_cases(self.portal, self.request, self.district)
+        results = benchmark.run_suite(
+            cases,
+            iterations=self.iterations,
+            reset=lambda: benchmark.reset_caches(self.district),
+        )
+        document = benchmark.results_document(results, self.scale, self.iterations)
+
+        self.assertEqual(len(results), len(cases) * len(benchmark.MODES))
+        for case, summary in results.items():
+            self.assertEqual(summary["n"], self.iterations, case)
+            self.assertLessEqual(summary["p50_ms"], summary["p99_ms"], case)
+
+        if os.environ.get("BENCHMARK_RESULTS"):
+            benchmark.write_results(os.environ["BENCHMARK_RESULTS"], document)
+
+        baseline_path = os.environ.get("BENCHMARK_BASELINE")
+        if os.environ.get("BENCHMARK_WRITE_BASELINE"):
+            benchmark.write_results(baseline_path, document)
+            return
+
+        baseline = benchmark.load_baseline(baseline_path)
+        if baseline is None:
+            return
+        tolerance = float(
+            os.environ.get("BENCHMARK_TOLERANCE", benchmark.DEFAULT_TOLERANCE)
+        )
+        regressions = benchmark.compare(results, baseline, tolerance=tolerance)
+        self.assertEqual(
+            regressions,
+            [],
+            "Slower than the baseline: "
+            + ", ".join(
+                f"{r['case']} {r['result_ms']}ms > {r['limit_ms']}ms"
+                for r in regressions
+            ),
+        )
@@ -0,0 +1,127 @@
+"""
+Cache Backend Tests
+
+Local LRU and Redis backends (against the FakeRedis test double):
+TTLs, eviction, shared invalidation and single-flight recompute.
+"""
+
+import threading
+import time
+import unittest
+
+from project.title.cache_backends import backend_from_environment
+from project.title.cache_backends import LocalLRUBackend
+from project.title.cache_backends import MISSING
+from project.title.cache_backends import RedisBackend
+from project.title.testing import FakeRedis
+
+
+class TestLocalLRUBackend(unittest.TestCase):
+    def test_lru_eviction(self):
+        backend = LocalLRUBackend(maxsize=2)
+        backend.set("a", 1, ttl=60)
+        backend.set("b", 2, ttl=60)
+        backend.get("a")
+        backend.set("c", 3, ttl=60)
+
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIs(backend.get("b"), MISSING)
+        self.assertEqual(len(backend), 2)
+
+    def test_ttl_expiry(self):
+        backend = LocalLRUBackend()
+        backend.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIs(backend.get("a"), MISSING)
+
+    def test_counters_survive_eviction(self):
+        backend = LocalLRUBackend(maxsize=1)
+        backend.increment(["hallpass"])
+        backend.set("a", 1, ttl=60)
+        backend.set("b", 2, ttl=60)
+        self.assertEqual(backend.counters(["hallpass", "other"]), [1, 0])
+
+
+class TestRedisBackend(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        # Two Zope instances sharing one Redis
+        self.first = RedisBackend(self.redis)
+        self.second = RedisBackend(self.redis)
+
+    def test_values_are_shared_and_serialized(self):
+        value = {"active": 3, "passes": [{"id": "p1"}]}
+        self.first.set("dashboard", value, ttl=30)
+
+        cached = self.second.get("dashboard")
+        self.assertEqual(cached, value)
+        self.assertIsNot(cached, value)
+
+    def test_invalidation_reaches_other_instances(self):
+        self.first.increment(["hallpass:/plone"])
+        self.assertEqual(self.second.counters(["hallpass:/plone"]), [1])
+
+    def test_recompute_after_other_instance_gives_up(self):
+        """A held lock makes waiters poll, then compute themselves"""
+        self.assertIsNotNone(self.first.acquire("k", timeout=10))
+        value, hit = self.second.get_or_compute("k", lambda: 42, ttl=30, lock_timeout=0.1)
+        self.assertEqual((value, hit), (42, False))
+
+    def test_broken_connection_computes_locally(self):
+        class Down:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("redis down")
+
+                return fail
+
+        backend = RedisBackend(Down())
+        self.assertEqual(backend.get_or_compute("k", lambda: 7, ttl=30), (7, False))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_misses_compute_once(self):
+        backend = RedisBackend(FakeRedis())
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        def worker():
+            results.append(backend.get_or_compute("aggregates", compute, ttl=30))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(hit for _, hit in results), [False] + [True] * 7)
+
+    def test_nested_computes_do_not_deadlock(self):
+        """A compute may call get_or_compute for another key"""
+        backend = LocalLRUBackend()
+        results = []
+
+        def outer():
+            inner = backend.get_or_compute("k14", lambda: 1, ttl=30)[0]
+            return inner + 1
+
+        # "a" and "k14" used to share one of the striped single-flight locks
+        thread = threading.Thread(
+            target=lambda: results.append(backend.get_or_compute("a", outer, ttl=30))
+        )
+        thread.start()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [(2, False)])
+
+
+class TestBackendSelection(unittest.TestCase):
+    def test_local_without_redis_host(self):
+        self.assertEqual(backend_from_environment({}).name, "local")
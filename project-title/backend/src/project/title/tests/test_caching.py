@@ -0,0 +1,130 @@
+"""
+Tagged RAM Cache Tests
+
+Cache keys are scoped per site/context/user and entries are invalidated
+only by changes to the classrooms they depend on.
+"""
+
+import unittest
+from datetime import datetime
+
+from plone import api
+from plone.app.testing import login
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.cache_backends import LocalLRUBackend
+from project.title.cache_backends import set_cache_backend
+from project.title.caching import cache_stats
+from project.title.caching import cached
+from project.title.caching import CONTEXT
+from project.title.caching import HALL_PASSES
+from project.title.caching import SITE
+from project.title.caching import tags_for_path
+from project.title.testing import INTEGRATION_TESTING
+
+CALLS = []
+
+
+class RoomView:
+    """Minimal view: cached methods are keyed on ``context``"""
+
+    def __init__(self, context):
+        self.context = context
+
+    @cached(HALL_PASSES, ttl=3600, scope=(SITE, CONTEXT))
+    def room_passes(self):
+        CALLS.append(self.context.getId())
+        return len(CALLS)
+
+    @cached(HALL_PASSES, ttl=3600)
+    def site_passes(self):
+        CALLS.append("site")
+        return len(CALLS)
+
+
+class TestTags(unittest.TestCase):
+    def test_tags_cover_ancestors(self):
+        self.assertEqual(
+            tags_for_path("hallpass", "/plone/room-1"),
+            ["hallpass:/plone/room-1", "hallpass:/plone"],
+        )
+
+
+class TestTaggedCache(unittest.TestCase):
+    """Invalidation follows hall pass events"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.room1 = api.content.create(self.portal, "Folder", id="room-1")
+        self.room2 = api.content.create(self.portal, "Folder", id="room-2")
+        self.previous = set_cache_backend(LocalLRUBackend())
+        del CALLS[:]
+        cache_stats.reset()
+
+    def tearDown(self):
+        set_cache_backend(self.previous)
+
+    def add_pass(self, room, id):
+        return api.content.create(
+            container=room,
+            type="HallPass",
+            id=id,
+            student_name="Student",
+            destination="Library",
+            issue_time=datetime.now(),
+        )
+
+    def test_context_scoped_keys(self):
+        """Each classroom has its own entry"""
+        first = RoomView(self.room1).room_passes()
+        self.assertEqual(RoomView(self.room1).room_passes(), first)
+        self.assertNotEqual(RoomView(self.room2).room_passes(), first)
+
+    def test_change_invalidates_only_affected_classroom(self):
+        room1 = RoomView(self.room1).room_passes()
+        room2 = RoomView(self.room2).room_passes()
+        site = RoomView(self.room2).site_passes()
+
+        self.add_pass(self.room1, "pass-1")
+
+        self.assertNotEqual(RoomView(self.room1).room_passes(), room1)
+        self.assertEqual(RoomView(self.room2).room_passes(), room2)
+        self.assertNotEqual(RoomView(self.room2).site_passes(), site)
+
+    def test_hit_miss_counters(self):
+        view = RoomView(self.room1)
+        view.room_passes()
+        view.room_passes()
+        view.room_passes()
+
+        name = f"{__name__}.RoomView.room_passes"
+        stats = cache_stats.snapshot()["functions"][name]
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_catalog_caches_are_per_user(self):
+        """Users who may see different charts never share an entry"""
+        api.portal.get_tool("portal_workflow").setDefaultChain(
+            "simple_publication_workflow"
+        )
+        for room, user_id in ((self.room1, "teacher-a"), (self.room2, "teacher-b")):
+            api.user.create(email=f"{user_id}@example.com", username=user_id)
+            chart = api.content.create(
+                container=room, type="SeatingChart", id="chart", title=user_id
+            )
+            chart.manage_setLocalRoles(user_id, ["Reader"])
+            chart.reindexObjectSecurity()
+
+        titles = []
+        for user_id in ("teacher-a", "teacher-b"):
+            login(self.portal, user_id)
+            view = api.content.get_view(
+                "teacher-dashboard", self.portal, self.layer["request"]
+            )
+            seating = view.get_current_seating_optimized()
+            titles.append(seating["current_chart"]["title"])
+
+        self.assertEqual(titles, ["teacher-a", "teacher-b"])
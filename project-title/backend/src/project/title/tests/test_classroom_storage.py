@@ -0,0 +1,69 @@
+"""
+Classroom State Storage Tests
+
+Covers the BTree-backed storage for high-write classroom state and the
+1001 -> 1002 migration from plain portal annotations.
+"""
+
+import unittest
+from datetime import datetime
+
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from zope.annotation.interfaces import IAnnotations
+
+from project.title.storage import get_classroom_storage
+from project.title.testing import INTEGRATION_TESTING
+from project.title.upgrades.v1002 import migrate_classroom_state
+
+
+class TestClassroomStateStorage(unittest.TestCase):
+    """Trees, counters and append logs behave like the old annotations"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+
+    def test_read_does_not_create_storage(self):
+        """Read-only lookups never write to the portal annotations"""
+        self.assertIsNone(get_classroom_storage(self.portal, create=False))
+
+    def test_counters_and_log(self):
+        """Counters accumulate and the log pages in chronological order"""
+        storage = get_classroom_storage(self.portal)
+        storage.increment("stats", "total", 2)
+        storage.increment("stats", "total", 3)
+        self.assertEqual(storage.counters("stats"), {"total": 5})
+
+        log = storage.log("audit")
+        for i in range(5):
+            log.append({"n": i})
+        self.assertEqual(len(log), 5)
+        self.assertEqual([e["n"] for e in log.entries(2)], [2, 3, 4])
+        self.assertEqual([e["n"] for e in log.entries(1, 1)], [1])
+
+    def test_migration_moves_annotation_state(self):
+        """The upgrade step copies old values and removes the old keys"""
+        annotations = IAnnotations(self.portal)
+        annotations["picker_history_2025-01-01"] = {"Ada": {"count": 2, "picks": []}}
+        annotations["security_audit_log"] = [{"action": "issued"}]
+        annotations["rate_limits"] = {"abc:issue": [datetime.now().isoformat()]}
+        annotations["hall_pass_statistics"] = {"total_passes": 4, "total_duration": 20}
+        annotations["timer_usage_stats"] = {"focus": {"count": 1, "total_duration": 300}}
+
+        migrate_classroom_state(None)
+
+        storage = get_classroom_storage(self.portal)
+        self.assertEqual(
+            storage.get_tree("picker_history_2025-01-01")["Ada"]["count"], 2
+        )
+        self.assertEqual(storage.log("security_audit_log").entries()[0]["action"], "issued")
+        self.assertEqual(len(storage.tree("rate_limits")["abc:issue"]), 1)
+        self.assertEqual(storage.counter_value("hall_pass_statistics", "total_passes"), 4)
+        self.assertEqual(
+            storage.counter_value("timer_usage_stats", ("focus", "total_duration")), 300
+        )
+        for key in ("security_audit_log", "rate_limits", "hall_pass_statistics"):
+            self.assertNotIn(key, annotations)
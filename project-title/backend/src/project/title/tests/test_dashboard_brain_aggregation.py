@@ -0,0 +1,231 @@
+"""
+Brain-only Dashboard Aggregation Tests and Benchmark
+
+Verifies that the teacher dashboard is built from catalog metadata only
+(no getObject() calls) and that its latency stays flat as the number of
+HallPass objects grows.
+
+The default run grows the site from 100 to 1,000 passes. For the full
+district-sized run set, for example:
+
+    BENCHMARK_HALL_PASS_SCALES=100,1000,10000,100000 make test
+"""
+
+import os
+import statistics
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from DateTime import DateTime
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from Products.ZCatalog.CatalogBrains import AbstractCatalogBrain
+
+from project.title.testing import INTEGRATION_TESTING
+from project.title.optimizations import (
+    aggregate_hall_passes_from_brains,
+    aggregate_seating_from_brains,
+    query_active_hall_passes,
+    query_overdue_hall_passes,
+)
+
+ACTIVE_PASSES = 5
+
+
+def _scales():
+    raw = os.environ.get("BENCHMARK_HALL_PASS_SCALES", "100,1000")
+    return sorted(int(value) for value in raw.split(",") if value.strip())
+
+
+class TestBrainOnlyDashboard(unittest.TestCase):
+    """Dashboard aggregation must not wake up persistent objects"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.catalog = api.portal.get_tool("portal_catalog")
+
+        now = datetime.now()
+        for i in range(3):
+            hall_pass = api.content.create(
+                container=self.portal,
+                type="HallPass",
+                id=f"pass-{i}",
+                title=f"Hall Pass {i}",
+                student_name=f"Student{i}",
+                destination="Library",
+                issue_time=now - timedelta(minutes=i * 8),
+                expected_duration=5,
+            )
+            if i == 0:
+                hall_pass.return_time = now
+            hall_pass.reindexObject()
+
+        api.content.create(
+            container=self.portal,
+            type="SeatingChart",
+            id="chart-1",
+            title="Period 1",
+            students=[f"Student{j}" for j in range(25)],
+        )
+
+    def test_aggregation_uses_metadata_only(self):
+        """Aggregating hall passes and seating never calls getObject()"""
+        with mock.patch.object(
+            AbstractCatalogBrain,
+            "getObject",
+            side_effect=AssertionError("getObject() called"),
+        ):
+            hall_passes = aggregate_hall_passes_from_brains(self.catalog)
+            seating = aggregate_seating_from_brains(self.catalog)
+
+        self.assertEqual(hall_passes["active"], 2)
+        self.assertEqual(hall_passes["total_today"], 3)
+        self.assertEqual(seating["total_students"], 25)
+        self.assertEqual(seating["active_charts"], 1)
+
+        levels = {p["student_name"]: p["alert_level"] for p in hall_passes["passes"]}
+        self.assertEqual(levels["Student1"], "yellow")  # 8 min out, 5 expected
+        self.assertEqual(levels["Student2"], "red")  # 16 min out, 5 expected
+        self.assertEqual(hall_passes["overdue"], 1)
+
+    def test_batch_api_lists_active_passes(self):
+        view = api.content.get_view("api-batch", self.portal, self.request)
+
+        data = view.get_hall_passes_batch()
+
+        self.assertEqual(
+            sorted(p["id"] for p in data["active_passes"]), ["pass-1", "pass-2"]
+        )
+        issue_time = data["active_passes"][0]["issue_time"]
+        self.assertIsInstance(datetime.fromisoformat(issue_time), datetime)
+
+    def test_dashboard_view_matches_aggregation(self):
+        """The @@teacher-dashboard JSON is built from the brain aggregation"""
+        import json
+
+        view = api.content.get_view("teacher-dashboard", self.portal, self.request)
+        data = json.loads(view.get_dashboard_data())
+
+        self.assertTrue(data["success"])
+        self.assertEqual(data["hall_passes"]["active"], 2)
+        self.assertEqual(data["seating"]["total_students"], 25)
+
+
+class TestOverdueDateQuery(unittest.TestCase):
+    """Overdue-now queries come from the expected return date index"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.catalog = api.portal.get_tool("portal_catalog")
+        self.now = datetime.now()
+
+        for pass_id, minutes_out, returned in (
+            ("on-time", 2, False),
+            ("late", 12, False),
+            ("very-late", 30, False),
+            ("returned-late", 40, True),
+        ):
+            hall_pass = api.content.create(
+                container=self.portal,
+                type="HallPass",
+                id=pass_id,
+                student_name=pass_id,
+                destination="Library",
+                issue_time=self.now - timedelta(minutes=minutes_out),
+                expected_duration=5,
+            )
+            if returned:
+                hall_pass.mark_returned()
+
+    def test_overdue_is_a_single_range_query(self):
+        """Active passes past their expected return, without getObject()"""
+        with mock.patch.object(
+            AbstractCatalogBrain,
+            "getObject",
+            side_effect=AssertionError("getObject() called"),
+        ):
+            overdue = [b.getId for b in query_overdue_hall_passes(self.catalog)]
+            red = [
+                b.getId
+                for b in query_overdue_hall_passes(self.catalog, grace_minutes=10)
+            ]
+
+        self.assertEqual(overdue, ["very-late", "late"])
+        self.assertEqual(red, ["very-late"])
+
+    def test_overdue_moves_with_the_clock(self):
+        """The same index answers later times with no reindexing"""
+        later = self.now + timedelta(minutes=10)
+        overdue = query_overdue_hall_passes(self.catalog, now=later)
+
+        self.assertEqual(len(overdue), 3)
+
+    def test_active_sorted_longest_out_first(self):
+        active = [b.getId for b in query_active_hall_passes(self.catalog)]
+        self.assertEqual(active, ["very-late", "late", "on-time"])
+
+
+class TestBrainOnlyDashboardBenchmark(unittest.TestCase):
+    """Dashboard latency must not grow with the total HallPass count"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.catalog = api.portal.get_tool("portal_catalog")
+        self.created = 0
+
+    def grow_to(self, count):
+        """Add yesterday's passes (a fixed few still active) up to count"""
+        issued = datetime.now() - timedelta(days=1)
+        while self.created < count:
+            hall_pass = api.content.create(
+                container=self.portal,
+                type="HallPass",
+                id=f"bench-{self.created}",
+                student_name=f"Student{self.created % 500}",
+                destination="Restroom",
+                issue_time=issued,
+            )
+            # Historical passes: created yesterday, mostly returned
+            hall_pass.creation_date = DateTime(issued)
+            if self.created >= ACTIVE_PASSES:
+                hall_pass.return_time = issued + timedelta(minutes=4)
+            hall_pass.reindexObject(idxs=["created", "hall_pass_is_active"])
+            self.created += 1
+
+    def median_latency(self, iterations=20):
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            aggregate_hall_passes_from_brains(self.catalog)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    def test_latency_flat_as_hall_passes_grow(self):
+        """Median aggregation time at the largest scale stays near the smallest"""
+        results = {}
+        for scale in _scales():
+            self.grow_to(scale)
+            results[scale] = self.median_latency()
+            print(f"📊 {scale:>7} hall passes: {results[scale] * 1000:.2f}ms")
+
+        smallest, largest = results[min(results)], results[max(results)]
+        # Allow noise, but nothing close to the linear growth of a full scan
+        self.assertLess(
+            largest,
+            max(smallest * 3, 0.005),
+            f"Dashboard aggregation grew from {smallest * 1000:.2f}ms to "
+            f"{largest * 1000:.2f}ms as hall passes increased",
+        )
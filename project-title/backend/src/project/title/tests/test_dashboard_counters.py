@@ -0,0 +1,135 @@
+"""
+Dashboard Counter Store Tests
+
+Covers the incrementally maintained hall pass counters: lifecycle hooks,
+idempotent event handling, overdue detection and catalog reconciliation.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from zope.annotation.interfaces import IAnnotations
+from zope.event import notify
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from project.title.counters import (
+    COUNTERS_KEY,
+    classroom_key,
+    ClassroomCounters,
+    dashboard_counter_snapshot,
+    reconcile_dashboard_counters,
+)
+from project.title.event_handlers import fire_hall_pass_issued
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestDashboardCounters(unittest.TestCase):
+    """Counters follow hall pass creation and return"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.room = api.content.create(
+            container=self.portal, type="Folder", id="room-101", title="Room 101"
+        )
+
+    def create_pass(self, pass_id, minutes_ago=0):
+        return api.content.create(
+            container=self.room,
+            type="HallPass",
+            id=pass_id,
+            student_name=f"Student {pass_id}",
+            destination="Library",
+            issue_time=datetime.now() - timedelta(minutes=minutes_ago),
+            expected_duration=5,
+        )
+
+    def test_creation_counts_active_and_today(self):
+        """Adding passes increments active and today's totals"""
+        self.create_pass("pass-1")
+        self.create_pass("pass-2")
+
+        snapshot = dashboard_counter_snapshot(self.portal)
+        self.assertEqual(snapshot["active"], 2)
+        self.assertEqual(snapshot["today_total"], 2)
+        self.assertEqual(snapshot["overdue"], 0)
+
+        room = dashboard_counter_snapshot(self.portal, classroom_key(self.room["pass-1"]))
+        self.assertEqual(room["active"], 2)
+
+    def test_mark_returned_decrements_active_once(self):
+        """Returning a pass is idempotent across hooks"""
+        hall_pass = self.create_pass("pass-1")
+        hall_pass.mark_returned()
+        hall_pass.mark_returned()
+
+        snapshot = dashboard_counter_snapshot(self.portal)
+        self.assertEqual(snapshot["active"], 0)
+        self.assertEqual(snapshot["today_total"], 1)
+
+    def test_issued_event_does_not_double_count(self):
+        """Firing the issued event for existing content is a no-op"""
+        hall_pass = self.create_pass("pass-1")
+        fire_hall_pass_issued(hall_pass, student_name="x", destination="Library")
+
+        self.assertEqual(dashboard_counter_snapshot(self.portal)["active"], 1)
+
+    def test_overdue_from_deadline(self):
+        """Passes past expected duration + grace period count as overdue"""
+        self.create_pass("pass-1", minutes_ago=30)
+        self.create_pass("pass-2", minutes_ago=1)
+
+        self.assertEqual(dashboard_counter_snapshot(self.portal)["overdue"], 1)
+
+    def test_move_and_rename_follow_the_pass(self):
+        """Moved or renamed passes keep being counted once, in their new room"""
+        hall_pass = self.create_pass("pass-1", minutes_ago=30)
+        room_202 = api.content.create(
+            container=self.portal, type="Folder", id="room-202", title="Room 202"
+        )
+
+        hall_pass = api.content.move(source=hall_pass, target=room_202)
+        hall_pass = api.content.rename(obj=hall_pass, new_id="pass-2")
+
+        self.assertEqual(
+            dashboard_counter_snapshot(self.portal),
+            {"active": 1, "today_total": 1, "overdue": 1},
+        )
+        room_101 = "/".join(self.room.getPhysicalPath())
+        old_room = dashboard_counter_snapshot(self.portal, room_101)
+        self.assertEqual(old_room["active"], 0)
+        new_room = dashboard_counter_snapshot(self.portal, classroom_key(hall_pass))
+        self.assertEqual(new_room["overdue"], 1)
+
+    def test_edit_setting_return_time_decrements_active(self):
+        hall_pass = self.create_pass("pass-1")
+        hall_pass.return_time = datetime.now()
+        notify(ObjectModifiedEvent(hall_pass))
+
+        self.assertEqual(dashboard_counter_snapshot(self.portal)["active"], 0)
+
+    def test_reconcile_rebuilds_from_catalog(self):
+        """Reconcile restores counters after the store is lost"""
+        self.create_pass("pass-1")
+        self.create_pass("pass-2").mark_returned()
+        del IAnnotations(self.portal)[COUNTERS_KEY]
+
+        snapshot = reconcile_dashboard_counters(self.portal)
+
+        self.assertEqual(snapshot["active"], 1)
+        self.assertEqual(snapshot["today_total"], 2)
+
+    def test_new_day_drops_old_issued_totals(self):
+        """The first pass of a day prunes the previous days' sets"""
+        counters = ClassroomCounters()
+        counters.add_issued("a", "2026-01-01", 1.0)
+        counters.add_issued("b", "2026-01-02", 2.0)
+
+        self.assertEqual(list(counters.issued), ["2026-01-02"])
+        self.assertEqual(list(counters.issued_count), ["2026-01-02"])
+        self.assertEqual(counters.active_count(), 2)
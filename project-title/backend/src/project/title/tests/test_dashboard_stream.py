@@ -0,0 +1,179 @@
+"""
+Dashboard Delta Stream Tests
+
+Uses a fresh LocalDeltaBus as the stand-in publisher (RedisDeltaBus runs
+on FakeRedis); deltas reach the bus only when the transaction's
+after-commit hooks run.
+"""
+
+import json
+import unittest
+from datetime import datetime
+from datetime import timedelta
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+import transaction
+
+from project.title.browser.dashboard_stream import POLL_INTERVAL
+from project.title.counters import classroom_key
+from project.title.counters import get_dashboard_counters
+from project.title.counters import record_hall_pass_issued
+from project.title.dashboard_stream import LocalDeltaBus
+from project.title.dashboard_stream import RedisDeltaBus
+from project.title.dashboard_stream import set_delta_bus
+from project.title.testing import FakeRedis
+from project.title.testing import INTEGRATION_TESTING
+
+
+def run_commit_hooks(success=True):
+    """Run (and drop) the current transaction's after-commit hooks"""
+    txn = transaction.get()
+    for hook, args, kws in list(txn.getAfterCommitHooks()):
+        hook(success, *args, **kws)
+    txn._after_commit = []
+
+
+class TestLocalDeltaBus(unittest.TestCase):
+    """Cursor semantics of the in-process ring buffer"""
+
+    def test_since_filters_classroom(self):
+        bus = LocalDeltaBus()
+        bus.publish("pass_issued", "/plone/room-1", {"id": "a"})
+        bus.publish("pass_issued", "/plone/room-2", {"id": "b"})
+        bus.publish("pass_issued", "__site__", {"id": "c"})
+
+        deltas, cursor, complete = bus.since(0, "/plone/room-1")
+
+        self.assertTrue(complete)
+        self.assertEqual(cursor, 3)
+        self.assertEqual([d["data"]["id"] for d in deltas], ["a", "c"])
+        self.assertEqual(bus.since(cursor, "/plone/room-1")[0], [])
+
+    def test_overflowed_cursor_is_incomplete(self):
+        bus = LocalDeltaBus(maxlen=2)
+        for i in range(5):
+            bus.publish("pass_issued", "/plone", {"id": i})
+
+        deltas, cursor, complete = bus.since(1)
+
+        self.assertFalse(complete)
+        self.assertEqual([d["data"]["id"] for d in deltas], [3, 4])
+        self.assertFalse(bus.since(99)[2])
+
+
+
+class TestRedisDeltaBus(unittest.TestCase):
+    """Deltas shared by instances through one Redis"""
+
+    def test_instances_share_deltas(self):
+        redis = FakeRedis()
+        first, second = RedisDeltaBus(redis), RedisDeltaBus(redis)
+        first.publish("pass_issued", "/plone/room-1", {"id": "a"})
+        second.publish("pass_issued", "/plone/room-2", {"id": "b"})
+
+        deltas, cursor, complete = first.since(0, "/plone/room-2")
+
+        self.assertTrue(complete)
+        self.assertEqual(cursor, 2)
+        self.assertEqual([d["data"]["id"] for d in deltas], ["b"])
+        self.assertEqual(second.since(cursor), ([], 2, True))
+
+    def test_overflowed_cursor_is_incomplete(self):
+        bus = RedisDeltaBus(FakeRedis(), maxlen=2)
+        for i in range(5):
+            bus.publish("pass_issued", "/plone", {"id": i})
+
+        deltas, cursor, complete = bus.since(1)
+
+        self.assertFalse(complete)
+        self.assertEqual([d["data"]["id"] for d in deltas], [3, 4])
+        self.assertFalse(bus.since(99)[2])
+
+
+class TestDashboardStream(unittest.TestCase):
+    """Classroom events become deltas after commit"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.bus = LocalDeltaBus()
+        self.previous = set_delta_bus(self.bus)
+        run_commit_hooks(success=False)
+
+    def tearDown(self):
+        set_delta_bus(self.previous)
+
+    def create_pass(self, id="pass-1"):
+        return api.content.create(
+            container=self.portal,
+            type="HallPass",
+            id=id,
+            student_name="Student",
+            destination="Library",
+            issue_time=datetime.now(),
+        )
+
+    def test_deltas_wait_for_commit(self):
+        hall_pass = self.create_pass()
+        self.assertEqual(self.bus.last_id, 0)
+
+        run_commit_hooks()
+        hall_pass.mark_returned()
+        run_commit_hooks()
+
+        kinds = [d["type"] for d in self.bus.since(0)[0]]
+        self.assertIn("pass_issued", kinds)
+        self.assertEqual(kinds[-1], "pass_returned")
+
+    def test_aborted_transaction_publishes_nothing(self):
+        self.create_pass()
+        run_commit_hooks(success=False)
+        self.assertEqual(self.bus.last_id, 0)
+
+    def test_poll_returns_deltas(self):
+        self.create_pass()
+        run_commit_hooks()
+        self.request.form["cursor"] = f"0-{datetime.now().timestamp()}"
+
+        view = api.content.get_view("dashboard-stream", self.portal, self.request)
+        data = json.loads(view())
+
+        self.assertTrue(data["complete"])
+        self.assertIn("pass_issued", [d["type"] for d in data["deltas"]])
+        self.assertTrue(data["cursor"].startswith(f"{self.bus.last_id}-"))
+        self.assertGreater(data["retry_after"], 0)
+
+    def test_retry_waits_for_next_deadline(self):
+        """Idle dashboards retry after POLL_INTERVAL, sooner for deadlines"""
+        view = api.content.get_view("dashboard-stream", self.portal, self.request)
+        self.assertEqual(json.loads(view())["retry_after"], POLL_INTERVAL)
+
+        # Expected 5 minutes + 5 minutes grace: overdue in about 10 seconds
+        hall_pass = self.create_pass()
+        hall_pass.issue_time = datetime.now() - timedelta(minutes=9, seconds=50)
+        hall_pass.expected_duration = 5
+        get_dashboard_counters().record_returned("pass-1", classroom_key(hall_pass))
+        record_hall_pass_issued(hall_pass)
+
+        view = api.content.get_view("dashboard-stream", self.portal, self.request)
+        self.assertLess(json.loads(view())["retry_after"], 11)
+
+    def test_event_stream_answers_at_once(self):
+        self.create_pass()
+        run_commit_hooks()
+        self.request.environ["HTTP_ACCEPT"] = "text/event-stream"
+        self.request.environ["HTTP_LAST_EVENT_ID"] = (
+            f"0-{datetime.now().timestamp()}"
+        )
+
+        view = api.content.get_view("dashboard-stream", self.portal, self.request)
+        body = view().decode("utf-8")
+
+        self.assertTrue(body.startswith("retry: "))
+        self.assertIn("event: pass_issued", body)
+        self.assertIn(f"id: {self.bus.last_id}-", body)
@@ -0,0 +1,189 @@
+"""
+Hall Pass Repository Tests
+
+Covers the persistent hall pass store behind the manager, return and
+verification views.
+"""
+
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.hall_pass_store import HallPassRepository
+from project.title.hall_pass_store import get_hall_pass_repository
+from project.title.pagination import encode_cursor
+from project.title.testing import INTEGRATION_TESTING
+
+
+def _record(code, minutes_ago=0, day_offset=0):
+    issued = datetime.now() - timedelta(minutes=minutes_ago, days=day_offset)
+    return {
+        "id": code,
+        "pass_code": code,
+        "student_name": f"Student {code}",
+        "destination": "Library",
+        "issue_time": issued.isoformat(),
+        "return_time": None,
+        "expected_duration": 5,
+        "is_active": True,
+    }
+
+
+class TestHallPassRepository(unittest.TestCase):
+    """Indexes by classroom, day and active state"""
+
+    def setUp(self):
+        self.repository = HallPassRepository()
+        self.today = datetime.now().date().isoformat()
+
+    def test_active_index_follows_returns(self):
+        """Only passes still out are in the classroom's active set"""
+        self.repository.add(_record("A1"), classroom="/room-1")
+        self.repository.add(_record("A2"), classroom="/room-1")
+        self.repository.add(_record("B1"), classroom="/room-2")
+
+        record, changed = self.repository.mark_returned("A1")
+        _, changed_again = self.repository.mark_returned("A1")
+
+        self.assertTrue(changed)
+        self.assertFalse(changed_again)
+        self.assertIsNotNone(record["return_time"])
+        self.assertEqual(
+            [p["pass_code"] for p in self.repository.active_passes("/room-1")], ["A2"]
+        )
+        self.assertEqual(len(self.repository.active_passes()), 2)
+        self.assertEqual(self.repository.issued_today("/room-1", self.today), 2)
+        self.assertEqual(
+            [p["pass_code"] for p in self.repository.recent_returned("/room-1", self.today)],
+            ["A1"],
+        )
+
+    def test_duplicate_code_rejected(self):
+        self.repository.add(_record("A1"))
+        with self.assertRaises(KeyError):
+            self.repository.add(_record("A1"))
+
+    def test_remove_cleans_indexes(self):
+        self.repository.add(_record("A1"), classroom="/room-1")
+        self.assertTrue(self.repository.remove("A1"))
+
+        self.assertEqual(self.repository.active_passes("/room-1"), [])
+        self.assertEqual(self.repository.issued_today("/room-1", self.today), 0)
+        self.assertIsNone(self.repository.get("A1"))
+
+    def test_prune_keeps_recent_and_active_days(self):
+        # Older days than the last prune do not prune again on add
+        self.repository.add(_record("NEW1"), classroom="/room-1")
+        self.repository.add(_record("OLD1", day_offset=400), classroom="/room-1")
+        self.repository.add(_record("OLD2", day_offset=400), classroom="/room-2")
+        self.repository.mark_returned("OLD1")
+
+        self.assertEqual(self.repository.prune(), 1)
+
+        self.assertIsNone(self.repository.get("OLD1"))
+        self.assertEqual(len(self.repository), 2)
+        self.assertEqual(len(self.repository.issued), 2)
+        self.assertEqual(
+            [p["pass_code"] for p in self.repository.active_passes("/room-2")],
+            ["OLD2"],
+        )
+
+    def test_first_pass_of_a_day_prunes(self):
+        self.repository.add(_record("OLD1", day_offset=400))
+        self.repository.mark_returned("OLD1")
+        self.repository.add(_record("NEW1"))
+
+        self.assertIsNone(self.repository.get("OLD1"))
+        self.assertEqual(self.repository.last_pruned, self.today)
+
+
+class TestHallPassViews(unittest.TestCase):
+    """Manager, return and verify views share the persistent repository"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+
+    def call_view(self, name, body=None, **form):
+        self.request.form.update(form)
+        if body is not None:
+            self.request["BODY"] = json.dumps(body)
+        view = self.portal.restrictedTraverse(f"@@{name}")
+        return view
+
+    def test_issue_poll_return_verify(self):
+        manager = self.call_view(
+            "hall-pass-manager",
+            body={"student_name": "Eric Wilson", "destination": "Restroom"},
+        )
+        issued = json.loads(manager.issue_pass())["pass"]
+        code = issued["pass_code"]
+        self.assertIn("@@pass-qr?code=", issued["qr_code"])
+
+        data = json.loads(manager.get_passes_data())
+        self.assertEqual([p["pass_code"] for p in data["active_passes"]], [code])
+        self.assertEqual(data["statistics"]["total_today"], 1)
+
+        verify = self.call_view("pass-verify", code=code)
+        page = verify()
+        self.assertIn("ERIC W.", page)
+        self.assertIn("RESTROOM", page)
+
+        self.call_view("return-pass", body={"pass_id": code})()
+        data = json.loads(manager.get_passes_data())
+        self.assertEqual(data["active_passes"], [])
+        self.assertEqual([p["pass_code"] for p in data["recent_passes"]], [code])
+        self.assertIsNotNone(get_hall_pass_repository(self.portal).get(code)["return_time"])
+
+    def test_writes_need_a_teacher(self):
+        manager = self.call_view(
+            "hall-pass-manager",
+            body={"student_name": "Eric Wilson", "destination": "Restroom"},
+        )
+        code = json.loads(manager.issue_pass())["pass"]["pass_code"]
+        setRoles(self.portal, TEST_USER_ID, ["Member"])
+
+        self.assertIn("error", json.loads(manager.issue_pass()))
+        self.assertEqual(self.request.response.getStatus(), 403)
+        self.call_view("return-pass", body={"pass_id": code})()
+        self.assertEqual(self.request.response.getStatus(), 403)
+        repository = get_hall_pass_repository(self.portal)
+        self.assertIsNone(repository.get(code)["return_time"])
+        self.assertEqual(len(repository), 1)
+
+    def test_return_only_in_own_classroom(self):
+        manager = self.call_view(
+            "hall-pass-manager",
+            body={"student_name": "Eric Wilson", "destination": "Restroom"},
+        )
+        code = json.loads(manager.issue_pass())["pass"]["pass_code"]
+        room = api.content.create(container=self.portal, type="Folder", id="room-b")
+
+        self.request["BODY"] = json.dumps({"pass_id": code})
+        room.restrictedTraverse("@@return-pass")()
+
+        self.assertEqual(self.request.response.getStatus(), 404)
+        repository = get_hall_pass_repository(self.portal)
+        self.assertIsNone(repository.get(code)["return_time"])
+
+    def test_history_rejects_malformed_cursors(self):
+        for state in (
+            {"issue_time": 5, "pass_code": "A1"},
+            {"issue_time": "yesterday", "pass_code": "A1"},
+            {"issue_time": "2025-03-03T09:00:00"},
+        ):
+            self.request.response.setStatus(200)
+            view = self.call_view("hall-pass-history", cursor=encode_cursor(state))
+            self.assertIn("Invalid cursor", json.loads(view())["error"])
+            self.assertEqual(self.request.response.getStatus(), 400)
+
+    def test_verify_unknown_code(self):
+        page = self.call_view("pass-verify", code="NOPE1234")()
+        self.assertIn("Pass not found", page)
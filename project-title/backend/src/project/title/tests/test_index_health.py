@@ -0,0 +1,110 @@
+"""
+Catalog Index Health Tests
+
+The report finds documents a custom index lost, and a rebuild of only
+that index brings them back.
+"""
+
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.index_health import CUSTOM_COLUMNS
+from project.title.index_health import CUSTOM_INDEXES
+from project.title.index_health import index_report
+from project.title.index_health import rebuild_custom_indexes
+from project.title.query_planner import clear_index_cache
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestIndexHealth(unittest.TestCase):
+    """index_report and rebuild_custom_indexes"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.catalog = api.portal.get_tool("portal_catalog")
+        self.documents = [
+            api.content.create(
+                container=self.portal, type="Document", id=f"doc-{i}", title="Doc"
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        clear_index_cache()
+
+    def test_profile_indexes_installed(self):
+        self.assertIn("classroom_ready", CUSTOM_INDEXES)
+        self.assertIn("classroom_ready_status", CUSTOM_COLUMNS)
+
+        report = index_report(self.catalog)
+        self.assertTrue(all(e["exists"] for e in report["indexes"].values()))
+        self.assertTrue(all(report["columns"].values()))
+
+    def test_classroom_ready_indexed(self):
+        entry = index_report(self.catalog)["indexes"]["classroom_ready"]
+        self.assertTrue(entry["indexer"])
+        self.assertEqual(entry["missing"], 0)
+
+        uid = self.documents[0].UID()
+        self.assertEqual(len(self.catalog(UID=uid, classroom_ready=True)), 1)
+
+    def test_rebuild_restores_lost_entries(self):
+        self.catalog._catalog.getIndex("classroom_ready").clear()
+        entry = index_report(self.catalog)["indexes"]["classroom_ready"]
+        self.assertGreaterEqual(entry["missing"], len(self.documents))
+
+        report = rebuild_custom_indexes(
+            self.catalog, names=["classroom_ready"], batch_size=2, commit=False
+        )
+
+        self.assertGreaterEqual(report["objects"], len(self.documents))
+        self.assertGreater(report["batches"], 1)
+        self.assertEqual(report["error_count"], 0)
+        entry = index_report(self.catalog)["indexes"]["classroom_ready"]
+        self.assertEqual(entry["missing"], 0)
+        self.assertEqual(entry["coverage"], 1.0)
+
+    def test_rebuild_removes_stale_entries(self):
+        index = self.catalog._catalog.getIndex("seating_student_count")
+        rid = self.catalog(UID=self.documents[0].UID())[0].getRID()
+        index.insertForwardIndexEntry(0, rid)
+        index._unindex[rid] = 0
+        self.assertEqual(
+            index_report(self.catalog)["indexes"]["seating_student_count"]["stale"],
+            1,
+        )
+
+        report = rebuild_custom_indexes(
+            self.catalog, names=["seating_student_count"], commit=False
+        )
+
+        self.assertEqual(report["removed"], 1)
+        self.assertNotIn(rid, index.referencedObjects())
+
+    def test_rebuild_recreates_missing_index(self):
+        self.catalog.delIndex("hall_pass_status")
+
+        report = rebuild_custom_indexes(
+            self.catalog, names=["hall_pass_status"], commit=False
+        )
+
+        self.assertEqual(report["restored"], ["hall_pass_status"])
+        self.assertIn("hall_pass_status", self.catalog.indexes())
+
+    def test_rebuild_view_requires_authenticator(self):
+        request = self.layer["request"]
+        request.method = request.environ["REQUEST_METHOD"] = "POST"
+        view = api.content.get_view("index-health", self.portal, request)
+
+        self.assertIn("authenticator", view())
+        self.assertEqual(request.response.getStatus(), 403)
+
+    def test_unknown_index_refused(self):
+        with self.assertRaises(ValueError):
+            rebuild_custom_indexes(self.catalog, names=["Title"], commit=False)
@@ -0,0 +1,100 @@
+"""
+Streaming JSON Response Tests
+
+Documents with streamed members encode to the same JSON as json.dumps,
+large bodies are spooled to a temporary file, and ETags short-circuit
+unchanged responses.
+"""
+
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+import json
+import unittest
+
+from plone import api
+
+from project.title.browser.json_response import encode
+from project.title.browser.json_response import etag_for
+from project.title.browser.json_response import JSONArray
+from project.title.browser.json_response import JSONObject
+from project.title.browser.json_response import SpoolIterator
+from project.title.browser.json_response import stream_json
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestStreamJSON(unittest.TestCase):
+    """stream_json encodes lazily and handles conditional requests"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.request = self.layer["request"]
+
+    def test_streamed_members_encode_like_json(self):
+        seen = []
+
+        def items():
+            for number in range(3):
+                seen.append(number)
+                yield {"n": number}
+
+        def members():
+            yield "items", JSONArray(items())
+            yield "count", len(seen)  # Computed after the array was streamed
+
+        body = stream_json(self.request, {"data": JSONObject(members()), "ok": True})
+
+        self.assertEqual(
+            json.loads(body),
+            {"data": {"items": [{"n": 0}, {"n": 1}, {"n": 2}], "count": 3}, "ok": True},
+        )
+
+    def test_large_body_is_spooled(self):
+        rows = JSONArray({"n": number, "pad": "x" * 100} for number in range(5000))
+        body = stream_json(self.request, {"rows": rows})
+
+        self.assertIsInstance(body, SpoolIterator)
+        self.assertEqual(len(json.loads(b"".join(body))["rows"]), 5000)
+
+    def test_matching_etag_returns_304(self):
+        stream_json(self.request, {"value": 1})
+        etag = self.request.response.getHeader("ETag")
+
+        self.request.environ["HTTP_IF_NONE_MATCH"] = etag
+        self.assertEqual(stream_json(self.request, {"value": 1}), b"")
+        self.assertEqual(self.request.response.getStatus(), 304)
+
+    def test_precomputed_etag_skips_encoding(self):
+        etag = etag_for("charts", 42)
+        self.request.environ["HTTP_IF_NONE_MATCH"] = etag
+
+        def never():
+            raise AssertionError("body encoded despite matching ETag")
+            yield
+
+        self.assertEqual(stream_json(self.request, JSONArray(never()), etag=etag), b"")
+
+    def test_dates_and_other_values_encode(self):
+        value = {
+            "day": date(2025, 3, 3),
+            "time": datetime(2025, 3, 3, 9, 30),
+            "amount": Decimal("1.5"),
+        }
+
+        self.assertEqual(
+            json.loads(encode(value)),
+            {"day": "2025-03-03", "time": "2025-03-03T09:30:00", "amount": "1.5"},
+        )
+
+    def test_batch_api_etag_ignores_timestamp(self):
+        self.request.form["endpoints"] = "participation,timers"
+        portal = self.layer["portal"]
+        api.content.get_view("api-batch", portal, self.request)()
+        etag = self.request.response.getHeader("ETag")
+
+        self.request.environ["HTTP_IF_NONE_MATCH"] = etag
+        body = api.content.get_view("api-batch", portal, self.request)()
+
+        self.assertEqual(body, b"")
+        self.assertEqual(self.request.response.getStatus(), 304)
@@ -0,0 +1,77 @@
+"""
+Concurrent Load Harness Tests
+
+Several workers with their own connections write through the hall pass,
+picker and seating paths at once; every committed operation is counted
+and no write is lost to a conflict.
+"""
+
+from datetime import datetime
+import unittest
+
+from plone.app.testing import setRoles
+from plone.app.testing import SITE_OWNER_NAME
+from plone.app.testing import TEST_USER_ID
+import transaction
+
+from project.title.fairness import clear_fairness_engines
+from project.title.hall_pass_store import classroom_for
+from project.title.hall_pass_store import get_hall_pass_repository
+from project.title.load_harness import parse_mix
+from project.title.load_harness import prepare_classroom
+from project.title.load_harness import run_load
+from project.title.testing import FUNCTIONAL_TESTING
+
+
+class TestLoadHarness(unittest.TestCase):
+    """Threads with their own ZODB connections"""
+
+    layer = FUNCTIONAL_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.chart_path = prepare_classroom(self.portal, students=10)
+        transaction.commit()
+
+    def tearDown(self):
+        clear_fairness_engines()
+
+    def run_load(self, **options):
+        return run_load(
+            self.layer["zodbDB"],
+            "/".join(self.portal.getPhysicalPath()),
+            self.chart_path,
+            user_id=SITE_OWNER_NAME,
+            **options,
+        )
+
+    def test_concurrent_workers(self):
+        report = self.run_load(workers=4, operations=10)
+
+        total = report["total"]
+        self.assertEqual(total["operations"], 40)
+        self.assertEqual(total["errors"], 0)
+        self.assertEqual(total["completed"] + total["failed"], total["operations"])
+        self.assertEqual(total["latency"]["n"], total["completed"])
+
+        # Every committed issue is in the repository's daily counter
+        transaction.begin()
+        classroom = classroom_for(self.portal["load-test"])
+        today = datetime.now().date().isoformat()
+        self.assertEqual(
+            get_hall_pass_repository(self.portal).issued_today(classroom, today),
+            report["operations"]["issue"]["completed"],
+        )
+
+    def test_single_worker_never_conflicts(self):
+        report = self.run_load(workers=1, operations=8, mix=parse_mix("pick,seat_move"))
+
+        self.assertEqual(set(report["operations"]), {"pick", "seat_move"})
+        self.assertEqual(report["total"]["completed"], 8)
+        self.assertEqual(report["total"]["retry_rate"], 0.0)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("issue=3, pick=1"), {"issue": 3.0, "pick": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("teleport=1")
@@ -0,0 +1,126 @@
+"""
+Prometheus Metrics Tests
+
+Histograms render cumulative buckets, timed operations and per-request
+counts are recorded, and ``@@metrics`` serves them.
+"""
+
+from ZPublisher.pubevents import PubStart
+from ZPublisher.pubevents import PubSuccess
+import os
+import unittest
+
+from plone import api
+from plone.app.testing import logout
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.metrics import Histogram
+from project.title.metrics import OPERATION_ERRORS
+from project.title.metrics import OPERATION_SECONDS
+from project.title.metrics import registry
+from project.title.metrics import REQUEST_CATALOG_QUERIES
+from project.title.metrics import timed
+from project.title.query_planner import plan_query
+from project.title.testing import INTEGRATION_TESTING
+from project.title import metrics
+
+
+class TestHistogram(unittest.TestCase):
+    """Prometheus text format of a histogram"""
+
+    def test_render(self):
+        histogram = Histogram("test_seconds", "Test.", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, 'a"b')
+
+        lines = histogram.render()
+
+        self.assertEqual(
+            lines,
+            [
+                'test_seconds_bucket{op="a\\"b",le="0.1"} 2',
+                'test_seconds_bucket{op="a\\"b",le="1.0"} 3',
+                'test_seconds_bucket{op="a\\"b",le="+Inf"} 4',
+                'test_seconds_sum{op="a\\"b"} 3.65',
+                'test_seconds_count{op="a\\"b"} 4',
+            ],
+        )
+
+
+class TestMetrics(unittest.TestCase):
+    """Timed operations, request counts and the endpoint"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        registry.reset()
+
+    def tearDown(self):
+        registry.reset()
+        os.environ.pop("METRICS_TOKEN", None)
+
+    def test_timed_records_duration_and_errors(self):
+        @timed("test_op")
+        def work(fail=False):
+            if fail:
+                raise ValueError("boom")
+            return 42
+
+        self.assertEqual(work(), 42)
+        with self.assertRaises(ValueError):
+            work(fail=True)
+
+        [(labels, count, total)] = OPERATION_SECONDS.samples()
+        self.assertEqual((labels, count), (("test_op",), 2))
+        self.assertEqual(OPERATION_ERRORS.value("test_op"), 1)
+
+    def test_request_counts_planned_queries(self):
+        catalog = api.portal.get_tool("portal_catalog")
+
+        @timed("test_op")
+        def work():
+            plan_query({"portal_type": "Document"}, catalog)
+            plan_query({"portal_type": "Folder"}, catalog)
+
+        metrics.start_request(PubStart(self.request))
+        work()
+        metrics.end_request(PubSuccess(self.request))
+
+        [(labels, count, total)] = REQUEST_CATALOG_QUERIES.samples()
+        self.assertEqual((labels, count, total), (("test_op",), 1, 2))
+
+    def test_endpoint(self):
+        timed("test_op")(lambda: None)()
+        view = self.portal.restrictedTraverse("@@metrics")
+
+        body = view()
+
+        self.assertIn("# TYPE classroom_operation_duration_seconds histogram", body)
+        self.assertIn(
+            'classroom_operation_duration_seconds_count{operation="test_op"} 1', body
+        )
+        self.assertIn("# TYPE classroom_cache_hit_ratio gauge", body)
+        self.assertTrue(
+            self.request.response.getHeader("Content-Type").startswith("text/plain")
+        )
+
+    def test_endpoint_token(self):
+        os.environ["METRICS_TOKEN"] = "secret"
+        view = self.portal.restrictedTraverse("@@metrics")
+
+        self.assertEqual(view(), "")
+        self.assertEqual(self.request.response.getStatus(), 401)
+
+        self.request.environ["HTTP_AUTHORIZATION"] = "Bearer secret"
+        self.assertIn("classroom_operation_duration_seconds", view())
+
+    def test_endpoint_without_token_needs_manager(self):
+        logout()
+        view = self.portal.restrictedTraverse("@@metrics")
+
+        self.assertEqual(view(), "")
+        self.assertEqual(self.request.response.getStatus(), 403)
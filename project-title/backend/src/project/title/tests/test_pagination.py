@@ -0,0 +1,93 @@
+"""
+Cursor Pagination Tests
+
+Paging a catalog query or a classroom's hall pass history returns every
+item exactly once, including items that share a sort value.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.hall_pass_store import HallPassRepository
+from project.title.pagination import InvalidCursor
+from project.title.pagination import paginate_catalog
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestPaginateCatalog(unittest.TestCase):
+    """Keyset pages over the catalog"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        folder = api.content.create(
+            container=self.portal, type="Folder", id="pages", title="Pages"
+        )
+        # Created within the same minute: equal keys in the modified index
+        self.uids = {
+            api.content.create(
+                container=folder, type="Document", id=f"doc-{i}", title=f"Doc {i}"
+            ).UID()
+            for i in range(7)
+        }
+        self.query = {
+            "portal_type": "Document",
+            "path": "/".join(folder.getPhysicalPath()),
+            "sort_on": "modified",
+            "sort_order": "descending",
+        }
+
+    def test_pages_cover_ties_exactly_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = paginate_catalog(self.query, cursor=cursor, limit=3)
+            self.assertEqual(page["total"], 7)
+            seen.extend(brain.UID for brain in page["items"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), self.uids)
+
+    def test_cursor_of_another_query_rejected(self):
+        cursor = paginate_catalog(self.query, limit=3)["next_cursor"]
+        other = dict(self.query, sort_order="ascending")
+
+        with self.assertRaises(InvalidCursor):
+            paginate_catalog(other, cursor=cursor, limit=3)
+        with self.assertRaises(InvalidCursor):
+            paginate_catalog(self.query, cursor="not-a-cursor", limit=3)
+
+
+class TestHallPassHistory(unittest.TestCase):
+    """Repository history pages, newest first across days"""
+
+    def test_history_pages(self):
+        repository = HallPassRepository()
+        start = datetime(2025, 3, 3, 9, 0)
+        for i in range(5):
+            issued = start + timedelta(hours=12 * i)
+            repository.add(
+                {"pass_code": f"P{i}", "issue_time": issued.isoformat()}, "room-1"
+            )
+        repository.add({"pass_code": "X", "issue_time": start.isoformat()}, "room-2")
+
+        codes, before = [], None
+        while True:
+            records, more = repository.history("room-1", before, limit=2)
+            codes.extend(record["pass_code"] for record in records)
+            if not more:
+                break
+            before = (records[-1]["issue_time"], records[-1]["pass_code"])
+
+        self.assertEqual(codes, ["P4", "P3", "P2", "P1", "P0"])
@@ -0,0 +1,106 @@
+"""
+Pass QR Endpoint Tests
+
+QR images are rendered once per pass code and served by ``@@pass-qr`` with
+conditional GET support; API payloads carry the image URL.
+"""
+
+import unittest
+from datetime import datetime
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.hall_pass_store import get_hall_pass_repository
+from project.title.qr import qr_cache
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestPassQR(unittest.TestCase):
+    """Cached QR rendering and the @@pass-qr image view"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        qr_cache.clear()
+        self.repository = get_hall_pass_repository(self.portal)
+        self.repository.add(
+            {"pass_code": "ABCD1234", "issue_time": datetime.now().isoformat()}
+        )
+
+    def get_qr(self, code, **headers):
+        self.request.form["code"] = code
+        for name, value in headers.items():
+            self.request.environ["HTTP_" + name.upper().replace("-", "_")] = value
+        view = api.content.get_view("pass-qr", self.portal, self.request)
+        return view()
+
+    def test_renders_png_once(self):
+        """Second request for the same code is a cache hit"""
+        first = self.get_qr("ABCD1234")
+        second = self.get_qr("ABCD1234")
+
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertEqual(first, second)
+        self.assertEqual(qr_cache.misses, 1)
+        self.assertEqual(qr_cache.hits, 1)
+        self.assertEqual(self.request.response.getHeader("Content-Type"), "image/png")
+
+    def test_conditional_get_returns_304(self):
+        """A matching If-None-Match skips the body"""
+        self.get_qr("ABCD1234")
+        etag = self.request.response.getHeader("ETag")
+
+        body = self.get_qr("ABCD1234", **{"If-None-Match": etag})
+
+        self.assertEqual(self.request.response.getStatus(), 304)
+        self.assertEqual(body, b"")
+
+    def test_invalid_code_rejected(self):
+        self.get_qr("<script>")
+        self.assertEqual(self.request.response.getStatus(), 400)
+
+    def test_unknown_and_returned_passes_not_found(self):
+        self.get_qr("ZZZZ9999")
+        self.assertEqual(self.request.response.getStatus(), 404)
+
+        self.repository.mark_returned("ABCD1234")
+        self.get_qr("ABCD1234")
+        self.assertEqual(self.request.response.getStatus(), 404)
+        self.assertEqual(len(qr_cache), 0)
+
+    def test_content_pass_found_by_index(self):
+        """HallPass content codes are looked up in the catalog"""
+        hall_pass = api.content.create(
+            container=self.portal,
+            type="HallPass",
+            id="pass-2",
+            student_name="Student",
+            destination="Library",
+            issue_time=datetime.now(),
+        )
+
+        self.assertTrue(self.get_qr(hall_pass.pass_code).startswith(b"\x89PNG"))
+
+        hall_pass.mark_returned()
+        self.get_qr(hall_pass.pass_code)
+        self.assertEqual(self.request.response.getStatus(), 404)
+
+    def test_pass_data_carries_url(self):
+        """Serialized passes link to the image instead of inlining it"""
+        hall_pass = api.content.create(
+            container=self.portal,
+            type="HallPass",
+            id="pass-1",
+            student_name="Student",
+            destination="Library",
+            issue_time=datetime.now(),
+        )
+        data = hall_pass.get_pass_data()
+
+        self.assertIn("@@pass-qr?code=", data["qr_code"])
+        self.assertEqual(len(qr_cache), 0)
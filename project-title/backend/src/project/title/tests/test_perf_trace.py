@@ -0,0 +1,97 @@
+"""
+Per-Request Profiling Tests
+
+A traced request to a project.title view gets a Server-Timing header with
+catalog and annotation attribution and lands in @@perf-trace; other
+requests are left alone.
+"""
+
+from ZPublisher.pubevents import PubAfterTraversal
+from ZPublisher.pubevents import PubSuccess
+from zope.annotation.interfaces import IAnnotations
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.perf_trace import clear_traces
+from project.title.perf_trace import current_trace
+from project.title.perf_trace import end_trace
+from project.title.perf_trace import REGISTRY_RECORD
+from project.title.perf_trace import span
+from project.title.perf_trace import start_trace
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestPerfTrace(unittest.TestCase):
+    """start_trace / end_trace around a published view"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.request["PUBLISHED"] = self.portal.restrictedTraverse("@@metrics")
+        clear_traces()
+
+    def tearDown(self):
+        clear_traces()
+
+    def traced_request(self):
+        start_trace(PubAfterTraversal(self.request))
+        api.portal.get_tool("portal_catalog")(portal_type="Document")
+        IAnnotations(self.portal).get("project.title.no-such-key")
+        with span("serialize"):
+            pass
+        end_trace(PubSuccess(self.request))
+
+    def test_header_enables_trace(self):
+        self.request.environ["HTTP_X_PERF_TRACE"] = "1"
+
+        self.traced_request()
+
+        timing = self.request.response.getHeader("Server-Timing")
+        self.assertIn('catalog;dur=', timing)
+        self.assertIn('annotation;dur=', timing)
+        self.assertIn("total;dur=", timing)
+
+        traces = json.loads(self.portal.restrictedTraverse("@@perf-trace")())["traces"]
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]["view"], "metrics")
+        self.assertEqual(traces[0]["spans"]["catalog"]["count"], 1)
+        self.assertEqual(traces[0]["spans"]["annotation"]["count"], 1)
+        self.assertEqual(traces[0]["spans"]["serialize"]["count"], 1)
+        self.assertIsNone(current_trace())
+
+    def test_registry_flag_enables_trace(self):
+        api.portal.set_registry_record(REGISTRY_RECORD, True)
+
+        self.traced_request()
+
+        self.assertIsNotNone(self.request.response.getHeader("Server-Timing"))
+
+    def test_untraced_without_opt_in(self):
+        self.traced_request()
+
+        self.assertIsNone(self.request.response.getHeader("Server-Timing"))
+        traces = json.loads(self.portal.restrictedTraverse("@@perf-trace")())["traces"]
+        self.assertEqual(traces, [])
+
+    def test_header_needs_manager(self):
+        self.request.environ["HTTP_X_PERF_TRACE"] = "1"
+        setRoles(self.portal, TEST_USER_ID, ["Member"])
+
+        self.traced_request()
+
+        self.assertIsNone(self.request.response.getHeader("Server-Timing"))
+
+    def test_other_packages_views_untraced(self):
+        self.request.environ["HTTP_X_PERF_TRACE"] = "1"
+        self.request["PUBLISHED"] = self.portal
+
+        self.traced_request()
+
+        self.assertIsNone(self.request.response.getHeader("Server-Timing"))
@@ -28,7 +28,8 @@ class TestPerformanceIntegration(unittest.TestCase):
             indexes = catalog.indexes()
 
             expected_indexes = [
-                "hall_pass_duration",
+                "hall_pass_issue_time",
+                "hall_pass_expected_return",
                 "hall_pass_status",
                 "seating_student_count",
                 "seating_last_updated",
@@ -151,7 +152,9 @@ class TestPerformanceIntegration(unittest.TestCase):
 
         # Should check expected indexes
         expected_indexes = [
-            "hall_pass_duration",
+            "hall_pass_issue_time",
+            "hall_pass_expected_return",
+            "hall_pass_is_active",
             "hall_pass_status",
             "seating_student_count",
             "seating_last_updated",
@@ -0,0 +1,113 @@
+"""
+Catalog Query Planner Tests
+
+One test per rewrite rule, against the real portal catalog. Tests that
+remove an index clear the planner's index cache around them.
+"""
+
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.optimizations import optimize_catalog_query
+from project.title.query_planner import catalog_indexes
+from project.title.query_planner import clear_index_cache
+from project.title.query_planner import plan_query
+from project.title.query_planner import UnboundedSortError
+from project.title.testing import INTEGRATION_TESTING
+
+
+class TestQueryPlanner(unittest.TestCase):
+    """Each rule of plan_query"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.catalog = api.portal.get_tool("portal_catalog")
+        clear_index_cache()
+
+    def tearDown(self):
+        clear_index_cache()
+
+    def plan(self, **query):
+        return plan_query(query, self.catalog)
+
+    def test_alias_for_hall_passes(self):
+        window = {"query": "2025-01-01", "range": "min"}
+        plan = self.plan(portal_type="HallPass", modified=window)
+
+        self.assertEqual(plan.query["hall_pass_issue_time"], window)
+        self.assertNotIn("modified", plan.query)
+
+        # Other types keep their modified filter
+        plan = self.plan(portal_type="Document", modified=window)
+        self.assertEqual(plan.query["modified"], window)
+
+    def test_no_state_added_to_hall_pass_queries(self):
+        """Passes are filtered by the caller, e.g. ``hall_pass_is_active``"""
+        plan = self.plan(portal_type="HallPass", hall_pass_is_active=True)
+
+        self.assertNotIn("hall_pass_status", plan.query)
+        self.assertNotIn("review_state", plan.query)
+
+    def test_missing_index_falls_back_or_is_dropped(self):
+        self.catalog.delIndex("hall_pass_status")
+        clear_index_cache()
+
+        plan = self.plan(hall_pass_status="published", no_such_index=1)
+
+        self.assertEqual(plan.query, {"review_state": "published"})
+        explain = "; ".join(plan.explain)
+        self.assertIn("hall_pass_status: filter on review_state", explain)
+        self.assertIn("no_such_index: filter dropped", explain)
+
+    def test_missing_sort_index_falls_back(self):
+        self.catalog.delIndex("seating_last_updated")
+        clear_index_cache()
+
+        plan = self.plan(sort_on="seating_last_updated", sort_limit=5)
+        self.assertEqual(plan.query["sort_on"], "modified")
+
+    def test_unbounded_sort_refused(self):
+        with self.assertRaises(UnboundedSortError):
+            self.plan(portal_type="Document", sort_on="modified")
+        with self.assertRaises(UnboundedSortError):
+            optimize_catalog_query({"sort_on": "modified"}, self.catalog)
+
+        plan = self.plan(portal_type="Document", sort_on="modified", b_size=10)
+        self.assertEqual(plan.query["b_size"], 10)
+
+    def test_filters_ordered_by_selectivity(self):
+        documents = [
+            api.content.create(
+                container=self.portal, type="Document", id=f"doc-{i}", title="Doc"
+            )
+            for i in range(3)
+        ]
+
+        plan = self.plan(portal_type="Document", UID=documents[0].UID())
+
+        self.assertEqual(list(plan.query), ["UID", "portal_type"])
+        self.assertEqual(plan.estimates, {"UID": 1, "portal_type": 3})
+        self.assertFalse(plan.empty)
+
+    def test_filter_without_matches_makes_plan_empty(self):
+        self.assertTrue(self.plan(portal_type="NoSuchType").empty)
+        self.assertFalse(self.plan(portal_type=[]).empty)
+
+    def test_indexes_read_once(self):
+        self.assertIn("hall_pass_status", catalog_indexes(self.catalog))
+        self.catalog.delIndex("hall_pass_status")
+
+        self.assertIn("hall_pass_status", catalog_indexes(self.catalog))
+        clear_index_cache()
+        self.assertNotIn("hall_pass_status", catalog_indexes(self.catalog))
+
+    def test_plan_explained_in_log(self):
+        with self.assertLogs("project.title.query_planner", level="DEBUG") as logs:
+            self.plan(portal_type="HallPass", modified={"query": "2025-01-01"})
+        self.assertIn("alias: modified -> hall_pass_issue_time", logs.output[0])
@@ -0,0 +1,156 @@
+"""
+Bulk Roster Import Tests and Benchmark
+
+Charts are created or updated from streamed CSV/JSON rosters in chunks,
+and cataloged in one batch at the end. The benchmark imports a district
+file; its size can be overridden, for example:
+
+    BENCHMARK_ROSTER_STUDENTS=20000 make test
+"""
+
+import io
+import json
+import os
+import time
+import tracemalloc
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from project.title.roster_import import import_rosters
+from project.title.testing import INTEGRATION_TESTING
+
+CSV_ROSTER = """chart_id,title,class_period,grid_rows,grid_cols,student
+period-1,Period 1 Math,1,4,5,Alice
+period-1,,,,,Bob
+period-2,Period 2 Art,2,,,Cara
+period-2,,,,,Cara
+"""
+
+
+def _student_count():
+    return int(os.environ.get("BENCHMARK_ROSTER_STUDENTS", "2000"))
+
+
+def _district_csv(students, per_class=30):
+    lines = ["chart_id,title,grid_rows,grid_cols,student"]
+    for i in range(students):
+        chart = i // per_class
+        lines.append(f"class-{chart},Class {chart},6,6,Student {i}")
+    return io.BytesIO("\n".join(lines).encode())
+
+
+class TestRosterImport(unittest.TestCase):
+    """Creates, updates and reports per record"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.folder = api.content.create(
+            container=self.portal, type="Folder", id="classes", title="Classes"
+        )
+
+    def run_import(self, data, fmt="csv", **kwargs):
+        stream = io.StringIO(data)
+        return import_rosters(self.folder, stream, fmt, commit=False, **kwargs)
+
+    def test_csv_creates_charts(self):
+        report = self.run_import(CSV_ROSTER)
+
+        self.assertEqual((report["created"], report["updated"]), (2, 0))
+        chart = self.folder["period-1"]
+        self.assertEqual(chart.title, "Period 1 Math")
+        self.assertEqual(chart.students, ["Alice", "Bob"])
+        self.assertEqual((chart.grid_rows, chart.grid_cols), (4, 5))
+        self.assertEqual(self.folder["period-2"].students, ["Cara"])
+        self.assertEqual(api.content.get_state(chart), "private")
+        # Added events ran in the final batch
+        self.assertIsNotNone(getUtility(IIntIds).queryId(chart))
+
+    def test_json_updates_existing_chart(self):
+        self.run_import(CSV_ROSTER)
+        self.folder["period-1"].update_position("Bob", 0, 0)
+        records = [{"chart_id": "period-1", "students": ["Alice", "Dan"]}]
+
+        report = self.run_import(json.dumps(records), fmt="json")
+
+        chart = self.folder["period-1"]
+        self.assertEqual(report["updated"], 1)
+        self.assertEqual(chart.students, ["Alice", "Dan"])
+        self.assertIsNone(chart.get_student_position("Bob"))
+        self.assertEqual(chart.title, "Period 1 Math")
+
+    def test_invalid_records_reported(self):
+        report = self.run_import(
+            "chart_id,grid_rows,student\n,5,Alice\nroom,99,Bob\nok,5,Cy\n"
+        )
+        self.assertEqual(report["error_count"], 2)
+        self.assertEqual([error["record"] for error in report["errors"]], [1, 2])
+        self.assertEqual(report["charts"], 1)
+
+    def test_existing_chart_needs_modify_permission(self):
+        self.run_import(CSV_ROSTER)
+        for obj in (self.folder, self.folder["period-1"]):
+            obj.manage_delLocalRoles([TEST_USER_ID])
+        setRoles(self.portal, TEST_USER_ID, ["Contributor"])
+
+        report = self.run_import("chart_id,student\nperiod-1,Eve\nperiod-3,Fay\n")
+
+        self.assertEqual(report["errors"][0]["chart"], "period-1")
+        self.assertEqual(self.folder["period-1"].students, ["Alice", "Bob"])
+        self.assertEqual(self.folder["period-3"].students, ["Fay"])
+
+    def test_view_requires_authenticator(self):
+        request = self.layer["request"]
+        request.method = request.environ["REQUEST_METHOD"] = "POST"
+        request["BODYFILE"] = io.BytesIO(CSV_ROSTER.encode())
+        view = api.content.get_view("import-rosters", self.folder, request)
+
+        self.assertIn("authenticator", view())
+        self.assertEqual(request.response.getStatus(), 403)
+        self.assertNotIn("period-1", self.folder)
+
+    def test_catalog_updated_once_at_the_end(self):
+        catalog = api.portal.get_tool("portal_catalog")
+        path = "/".join(self.folder.getPhysicalPath())
+        during = []
+
+        def progress(report):
+            query = {"portal_type": "SeatingChart", "path": path}
+            during.append(len(catalog.unrestrictedSearchResults(**query)))
+
+        self.run_import(CSV_ROSTER, chunk_size=1, progress=progress)
+
+        self.assertEqual(during, [0, 0, 2])
+
+
+class TestRosterImportBenchmark(unittest.TestCase):
+    """A district roster imports in chunks with bounded memory"""
+
+    layer = INTEGRATION_TESTING
+
+    def test_district_import(self):
+        portal = self.layer["portal"]
+        setRoles(portal, TEST_USER_ID, ["Manager"])
+        students = _student_count()
+        stream = _district_csv(students)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        report = import_rosters(portal, stream, commit=False)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            f"\nRoster import of {students} students into {report['charts']} "
+            f"charts: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB traced"
+        )
+        self.assertEqual(report["students"], students)
+        self.assertEqual(report["error_count"], 0)
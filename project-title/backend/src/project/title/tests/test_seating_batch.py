@@ -0,0 +1,178 @@
+"""
+Batch Seat Move Tests and Benchmark
+
+``@@move-seats`` validates a whole rearrangement, applies it in one
+transaction and returns the diff. The benchmark rearranges a full room;
+its size can be overridden, for example:
+
+    BENCHMARK_SEATING_ROOM_SIZE=120 make test
+"""
+
+import json
+import os
+import random
+import time
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.seating_grid import SeatingGrid
+from project.title.testing import INTEGRATION_TESTING
+
+BATCH_BUDGET_SECONDS = 0.05
+
+
+def _room_size():
+    return int(os.environ.get("BENCHMARK_SEATING_ROOM_SIZE", "35"))
+
+
+class TestPlanBatch(unittest.TestCase):
+    """Validation and diff of a batch, before anything is written"""
+
+    def setUp(self):
+        self.grid = SeatingGrid()
+        self.grid.load({"students": {"0,0": "Alice", "0,1": "Bob", "1,0": "Cara"}})
+        self.roster = ["Alice", "Bob", "Cara", "Dan"]
+
+    def plan(self, operations):
+        return self.grid.plan_batch(operations, self.roster, rows=3, cols=3)
+
+    def test_chain_of_moves_ends_consistent(self):
+        """Alice takes Bob's seat, Bob takes Alice's: a swap in two moves"""
+        changes, errors = self.plan(
+            [
+                {"op": "move", "student": "Alice", "row": 0, "col": 1},
+                {"op": "move", "student": "Bob", "row": 0, "col": 0},
+                {"op": "move", "student": "Dan", "row": 2, "col": 2},
+            ]
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            changes,
+            {
+                "Alice": ((0, 0), (0, 1)),
+                "Bob": ((0, 1), (0, 0)),
+                "Dan": (None, (2, 2)),
+            },
+        )
+
+        self.grid.apply_changes(changes)
+        self.assertEqual(self.grid.student_at(0, 0), "Bob")
+        self.assertEqual(self.grid.position_of("Dan"), (2, 2))
+        self.assertEqual(self.grid.position_of("Cara"), (1, 0))
+
+    def test_swap(self):
+        changes, errors = self.plan([{"op": "swap", "student": "Alice", "with": "Cara"}])
+        self.assertEqual(errors, [])
+        self.grid.apply_changes(changes)
+        self.assertEqual(self.grid.position_of("Alice"), (1, 0))
+        self.assertEqual(self.grid.position_of("Cara"), (0, 0))
+
+    def test_all_errors_reported(self):
+        _, errors = self.plan(
+            [
+                {"op": "move", "student": "Zed", "row": 0, "col": 0},
+                {"op": "move", "student": "Alice", "row": 5, "col": 0},
+                {"op": "swap", "student": "Alice", "with": "Dan"},
+                {"op": "teleport", "student": "Bob"},
+            ]
+        )
+        self.assertEqual([error["index"] for error in errors], [0, 1, 2, 3])
+
+
+class TestBatchMoveView(unittest.TestCase):
+    """Atomic batch endpoint on a seating chart"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+
+    def make_room(self, size, rows=6, cols=6):
+        chart = api.content.create(
+            container=self.portal,
+            type="SeatingChart",
+            id=f"room-{size}",
+            title=f"Room {size}",
+            students=[f"Student {i}" for i in range(size)],
+            grid_rows=rows,
+            grid_cols=cols,
+        )
+        chart.auto_arrange_students()
+        return chart
+
+    def post(self, chart, operations):
+        self.request.method = "POST"
+        self.request["BODY"] = json.dumps({"operations": operations})
+        view = api.content.get_view("move-seats", chart, self.request)
+        return json.loads(view())
+
+    def test_invalid_batch_writes_nothing(self):
+        chart = self.make_room(4)
+        before = chart.get_grid()
+
+        result = self.post(
+            chart,
+            [
+                {"op": "move", "student": "Student 0", "row": 5, "col": 5},
+                {"op": "move", "student": "Nobody", "row": 0, "col": 0},
+            ],
+        )
+
+        self.assertFalse(result["success"])
+        self.assertEqual(self.request.response.getStatus(), 400)
+        self.assertEqual(chart.get_grid(), before)
+
+    def test_invalid_batch_keeps_legacy_chart_unconverted(self):
+        chart = self.make_room(4)
+        legacy = chart.grid_data
+        chart._seating_grid = None
+        chart.__dict__["grid_data"] = legacy
+
+        self.post(chart, [{"op": "move", "student": "Nobody", "row": 0, "col": 0}])
+        self.assertEqual(self.request.response.getStatus(), 400)
+        self.assertIsNone(chart._seating_grid)
+
+        self.post(chart, [{"op": "move", "student": "Student 0", "row": 5, "col": 5}])
+        self.assertIsNotNone(chart._seating_grid)
+        self.assertEqual(chart.get_seating_grid().positions["Student 0"], (5, 5))
+
+    def test_returns_diff(self):
+        chart = self.make_room(4)
+        result = self.post(
+            chart, [{"op": "swap", "student": "Student 0", "with": "Student 1"}]
+        )
+        self.assertEqual(
+            result["changes"],
+            [
+                {"student": "Student 0", "from": [0, 0], "to": [0, 1]},
+                {"student": "Student 1", "from": [0, 1], "to": [0, 0]},
+            ],
+        )
+
+    def test_full_room_rearrangement_benchmark(self):
+        """Reseating every student of a full room stays under 50 ms"""
+        size = _room_size()
+        cols = 12 if size > 60 else 6
+        rows = min(10, -(-size // cols))
+        chart = self.make_room(size, rows=rows, cols=cols)
+
+        seats = [(row, col) for row in range(rows) for col in range(cols)][:size]
+        random.Random(3).shuffle(seats)
+        operations = [
+            {"op": "move", "student": f"Student {i}", "row": row, "col": col}
+            for i, (row, col) in enumerate(seats)
+        ]
+
+        start = time.perf_counter()
+        result = self.post(chart, operations)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nBatch reseat of {size} students: {elapsed * 1000:.2f} ms")
+        self.assertTrue(result["success"])
+        self.assertEqual(chart.get_student_position("Student 0"), seats[0])
+        self.assertLess(elapsed, BATCH_BUDGET_SECONDS)
@@ -0,0 +1,95 @@
+"""
+Seating Grid Storage Tests
+
+Seat assignments are stored in a persistent SeatingGrid with a
+student -> seat reverse index; grid_data remains the JSON view of it.
+"""
+
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.seating_grid import SeatingGrid
+from project.title.testing import INTEGRATION_TESTING
+from project.title.upgrades.v1004 import convert_seating_grids
+
+LEGACY_GRID = {
+    "students": {"0,0": "Alice", "1,2": "Bob"},
+    "empty_desks": ["4,4"],
+    "notes": {"Bob": "Needs front row"},
+}
+
+
+class TestSeatingGrid(unittest.TestCase):
+    """Seat map and reverse index stay in sync"""
+
+    def setUp(self):
+        self.grid = SeatingGrid()
+        self.grid.load(LEGACY_GRID)
+
+    def test_load_round_trip(self):
+        self.assertEqual(self.grid.to_dict(), LEGACY_GRID)
+        self.assertEqual(self.grid.position_of("Bob"), (1, 2))
+
+    def test_move_updates_both_indexes(self):
+        self.assertTrue(self.grid.move("Alice", 3, 3))
+        self.assertFalse(self.grid.move("Alice", 3, 3))
+
+        self.assertIsNone(self.grid.student_at(0, 0))
+        self.assertEqual(self.grid.student_at(3, 3), "Alice")
+        self.assertEqual(self.grid.position_of("Alice"), (3, 3))
+
+    def test_move_onto_occupied_seat_unseats_occupant(self):
+        self.grid.move("Alice", 1, 2)
+
+        self.assertIsNone(self.grid.position_of("Bob"))
+        self.assertEqual(len(self.grid), 1)
+
+
+class TestSeatingChartGrid(unittest.TestCase):
+    """SeatingChart content on top of the persistent grid"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.chart = api.content.create(
+            container=self.portal,
+            type="SeatingChart",
+            id="period-3",
+            title="Period 3",
+            students=["Alice", "Bob", "Cara"],
+            grid_rows=5,
+            grid_cols=5,
+        )
+
+    def test_update_position_and_lookup(self):
+        self.assertTrue(self.chart.update_position("Cara", 2, 2))
+        self.assertFalse(self.chart.update_position("Zed", 0, 0))
+        self.assertFalse(self.chart.update_position("Cara", 9, 9))
+
+        self.assertEqual(self.chart.get_student_position("Cara"), (2, 2))
+        self.assertNotIn((2, 2), self.chart.get_empty_positions())
+        self.assertEqual(json.loads(self.chart.grid_data)["students"], {"2,2": "Cara"})
+
+    def test_grid_data_setter_replaces_arrangement(self):
+        self.chart.grid_data = json.dumps(LEGACY_GRID)
+        self.assertEqual(self.chart.get_grid(), LEGACY_GRID)
+        self.assertEqual(self.chart.get_student_position("Bob"), (1, 2))
+
+    def test_upgrade_converts_legacy_json(self):
+        # A chart saved before the grid existed: JSON text in the instance
+        self.chart._seating_grid = None
+        self.chart.__dict__["grid_data"] = json.dumps(LEGACY_GRID)
+        self.assertEqual(self.chart.get_student_position("Alice"), (0, 0))
+        self.assertIsNone(self.chart._seating_grid)  # reads do not convert
+
+        convert_seating_grids(None)
+
+        self.assertIsNotNone(self.chart._seating_grid)
+        self.assertNotIn("grid_data", self.chart.__dict__)
+        self.assertEqual(self.chart.get_grid(), LEGACY_GRID)
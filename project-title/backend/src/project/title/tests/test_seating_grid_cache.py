@@ -0,0 +1,64 @@
+"""
+Parsed Seating Grid Cache Tests
+
+Reads of a committed seating chart share one parse of the grid until the
+chart or its grid changes. Uses the functional layer so that revisions are
+really committed.
+"""
+
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+import transaction
+
+from project.title.testing import FUNCTIONAL_TESTING
+
+
+class TestParsedGridCache(unittest.TestCase):
+    """The parse is reused per committed revision"""
+
+    layer = FUNCTIONAL_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.chart = api.content.create(
+            container=self.portal,
+            type="SeatingChart",
+            id="period-5",
+            title="Period 5",
+            students=["Alice", "Bob", "Cara"],
+            grid_rows=2,
+            grid_cols=2,
+        )
+        self.chart.update_position("Alice", 0, 0)
+        transaction.commit()
+
+    def test_reads_share_one_parse(self):
+        self.assertIs(self.chart.get_grid(), self.chart.get_grid())
+        self.assertEqual(
+            self.chart.get_grid_summary(),
+            {"seated": 1, "total_desks": 4, "available": 3, "occupancy": 0.25},
+        )
+
+    def test_move_invalidates(self):
+        before = self.chart.get_grid()
+        self.chart.update_position("Bob", 1, 1)
+
+        # Uncommitted changes are read fresh, never cached
+        self.assertIsNot(self.chart.get_grid(), self.chart.get_grid())
+        self.assertNotIn((1, 1), self.chart.get_empty_positions())
+
+        transaction.commit()
+        after = self.chart.get_grid()
+        self.assertIsNot(after, before)
+        self.assertIs(self.chart.get_grid(), after)
+        self.assertEqual(after["students"], {"0,0": "Alice", "1,1": "Bob"})
+
+    def test_resize_invalidates(self):
+        self.chart.get_grid_summary()
+        self.chart.grid_cols = 3
+        transaction.commit()
+        self.assertEqual(self.chart.get_grid_summary()["total_desks"], 6)
@@ -0,0 +1,166 @@
+"""
+Seating Optimizer Tests and Benchmark
+
+Constraint handling, reproducibility with a seed, and a full 12x10 room
+with 100+ constraints solved well under a second. The benchmark's
+constraint count can be overridden, for example:
+
+    BENCHMARK_SEATING_CONSTRAINTS=300 make test
+"""
+
+import json
+import os
+import random
+import time
+import unittest
+
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+from project.title.seating_optimizer import optimize_seating
+from project.title.testing import INTEGRATION_TESTING
+
+
+def _constraint_count():
+    return int(os.environ.get("BENCHMARK_SEATING_CONSTRAINTS", "120"))
+
+
+def _room_constraints(students, count, rng):
+    """Mixed constraints: 60% keep-apart, 20% front row, 20% near door"""
+    return {
+        "keep_apart": [rng.sample(students, 2) for _ in range(count * 6 // 10)],
+        "front_row": rng.sample(students, count * 2 // 10),
+        "near_door": rng.sample(students, count * 2 // 10),
+        "groups": {name: f"group-{i % 4}" for i, name in enumerate(students)},
+        "door": [0, 11],
+    }
+
+
+class TestSeatingOptimizer(unittest.TestCase):
+    """Constraints are satisfied when the room allows it"""
+
+    def test_small_room_constraints_satisfied(self):
+        students = ["Ana", "Ben", "Cy", "Di", "Ed", "Flo"]
+        result = optimize_seating(
+            students,
+            rows=3,
+            cols=4,
+            constraints={
+                "keep_apart": [["Ana", "Ben"], ["Cy", "Di"]],
+                "front_row": ["Ed", "Flo"],
+                "min_distance": 2,
+            },
+            seed=1,
+        )
+
+        assignment = result["assignment"]
+        self.assertEqual(result["cost"], 0)
+        self.assertEqual(assignment["Ed"][0], 0)
+        self.assertEqual(assignment["Flo"][0], 0)
+        self.assertEqual(len(set(assignment.values())), len(students))
+
+    def test_groups_are_mixed(self):
+        students = [f"S{i}" for i in range(8)]
+        groups = {name: "a" if i < 4 else "b" for i, name in enumerate(students)}
+        result = optimize_seating(
+            students, rows=2, cols=4, constraints={"groups": groups}, seed=2
+        )
+        self.assertEqual(result["violations"]["groups"], 0)
+
+    def test_seed_is_reproducible(self):
+        rng = random.Random(9)
+        students = [f"Student {i}" for i in range(40)]
+        constraints = _room_constraints(students, 40, rng)
+        runs = [
+            optimize_seating(
+                students, 6, 8, constraints, seed=5, time_budget=60, max_iterations=3000
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(runs[0]["assignment"], runs[1]["assignment"])
+        self.assertEqual(runs[0]["iterations"], 3000)
+
+    def test_extra_students_stay_unseated(self):
+        result = optimize_seating(["A", "B", "C", "D", "E"], rows=2, cols=2, seed=1)
+        self.assertEqual(len(result["assignment"]), 4)
+        self.assertEqual(len(result["unseated"]), 1)
+
+
+class TestSeatingOptimizerBenchmark(unittest.TestCase):
+    """A full 12x10 room with 100+ constraints"""
+
+    def test_full_room_under_a_second(self):
+        rng = random.Random(4)
+        students = [f"Student {i}" for i in range(110)]
+        constraints = _room_constraints(students, _constraint_count(), rng)
+
+        start = time.perf_counter()
+        result = optimize_seating(
+            students, rows=10, cols=12, constraints=constraints, seed=4, time_budget=0.5
+        )
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"\nSeating optimizer ({result['backend']}): cost "
+            f"{result['initial_cost']} -> {result['cost']} in "
+            f"{elapsed * 1000:.0f} ms, {result['iterations']} iterations"
+        )
+        self.assertLess(elapsed, 1.0)
+        self.assertLess(result["cost"], result["initial_cost"] / 4)
+        self.assertEqual(result["violations"]["keep_apart"], 0)
+
+
+class TestOptimizeSeatingView(unittest.TestCase):
+    """@@optimize-seating previews or applies an arrangement"""
+
+    layer = INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer["portal"]
+        self.request = self.layer["request"]
+        setRoles(self.portal, TEST_USER_ID, ["Manager"])
+        self.chart = api.content.create(
+            container=self.portal,
+            type="SeatingChart",
+            id="period-1",
+            title="Period 1",
+            students=["Ana", "Ben", "Cy", "Di"],
+            grid_rows=3,
+            grid_cols=3,
+        )
+        self.chart.auto_arrange_students()
+
+    def post(self, **body):
+        self.request.method = "POST"
+        self.request["BODY"] = json.dumps(body)
+        view = api.content.get_view("optimize-seating", self.chart, self.request)
+        return json.loads(view())
+
+    def test_preview_does_not_write(self):
+        before = self.chart.get_grid()
+        result = self.post(constraints={"front_row": ["Di"]}, seed=1, apply=False)
+
+        self.assertFalse(result["applied"])
+        self.assertIn("Di", [change["student"] for change in result["changes"]])
+        self.assertEqual(self.chart.get_grid(), before)
+
+    def test_apply_moves_students(self):
+        self.post(constraints={"front_row": ["Di"]}, seed=1)
+        self.assertEqual(self.chart.get_student_position("Di")[0], 0)
+
+    def test_malformed_constraints_rejected(self):
+        before = self.chart.get_grid()
+        for body in (
+            {"constraints": {"keep_apart": [["Ana", "Ben", "Cy"]]}},
+            {"constraints": {"keep_apart": [[["Ana"], "Ben"]]}},
+            {"constraints": {"door": ["front", 1]}},
+            {"constraints": {"door": [1]}},
+            {"constraints": {"min_distance": "far"}},
+            {"constraints": {"front_rows": None}},
+            {"constraints": {}, "seed": [1]},
+        ):
+            result = self.post(**body)
+            self.assertIn("Invalid request", result["error"], body)
+            self.assertEqual(self.request.response.getStatus(), 400)
+        self.assertEqual(self.chart.get_grid(), before)
@@ -12,8 +12,8 @@ Comprehensive tests for Phase 4 security hardening features including:
 
 import unittest
 from datetime import datetime
+from datetime import timedelta
 from plone.app.testing import PLONE_INTEGRATION_TESTING
-from zope.annotation.interfaces import IAnnotations
 
 from project.title.security import (
     anonymize_student_data,
@@ -28,6 +28,8 @@ from project.title.security import (
     get_security_headers,
     get_csp_header,
 )
+from project.title.audit_store import get_audit_store
+from project.title.audit_store import to_key
 
 
 class TestSecurityHardening(unittest.TestCase):
@@ -172,10 +174,6 @@ class TestSecurityHardening(unittest.TestCase):
 
     def test_audit_logging(self):
         """Test audit logging functionality"""
-        # Clear any existing audit log
-        annotations = IAnnotations(self.portal, {})
-        annotations["security_audit_log"] = []
-
         # Test audit log creation
         audit_log_hall_pass(
             action="test_action",
@@ -185,10 +183,10 @@ class TestSecurityHardening(unittest.TestCase):
         )
 
         # Verify audit log entry
-        audit_log = annotations.get("security_audit_log", [])
+        audit_log = get_audit_store(self.portal)
         self.assertEqual(len(audit_log), 1)
 
-        entry = audit_log[0]
+        entry = audit_log.entries()[0]
         self.assertEqual(entry["action"], "test_action")
         self.assertEqual(entry["hall_pass_id"], "test_pass_123")
         self.assertIn("timestamp", entry)
@@ -295,11 +293,13 @@ class TestSecurityHardening(unittest.TestCase):
         self.assertEqual(anonymized["student_info"]["grade_level"], "5th")
 
     def test_audit_log_retention(self):
-        """Test audit log retention limits"""
-        annotations = IAnnotations(self.portal, {})
+        """Test audit log retention period"""
+        audit_log = get_audit_store(self.portal)
 
-        # Create more than 1000 audit entries to test retention
-        audit_log = []
+        # Entries past the 365 day retention period, and more than 1000 recent ones
+        expired = datetime.now() - timedelta(days=400)
+        for i in range(10):
+            audit_log.append({"action": f"expired_{i}"}, key=to_key(expired))
         for i in range(1100):
             audit_log.append(
                 {
@@ -310,16 +310,16 @@ class TestSecurityHardening(unittest.TestCase):
                 }
             )
 
-        annotations["security_audit_log"] = audit_log
-
         # Add one more entry through the audit function
         audit_log_hall_pass(
             action="final_test", hall_pass_id="final_pass", user_id="final_user"
         )
 
-        # Verify retention limit is enforced
-        final_log = annotations.get("security_audit_log", [])
-        self.assertLessEqual(len(final_log), 1000)
+        # Verify expired days are dropped and recent entries are all kept
+        final_log = audit_log.entries()
+        self.assertEqual(len(audit_log), 1101)
+        self.assertEqual(len(final_log), len(audit_log))
+        self.assertEqual(final_log[0]["action"], "test_action_0")
 
         # Verify the latest entry is preserved
         self.assertEqual(final_log[-1]["action"], "final_test")
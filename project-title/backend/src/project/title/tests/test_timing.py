@@ -0,0 +1,92 @@
+"""
+Function Timing Tests
+
+Percentiles per function, sampling and the rate-limited structured
+slow-call log of timing.py.
+"""
+
+import json
+import unittest
+
+from project.title import timing
+from project.title.optimizations import measure_performance
+from project.title.timing import FunctionTimings
+from project.title.timing import measure
+from project.title.timing import summarize_args
+from project.title.timing import timings
+
+
+class TestTiming(unittest.TestCase):
+    """measure, FunctionTimings and the slow-call log"""
+
+    def setUp(self):
+        timings.reset()
+        timing._slow_log_limiter = timing._SlowLogLimiter()
+
+    def tearDown(self):
+        timings.reset()
+
+    def test_percentiles(self):
+        function = FunctionTimings()
+        for ms in range(1, 101):
+            function.record(ms * 1_000_000)
+
+        summary = function.snapshot()
+
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["p50_ms"], 50.0)
+        self.assertEqual(summary["p90_ms"], 90.0)
+        self.assertEqual(summary["p99_ms"], 99.0)
+        self.assertEqual(summary["max_ms"], 100.0)
+        self.assertEqual(summary["mean_ms"], 50.5)
+
+    def test_reservoir_is_bounded(self):
+        function = FunctionTimings(size=10)
+        for ns in range(100):
+            function.record(ns)
+
+        self.assertEqual(len(function.samples), 10)
+        self.assertEqual(function.snapshot()["count"], 100)
+
+    def test_measure_keeps_function_metadata(self):
+        @measure_performance
+        def compute(value):
+            """Docstring"""
+            return value * 2
+
+        self.assertEqual(compute(21), 42)
+        self.assertEqual(compute.__name__, "compute")
+        self.assertEqual(compute.__doc__, "Docstring")
+        name = f"{__name__}.{compute.__qualname__}"
+        self.assertEqual(timings.snapshot()[name]["count"], 1)
+
+    def test_sampling(self):
+        @measure(name="sampled", sample_rate=0.25)
+        def compute():
+            return 1
+
+        for _ in range(8):
+            compute()
+
+        self.assertEqual(timings.snapshot()["sampled"]["count"], 2)
+
+    def test_slow_call_log(self):
+        @measure(name="slow", slow_ms=0)
+        def compute(rows, label, limit=10):
+            return rows
+
+        with self.assertLogs("project.title.slow_calls", level="WARNING") as logs:
+            for _ in range(timing.SLOW_LOG_PER_MINUTE + 5):
+                compute(list(range(500)), "x" * 100, limit=3)
+
+        self.assertEqual(len(logs.records), timing.SLOW_LOG_PER_MINUTE)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["event"], "slow_call")
+        self.assertEqual(record["function"], "slow")
+        self.assertEqual(record["args"], ["list[500]", "str[100]", "limit=3"])
+
+    def test_summarize_args(self):
+        self.assertEqual(
+            summarize_args((self, "ok", None), {"ids": {1, 2}}),
+            ["TestTiming", "str[2]", None, "ids=set[2]"],
+        )
@@ -0,0 +1,233 @@
+"""
+Function Timing, Percentiles and Slow-Call Log
+
+``@measure`` (also available as ``optimizations.measure_performance``)
+times calls with ``perf_counter_ns`` and keeps, per function and per
+process, the call count, total and the last ``RESERVOIR_SIZE`` durations,
+from which ``timings.snapshot()`` reports p50/p90/p99. ``metrics.timed``
+records into the same registry, and ``@@metrics`` exports it as a
+Prometheus summary.
+
+Calls slower than ``PERF_SLOW_CALL_MS`` (default 500) are logged to the
+``project.title.slow_calls`` logger as one JSON object: function,
+duration, published view, a hash of the user id and a summary of the
+arguments (types and sizes, short scalars only). At most
+``SLOW_LOG_PER_MINUTE`` records per function are written per minute.
+
+Sampling keeps the cost bounded in production: with
+``PERF_SAMPLE_RATE=0.1`` only every tenth call of a ``@measure`` function
+is timed; the others run undecorated.
+"""
+
+from collections import deque
+from functools import wraps
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+slow_call_logger = logging.getLogger("project.title.slow_calls")
+
+RESERVOIR_SIZE = 1024
+SLOW_LOG_PER_MINUTE = 30
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid {name}, using {default}")
+        return default
+
+
+SAMPLE_RATE = _env_float("PERF_SAMPLE_RATE", 1.0)
+SLOW_CALL_MS = _env_float("PERF_SLOW_CALL_MS", 500.0)
+
+
+class FunctionTimings:
+    """Durations of one function: totals plus a bounded reservoir"""
+
+    def __init__(self, size=RESERVOIR_SIZE):
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        with self._lock:
+            self.samples.append(elapsed_ns)
+            self.count += 1
+            self.total_ns += elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self.samples)
+            count, total_ns, max_ns = self.count, self.total_ns, self.max_ns
+        summary = {
+            "count": count,
+            "total_ms": round(total_ns / 1e6, 3),
+            "mean_ms": round(total_ns / count / 1e6, 3) if count else 0.0,
+            "max_ms": round(max_ns / 1e6, 3),
+        }
+        for quantile in QUANTILES:
+            key = f"p{round(quantile * 100)}_ms"
+            summary[key] = (
+                round(percentile(samples, quantile) / 1e6, 3) if samples else 0.0
+            )
+        return summary
+
+
+def percentile(samples, quantile):
+    """Nearest-rank percentile of sorted ``samples`` (``quantile`` in 0-1)"""
+    rank = max(1, math.ceil(len(samples) * quantile))
+    return samples[rank - 1]
+
+
+class TimingRegistry:
+    """FunctionTimings per function name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._functions = {}
+
+    def record(self, name, elapsed_ns):
+        timings = self._functions.get(name)
+        if timings is None:
+            with self._lock:
+                timings = self._functions.setdefault(name, FunctionTimings())
+        timings.record(elapsed_ns)
+
+    def snapshot(self):
+        """``{name: {count, total_ms, mean_ms, max_ms, p50_ms, p90_ms, p99_ms}}``"""
+        with self._lock:
+            functions = dict(self._functions)
+        return {name: timings.snapshot() for name, timings in functions.items()}
+
+    def reset(self):
+        with self._lock:
+            self._functions.clear()
+
+
+timings = TimingRegistry()
+
+
+class _SlowLogLimiter:
+    """At most ``limit`` records per function per minute"""
+
+    def __init__(self, limit=SLOW_LOG_PER_MINUTE):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._windows = {}  # name -> (minute, records)
+
+    def allow(self, name):
+        minute = int(time.monotonic() // 60)
+        with self._lock:
+            window, records = self._windows.get(name, (minute, 0))
+            if window != minute:
+                window, records = minute, 0
+            self._windows[name] = (window, records + 1)
+            return records < self.limit
+
+
+_slow_log_limiter = _SlowLogLimiter()
+
+
+def _summarize(value):
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    if isinstance(value, (str, list, tuple, set, frozenset, dict)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def summarize_args(args, kwargs):
+    """Types and sizes of call arguments, never their full contents"""
+    summary = [_summarize(arg) for arg in args]
+    summary.extend(f"{key}={_summarize(value)}" for key, value in kwargs.items())
+    return summary
+
+
+def _request_context():
+    """Published view name and hashed user id of the current request"""
+    view, user = None, None
+    try:
+        from AccessControl import getSecurityManager
+        from zope.globalrequest import getRequest
+
+        request = getRequest()
+        if request is not None:
+            published = request.get("PUBLISHED")
+            published = getattr(published, "__self__", published)
+            view = getattr(published, "__name__", None) or type(published).__name__
+        user_id = getSecurityManager().getUser().getId()
+        if user_id:
+            user = hashlib.sha256(user_id.encode()).hexdigest()[:12]
+    except Exception as e:
+        logger.debug(f"No request context for slow-call log: {e}")
+    return view, user
+
+
+def record_call(name, elapsed_ns, args=(), kwargs=None, slow_ms=None):
+    """Record a timed call; log it when slower than ``slow_ms``"""
+    timings.record(name, elapsed_ns)
+    threshold = SLOW_CALL_MS if slow_ms is None else slow_ms
+    if elapsed_ns < threshold * 1e6 or not _slow_log_limiter.allow(name):
+        return
+    view, user = _request_context()
+    slow_call_logger.warning(
+        json.dumps(
+            {
+                "event": "slow_call",
+                "function": name,
+                "duration_ms": round(elapsed_ns / 1e6, 3),
+                "threshold_ms": threshold,
+                "view": view,
+                "user": user,
+                "args": summarize_args(args, kwargs or {}),
+            },
+            default=str,
+        )
+    )
+
+
+def measure(func=None, *, name=None, slow_ms=None, sample_rate=None):
+    """Time calls of a function; use as ``@measure`` or ``@measure(...)``
+
+    Args:
+        name: Name in the timings and the slow-call log (default: the
+            function's module and qualified name)
+        slow_ms: Slow-call threshold (default ``PERF_SLOW_CALL_MS``)
+        sample_rate: Share of calls timed (default ``PERF_SAMPLE_RATE``)
+    """
+    if func is None:
+        return lambda func: measure(
+            func, name=name, slow_ms=slow_ms, sample_rate=sample_rate
+        )
+
+    label = name or f"{func.__module__}.{func.__qualname__}"
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    every = round(1 / rate) if rate > 0 else 0
+    calls = itertools.count()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not every or next(calls) % every:
+            return func(*args, **kwargs)
+        started = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_call(
+                label, time.perf_counter_ns() - started, args, kwargs, slow_ms
+            )
+
+    return wrapper
@@ -0,0 +1,34 @@
+"""
+Upgrade 1000 -> 1001: brain-only dashboard metadata.
+
+Adds the hall_pass_is_active index and the hall_pass_* metadata columns,
+then reindexes existing hall passes and seating charts so the dashboard
+never has to wake up objects.
+"""
+
+from plone import api
+import logging
+
+logger = logging.getLogger(__name__)
+
+HALL_PASS_INDEXES = ["hall_pass_is_active", "hall_pass_duration", "hall_pass_status"]
+SEATING_INDEXES = ["seating_student_count", "seating_last_updated"]
+
+
+def reindex_classroom_content(context):
+    """Reindex hall passes and seating charts, refreshing metadata columns"""
+    catalog = api.portal.get_tool("portal_catalog")
+
+    for portal_type, idxs in (
+        ("HallPass", HALL_PASS_INDEXES),
+        ("SeatingChart", SEATING_INDEXES),
+    ):
+        brains = catalog.unrestrictedSearchResults(portal_type=portal_type)
+        for brain in brains:
+            try:
+                obj = brain._unrestrictedGetObject()
+                # update_metadata is on by default, so the new columns are filled
+                obj.reindexObject(idxs=idxs)
+            except Exception as e:
+                logger.warning(f"Reindex failed for {brain.getPath()}: {e}")
+        logger.info(f"Reindexed {len(brains)} {portal_type} objects")
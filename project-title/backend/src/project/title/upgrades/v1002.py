@@ -0,0 +1,105 @@
+"""
+Upgrade 1001 -> 1002: conflict-friendly classroom state storage.
+
+Moves picker history, the security audit log, rate limits and the hall
+pass / timer statistics from plain dicts and lists on the portal
+annotations into the BTree-based ClassroomStateStorage, then removes the
+old annotation keys.
+"""
+
+from datetime import datetime
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+import logging
+
+from ..event_handlers import HALL_PASS_STATS
+from ..event_handlers import TIMER_USAGE_STATS
+from ..security import AUDIT_LOG_NAME
+from ..security import RATE_LIMITS_NAME
+from ..storage import get_classroom_storage
+
+logger = logging.getLogger(__name__)
+
+PICKER_HISTORY_PREFIX = "picker_history_"
+
+
+def _migrate_picker_history(annotations, storage):
+    keys = [
+        key
+        for key in list(annotations.keys())
+        if isinstance(key, str) and key.startswith(PICKER_HISTORY_PREFIX)
+    ]
+    for key in keys:
+        tree = storage.tree(key)
+        for student, record in dict(annotations[key]).items():
+            tree[student] = dict(record)
+        del annotations[key]
+    return len(keys)
+
+
+def _migrate_audit_log(annotations, storage):
+    entries = annotations.get(AUDIT_LOG_NAME)
+    if entries is None:
+        return 0
+    log = storage.log(AUDIT_LOG_NAME)
+    for entry in entries:
+        log.append(dict(entry))
+    del annotations[AUDIT_LOG_NAME]
+    return len(entries)
+
+
+def _migrate_rate_limits(annotations, storage):
+    rate_limits = annotations.get(RATE_LIMITS_NAME)
+    if rate_limits is None:
+        return 0
+    tree = storage.tree(RATE_LIMITS_NAME)
+    for key, timestamps in dict(rate_limits).items():
+        converted = []
+        for timestamp in timestamps:
+            try:
+                converted.append(datetime.fromisoformat(timestamp).timestamp())
+            except (TypeError, ValueError):
+                continue
+        tree[key] = tuple(converted)
+    del annotations[RATE_LIMITS_NAME]
+    return len(rate_limits)
+
+
+def _migrate_statistics(annotations, storage):
+    migrated = 0
+    stats = annotations.get(HALL_PASS_STATS)
+    if stats is not None:
+        for field in ("total_passes", "total_duration"):
+            storage.increment(HALL_PASS_STATS, field, int(stats.get(field, 0)))
+        del annotations[HALL_PASS_STATS]
+        migrated += 1
+
+    timer_stats = annotations.get(TIMER_USAGE_STATS)
+    if timer_stats is not None:
+        for timer_type, entry in dict(timer_stats).items():
+            for field in ("count", "total_duration"):
+                storage.increment(
+                    TIMER_USAGE_STATS, (timer_type, field), int(entry.get(field, 0))
+                )
+        del annotations[TIMER_USAGE_STATS]
+        migrated += 1
+    return migrated
+
+
+def migrate_classroom_state(context):
+    """Move high-write annotation values into ClassroomStateStorage"""
+    portal = api.portal.get()
+    annotations = IAnnotations(portal)
+    storage = get_classroom_storage(portal)
+
+    for name, migrate in (
+        ("picker history days", _migrate_picker_history),
+        ("audit log entries", _migrate_audit_log),
+        ("rate limit keys", _migrate_rate_limits),
+        ("statistics records", _migrate_statistics),
+    ):
+        try:
+            count = migrate(annotations, storage)
+            logger.info(f"Migrated {count} {name} to classroom state storage")
+        except Exception as e:
+            logger.error(f"Migrating {name} failed: {e}")
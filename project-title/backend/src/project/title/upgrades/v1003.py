@@ -0,0 +1,35 @@
+"""
+Upgrade 1002 -> 1003: time-correct hall pass date indexes.
+
+Replaces the hall_pass_duration FieldIndex (a duration snapshot taken at
+index time, stale for active passes) with DateIndexes on the issue and
+expected return times, and reindexes existing hall passes.
+"""
+
+from plone import api
+import logging
+
+logger = logging.getLogger(__name__)
+
+STALE_INDEXES = ["hall_pass_duration"]
+HALL_PASS_INDEXES = ["hall_pass_issue_time", "hall_pass_expected_return"]
+
+
+def replace_duration_index(context):
+    """Drop the snapshot duration index and fill the new date indexes"""
+    catalog = api.portal.get_tool("portal_catalog")
+
+    for name in STALE_INDEXES:
+        if name in catalog.indexes():
+            catalog.delIndex(name)
+            logger.info(f"Removed stale catalog index {name}")
+
+    brains = catalog.unrestrictedSearchResults(portal_type="HallPass")
+    for brain in brains:
+        try:
+            obj = brain._unrestrictedGetObject()
+            # update_metadata is on by default, so the new column is filled
+            obj.reindexObject(idxs=HALL_PASS_INDEXES)
+        except Exception as e:
+            logger.warning(f"Reindex failed for {brain.getPath()}: {e}")
+    logger.info(f"Reindexed {len(brains)} HallPass objects")
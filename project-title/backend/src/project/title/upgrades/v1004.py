@@ -0,0 +1,34 @@
+"""
+Upgrade 1003 -> 1004: persistent seating grids.
+
+Converts the ``grid_data`` JSON text of every seating chart into its
+``SeatingGrid`` (seat map plus student reverse index). Charts that are
+not converted here convert themselves on their next write.
+"""
+
+from plone import api
+import logging
+import transaction
+
+logger = logging.getLogger(__name__)
+
+SAVEPOINT_EVERY = 100
+
+
+def convert_seating_grids(context):
+    """Move seat assignments from grid_data JSON to SeatingGrid BTrees"""
+    catalog = api.portal.get_tool("portal_catalog")
+    brains = catalog.unrestrictedSearchResults(portal_type="SeatingChart")
+
+    converted = 0
+    for brain in brains:
+        try:
+            obj = brain._unrestrictedGetObject()
+            if obj._seating_grid is None:
+                obj.get_seating_grid()
+                converted += 1
+                if converted % SAVEPOINT_EVERY == 0:
+                    transaction.savepoint(optimistic=True)
+        except Exception as e:
+            logger.warning(f"Seating grid conversion failed for {brain.getPath()}: {e}")
+    logger.info(f"Converted {converted} of {len(brains)} seating charts")
@@ -0,0 +1,17 @@
+"""
+Upgrade 1004 -> 1005: fill the classroom_ready index.
+
+The classroom_ready_status indexer was never registered, so the
+classroom_ready index and column held nothing for most content.
+"""
+
+from ..index_health import rebuild_custom_indexes
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def reindex_classroom_ready(context):
+    """Rebuild the classroom_ready index now that its indexer is registered"""
+    report = rebuild_custom_indexes(names=["classroom_ready"], commit=False)
+    logger.info(f"Reindexed classroom_ready for {report['objects']} objects")
@@ -0,0 +1,27 @@
+"""
+Upgrade 1005 -> 1006: registry switch for per-request profiling.
+
+Adds ``project.title.perf_trace_enabled`` (off) without re-importing the
+other registry records, which sites may have customized.
+"""
+
+from plone.registry import field
+from plone.registry.interfaces import IRegistry
+from plone.registry.record import Record
+from zope.component import getUtility
+import logging
+
+from ..perf_trace import REGISTRY_RECORD
+
+logger = logging.getLogger(__name__)
+
+
+def add_perf_trace_record(context):
+    """Add the perf trace switch if the registry lacks it"""
+    registry = getUtility(IRegistry)
+    if REGISTRY_RECORD in registry.records:
+        return
+    registry.records[REGISTRY_RECORD] = Record(
+        field.Bool(title="Trace every request to classroom views"), False
+    )
+    logger.info(f"Added registry record {REGISTRY_RECORD}")
@@ -0,0 +1,41 @@
+"""
+Upgrade 1006 -> 1007: time-bucketed audit store.
+
+Moves the security audit log entries from the classroom state storage log
+into the audit store, keyed by each entry's own ``timestamp`` (the log
+key is the fallback), then removes the log.
+"""
+
+from datetime import datetime
+from plone import api
+import logging
+
+from ..audit_store import get_audit_store
+from ..audit_store import to_key
+from ..security import AUDIT_LOG_NAME
+from ..storage import get_classroom_storage
+
+logger = logging.getLogger(__name__)
+
+
+def entry_key(key, entry):
+    """Audit store key of a log entry: its recorded time, else the log key"""
+    try:
+        return to_key(datetime.fromisoformat(entry["timestamp"]))
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Audit entry {key} has no usable timestamp: {e}")
+        return key
+
+
+def migrate_audit_log(context):
+    """Copy the append log into the audit store"""
+    portal = api.portal.get()
+    storage = get_classroom_storage(portal, create=False)
+    audit_log = storage.get_log(AUDIT_LOG_NAME) if storage is not None else None
+    if audit_log is None:
+        return
+    audit_store = get_audit_store(portal)
+    for key, entry in audit_log.items():
+        audit_store.append(dict(entry), key=entry_key(key, entry))
+    storage.drop_log(AUDIT_LOG_NAME)
+    logger.info(f"Moved {len(audit_log)} audit log entries to the audit store")
@@ -0,0 +1,17 @@
+"""
+Upgrade 1007 -> 1008: hall pass code index.
+
+Indexes the pass code of existing hall passes so ``@@pass-qr`` finds
+content passes with one catalog query.
+"""
+
+from ..index_health import rebuild_custom_indexes
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def reindex_pass_codes(context):
+    """Fill the hall_pass_code index and metadata column"""
+    report = rebuild_custom_indexes(names=["hall_pass_code"], commit=False)
+    logger.info(f"Indexed pass codes of {report['objects']} hall passes")
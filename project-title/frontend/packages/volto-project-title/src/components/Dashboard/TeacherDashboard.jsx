@@ -70,10 +70,31 @@ const TeacherDashboard = () => {
     // Initial load
     fetchDashboardData();
 
-    // Set up polling for real-time updates every 30 seconds
-    const interval = setInterval(fetchDashboardData, 30000);
+    // Push updates: the backend streams deltas (issued/returned/overdue
+    // passes, picks, timers) and we refetch only when something changed
+    let stream = null;
+    let interval = null;
+    if (typeof window !== 'undefined' && window.EventSource) {
+      stream = new EventSource(`${contentUrl}/@@dashboard-stream`, {
+        withCredentials: true,
+      });
+      [
+        'pass_issued',
+        'pass_returned',
+        'overdue',
+        'student_picked',
+        'timer_completed',
+        'resync',
+      ].forEach((type) => stream.addEventListener(type, fetchDashboardData));
+    }
+
+    // Slow safety-net poll (the only update path without EventSource)
+    interval = setInterval(fetchDashboardData, stream ? 300000 : 30000);
 
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      if (stream) stream.close();
+    };
   }, []);
 
   /**